@@ -0,0 +1,272 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from src.core.config import settings
+from src.core.logging_config import setup_logging
+from src.schemas.availability import TimeRangeFilterEnum
+from src.synthetic_data_generator import AREAS, generate, parse_args as parse_dataset_args
+import argparse
+import asyncio
+import json
+import random
+import shlex
+import subprocess
+import sys
+import time
+import httpx
+
+# Uso (desde la carpeta backend):
+#   python -m benchmarks.run_benchmark --start-server --seed-dataset --dataset-args "--regions 4 --days 30" \
+#       --duration 60 --read-workers 32 --output results.json
+#   python -m benchmarks.run_benchmark --base-url http://127.0.0.1:8000 --baseline results.json --threshold 0.10
+
+AVAILABILITY_PATH = f"{settings.APP_API_PREFIX}/availability/check/"
+APPOINTMENTS_PATH = f"{settings.APP_API_PREFIX}/appointments/"
+POOL_WAIT_METRIC = "db_pool_wait_seconds"
+ERROR_RATE_TOLERANCE = 0.01
+
+class OperationStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.status_counts: Dict[str, int] = {}
+
+    def record(self, latency: float, status_code: Optional[int]) -> None:
+        self.latencies.append(latency)
+        key = str(status_code) if status_code is not None else "exception"
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+    def summary(self, elapsed: float) -> dict:
+        count = len(self.latencies)
+        latencies = sorted(self.latencies)
+        errors = sum(n for status, n in self.status_counts.items() if status == "exception" or status.startswith("5"))
+        return {
+            "requests": count,
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "p99_ms": _percentile(latencies, 99),
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "conflict_rate": round(self.status_counts.get("409", 0) / count, 4) if count else 0.0,
+            "status_counts": self.status_counts
+        }
+
+def _percentile(sorted_values: List[float], percentile: int) -> Optional[float]:
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(percentile / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[rank] * 1000, 2)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark de disponibilidad y reservas con carga mixta.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="URL base de la API")
+    parser.add_argument("--start-server", action="store_true", help="Levanta uvicorn main:app en la URL base")
+    parser.add_argument("--server-workers", type=int, default=1, help="Workers de uvicorn al usar --start-server")
+    parser.add_argument("--seed-dataset", action="store_true", help="Carga el dataset sintético antes de medir")
+    parser.add_argument(
+        "--dataset-args", default="",
+        help="Argumentos de src.synthetic_data_generator; también definen los filtros que se consultan"
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="Duración de la medición en segundos")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Segundos de calentamiento no medidos")
+    parser.add_argument("--read-workers", type=int, default=16, help="Clientes concurrentes consultando disponibilidad")
+    parser.add_argument("--race-workers", type=int, default=2, help="Carreras de reserva ejecutándose en paralelo")
+    parser.add_argument("--race-contenders", type=int, default=8, help="Solicitudes simultáneas por el mismo slot")
+    parser.add_argument("--seed", type=int, default=7, help="Semilla de la carga generada")
+    parser.add_argument("--output", help="Archivo JSON con los resultados")
+    parser.add_argument("--baseline", help="Resultados JSON previos con los que comparar")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10,
+        help="Regresión tolerada respecto del baseline (0.10 = 10%% en latencia p95/p99 y throughput)"
+    )
+    return parser.parse_args(argv)
+
+class Workload:
+    def __init__(self, args: argparse.Namespace, dataset: argparse.Namespace):
+        self.args = args
+        self.dataset = dataset
+        self.rng = random.Random(args.seed)
+        self.areas = list(enumerate(AREAS.values(), start=1))
+        self.reads = OperationStats("availability")
+        self.bookings = OperationStats("booking")
+        self.races = 0
+        self.races_without_slot = 0
+        self.double_bookings = 0
+        self.measuring = False
+
+    def random_filter(self) -> dict:
+        region = self.rng.randint(1, self.dataset.regions)
+        commune = (region - 1) * self.dataset.communes + self.rng.randint(1, self.dataset.communes)
+        area, specialties = self.rng.choice(self.areas)
+        return {
+            "region": region,
+            "commune": commune,
+            "area": area,
+            "specialty": self.rng.choice(specialties),
+            "time_range_filter": self.rng.choice(list(TimeRangeFilterEnum)).value
+        }
+
+    async def _timed(self, stats: OperationStats, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await request
+        except httpx.HTTPError:
+            pass
+        if self.measuring:
+            stats.record(time.perf_counter() - started, response.status_code if response else None)
+        return response
+
+    async def read_worker(self, client: httpx.AsyncClient, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            await self._timed(self.reads, client.get(AVAILABILITY_PATH, params=self.random_filter()))
+
+    async def race_worker(self, client: httpx.AsyncClient, deadline: float) -> None:
+        patients = self.dataset.patients
+        while time.perf_counter() < deadline:
+            response = await client.get(AVAILABILITY_PATH, params=self.random_filter())
+            slots = response.json().get("available_slots", []) if response.status_code == 200 else []
+            if not slots:
+                self.races_without_slot += 1
+                continue
+            slot_id = self.rng.choice(slots)["id"]
+            responses = await asyncio.gather(*[
+                self._timed(self.bookings, client.post(
+                    APPOINTMENTS_PATH, json={"id": slot_id, "patient_id": self.rng.randint(1, patients)}
+                ))
+                for _ in range(self.args.race_contenders)
+            ])
+            if self.measuring:
+                self.races += 1
+                if sum(1 for r in responses if r is not None and r.status_code == 201) > 1:
+                    self.double_bookings += 1
+
+    async def run(self, client: httpx.AsyncClient, seconds: float) -> float:
+        deadline = time.perf_counter() + seconds
+        started = time.perf_counter()
+        await asyncio.gather(
+            *[self.read_worker(client, deadline) for _ in range(self.args.read_workers)],
+            *[self.race_worker(client, deadline) for _ in range(self.args.race_workers)]
+        )
+        return time.perf_counter() - started
+
+async def scrape_pool_wait(client: httpx.AsyncClient) -> Optional[tuple]:
+    # Lee la suma y el conteo del histograma de espera del pool si la API expone /metrics.
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    # Se suman todas las series (un pool por engine: primario y réplica de lectura).
+    total = count = None
+    for line in response.text.splitlines():
+        if line.startswith(f"{POOL_WAIT_METRIC}_sum"):
+            total = (total or 0.0) + float(line.rsplit(" ", 1)[1])
+        elif line.startswith(f"{POOL_WAIT_METRIC}_count"):
+            count = (count or 0.0) + float(line.rsplit(" ", 1)[1])
+    return (total, count) if total is not None and count is not None else None
+
+def pool_wait_summary(before: Optional[tuple], after: Optional[tuple]) -> Optional[dict]:
+    if before is None or after is None:
+        return None
+    waits = after[1] - before[1]
+    total = after[0] - before[0]
+    return {
+        "checkouts": int(waits),
+        "total_seconds": round(total, 4),
+        "mean_ms": round(total / waits * 1000, 3) if waits else 0.0
+    }
+
+def compare_with_baseline(results: dict, baseline: dict, threshold: float) -> List[str]:
+    regressions = []
+    for name, current in results["operations"].items():
+        previous = baseline.get("operations", {}).get(name)
+        if not previous or not current["requests"]:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(f"{name}.{metric}: {previous[metric]} -> {current[metric]}")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}.throughput_rps: {previous['throughput_rps']} -> {current['throughput_rps']}")
+        if current["error_rate"] > previous["error_rate"] + ERROR_RATE_TOLERANCE:
+            regressions.append(f"{name}.error_rate: {previous['error_rate']} -> {current['error_rate']}")
+    if results["double_bookings"]:
+        regressions.append(f"double_bookings: {results['double_bookings']}")
+    return regressions
+
+async def wait_for_server(client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/docs")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"La API no respondió en {timeout} segundos")
+
+def start_server(base_url: str, workers: int) -> subprocess.Popen:
+    url = httpx.URL(base_url)
+    return subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", url.host, "--port", str(url.port or 80), "--workers", str(workers), "--log-level", "warning"
+    ])
+
+async def run(args: argparse.Namespace) -> int:
+    dataset = parse_dataset_args(shlex.split(args.dataset_args))
+    server = start_server(args.base_url, args.server_workers) if args.start_server else None
+    limits = httpx.Limits(max_connections=args.read_workers + args.race_workers * args.race_contenders)
+    try:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30.0) as client:
+            await wait_for_server(client)
+            if args.seed_dataset:
+                # Se carga después de levantar la API para que el arranque no reemplace el dataset.
+                await generate(dataset)
+
+            workload = Workload(args, dataset)
+            if args.warmup:
+                await workload.run(client, args.warmup)
+            pool_before = await scrape_pool_wait(client)
+            workload.measuring = True
+            elapsed = await workload.run(client, args.duration)
+            workload.measuring = False
+            pool_after = await scrape_pool_wait(client)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "dataset": vars(dataset) | {"start_date": dataset.start_date.isoformat() if dataset.start_date else None},
+        "elapsed_seconds": round(elapsed, 2),
+        "operations": {
+            workload.reads.name: workload.reads.summary(elapsed),
+            workload.bookings.name: workload.bookings.summary(elapsed)
+        },
+        "races": workload.races,
+        "races_without_slot": workload.races_without_slot,
+        "double_bookings": workload.double_bookings,
+        "pool_wait": pool_wait_summary(pool_before, pool_after)
+    }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_with_baseline(results, json.load(f), args.threshold)
+        if regressions:
+            print("Regresiones respecto del baseline:", *regressions, sep="\n  ", file=sys.stderr)
+            return 1
+        print("Sin regresiones respecto del baseline.", file=sys.stderr)
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> None:
+    setup_logging(log_level=settings.LOG_LEVEL, log_to_file=False)
+    sys.exit(asyncio.run(run(parse_args(argv))))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
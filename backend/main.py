@@ -1,38 +1,61 @@
+import asyncio
+import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from src.api.routes import api_router
 from src.core.config import settings
-from src.core.database import engine
-from src.models.database_models import Base  # Importamos Base desde database_models
 from src.core.logging_config import get_logger, setup_logging, LOG_DIR
-from src.dummy_data_generator import insert_dummy_data
 
+# El logging se configura una sola vez y antes de importar los módulos que registran eventos al cargarse.
 setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
+
+from src.api.routes import api_router
+from src.core.bootstrap import bootstrap_database, startup_phase
+from src.services.holds import HoldService
+from src.services.slot_events import SlotEventService
+from src.services.catalog import CatalogService
+from src.core.metrics import MetricsMiddleware, registry
+from src.core.profiling import ProfilingMiddleware
+
 logger = get_logger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    logger.info("Iniciando lifespan: creación de tablas y datos dummy.")
-    registered_tables = list(Base.metadata.tables.keys())
-    logger.debug("Tablas registradas en Base.metadata antes de create_all: %s", registered_tables)
-    
+    started = time.perf_counter()
+    logger.info("Iniciando lifespan en entorno %s.", settings.APP_ENVIRONMENT)
     try:
-        async with engine.begin() as conn:
-            logger.info("Ejecutando Base.metadata.create_all para crear tablas.")
-            await conn.run_sync(Base.metadata.create_all)
-            await conn.commit()
-            logger.info("Creación de tablas completada, procediendo a insertar datos dummy.")
-            await insert_dummy_data()
+        await bootstrap_database()
+        async with startup_phase("retenciones vigentes"):
+            await HoldService.load_active_holds()
+        async with startup_phase("catálogo de referencia"):
+            await CatalogService.load_catalog()
     except Exception as e:
         logger.critical("Error durante el lifespan: %s", str(e), exc_info=True)
         raise
-    
-    logger.info("Lifespan completado.")
+
+    # El listener escucha la recarga del catálogo siempre y los eventos de slot si SLOT_EVENTS_ENABLED.
+    background_tasks = [
+        asyncio.create_task(HoldService.run_sweeper()),
+        asyncio.create_task(CatalogService.run_refresher()),
+        asyncio.create_task(SlotEventService.run_listener(
+            {settings.CATALOG_NOTIFY_CHANNEL: CatalogService.on_notification}
+        ))
+    ]
+
+    logger.info("Lifespan completado en %.1f ms.", (time.perf_counter() - started) * 1000)
     yield
 
+    for task in background_tasks:
+        task.cancel()
+    for task in background_tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
 app = FastAPI(
     title=settings.APP_TITLE,
     description=settings.APP_DESCRIPTION,
@@ -50,6 +73,16 @@ app.add_middleware(
     expose_headers=settings.CORS_EXPOSE_HEADERS
 )
 
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> PlainTextResponse:
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if settings.APP_ENVIRONMENT == "development":
     app.mount("/logs", StaticFiles(directory=LOG_DIR), name="logs")
 
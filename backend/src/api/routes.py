@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from src.api.v1.endpoints import appointments, availability#, payments #, upload_schedules
+from src.api.v1.endpoints import appointments, availability, upload_schedules, schedule_templates, catalog#, payments
 
 api_router = APIRouter()
 
@@ -15,13 +15,25 @@ api_router.include_router(
     tags=["Agendamiento de citas médicas"]
 )
 
-"""
 api_router.include_router(
     upload_schedules.router,
     prefix="/upload-schedules",
     tags=["Upload Schedules"]
 )
 
+api_router.include_router(
+    schedule_templates.router,
+    prefix="/schedule-templates",
+    tags=["Plantillas de horario"]
+)
+
+api_router.include_router(
+    catalog.router,
+    prefix="/catalog",
+    tags=["Catálogo"]
+)
+
+"""
 api_router.include_router(
     payments.router,
     prefix="/payments",
@@ -1,12 +1,16 @@
-from fastapi import Depends, HTTPException, status, APIRouter
+from fastapi import Depends, HTTPException, status, APIRouter, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.schemas.appointments import AppointmentCreate, AppointmentResponse
+from src.schemas.appointments import (
+    AppointmentCreate, AppointmentResponse, BulkAppointmentCreate, BulkAppointmentResponse,
+    SlotHoldCreate, SlotHoldResponse
+)
 from src.services.appointments import AppointmentService
-from src.core.database import get_db
-from src.core.logging_config import get_logger, setup_logging
-from src.core.config import settings
+from src.services.holds import HoldService
+from src.core.database import get_db, mark_recent_write
+from src.core.exceptions import SlotAlreadyReservedError, BulkReservationError, HoldNotFoundError
+from src.core.logging_config import get_logger
+from src.core.metrics import bookings_total
 
-setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
 logger = get_logger(__name__)
 
 router = APIRouter()
@@ -29,16 +33,167 @@ router = APIRouter()
 )
 async def create_appointment(
     data: AppointmentCreate,
+    response: Response,
     db: AsyncSession = Depends(get_db)
 ) -> AppointmentResponse:
     logger.info(f"Solicitud recibida para crear cita: {data.model_dump()}")
     try:
         appointment = await AppointmentService.create_appointment(data, db)
+        bookings_total.inc("single", "success")
+        mark_recent_write(response)
         logger.info(f"Cita creada exitosamente con ID: {appointment.id}")
         return appointment
+    except SlotAlreadyReservedError as sre:
+        bookings_total.inc("single", "slot_taken")
+        logger.info(f"Conflicto de reserva: {str(sre)}")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(sre))
     except ValueError as ve:
+        bookings_total.inc("single", "error")
         logger.error(f"Error de validación: {str(ve)}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
     except Exception as e:
+        bookings_total.inc("single", "error")
         logger.error(f"Error al crear cita: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
+
+@router.post(
+    "/bulk",
+    response_model=BulkAppointmentResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Crea varias citas en una sola transacción.",
+    description=(
+        "Reserva una lista de slots de available_slots para un paciente en una única transacción. "
+        "Con all_or_nothing=true no se reserva ningún slot si alguno no está disponible; con false se reservan "
+        "los disponibles y se informa el estado de cada slot."
+    ),
+    responses={
+        201: {"description": "Citas agendadas satisfactoriamente"},
+        409: {"description": "Uno o más slots no están disponibles"},
+        422: {"description": "Datos de entrada inválidos"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def create_bulk_appointments(
+    data: BulkAppointmentCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+) -> BulkAppointmentResponse:
+    logger.info(f"Solicitud recibida para crear citas en lote: {data.model_dump()}")
+    try:
+        result = await AppointmentService.create_bulk_appointments(data, db)
+        bookings_total.inc("bulk", "success")
+        mark_recent_write(response)
+        logger.info(f"Citas en lote creadas exitosamente: {result.reserved}")
+        return result
+    except BulkReservationError as bre:
+        bookings_total.inc("bulk", "slot_taken")
+        logger.info(f"Conflicto de reserva en lote: {str(bre)}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(bre), "results": [r.model_dump(mode="json") for r in bre.results]}
+        )
+    except Exception as e:
+        bookings_total.inc("bulk", "error")
+        logger.error(f"Error al crear citas en lote: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
+
+@router.post(
+    "/holds",
+    response_model=SlotHoldResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Retiene un slot por algunos minutos.",
+    description=(
+        "Reserva temporalmente un slot de available_slots mientras el paciente completa el pago. "
+        "El slot retenido no aparece en la disponibilidad y se libera automáticamente al vencer."
+    ),
+    responses={
+        201: {"description": "Slot retenido satisfactoriamente"},
+        400: {"description": "Datos de entrada inválidos"},
+        409: {"description": "El slot ya fue reservado o retenido por otro usuario"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def create_hold(
+    data: SlotHoldCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+) -> SlotHoldResponse:
+    logger.info(f"Solicitud recibida para retener slot: {data.model_dump()}")
+    try:
+        hold = await HoldService.create_hold(data, db)
+        mark_recent_write(response)
+        logger.info(f"Slot ID {hold.slot_id} retenido hasta {hold.expires_at}")
+        return hold
+    except SlotAlreadyReservedError as sre:
+        logger.info(f"Conflicto de retención: {str(sre)}")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(sre))
+    except ValueError as ve:
+        logger.error(f"Error de validación: {str(ve)}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error al retener slot: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
+
+@router.post(
+    "/holds/{token}/confirm",
+    response_model=AppointmentResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Confirma una retención como cita.",
+    description="Convierte una retención vigente en una cita sin volver a bloquear el slot.",
+    responses={
+        201: {"description": "Cita agendada satisfactoriamente"},
+        404: {"description": "La retención no existe o ya venció"},
+        409: {"description": "El slot retenido fue reservado por otro usuario"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def confirm_hold(
+    token: str,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+) -> AppointmentResponse:
+    logger.info(f"Solicitud recibida para confirmar retención: {token}")
+    try:
+        appointment = await HoldService.confirm_hold(token, db)
+        bookings_total.inc("hold", "success")
+        mark_recent_write(response)
+        logger.info(f"Cita creada exitosamente desde retención con ID: {appointment.id}")
+        return appointment
+    except HoldNotFoundError as hnf:
+        bookings_total.inc("hold", "error")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(hnf))
+    except SlotAlreadyReservedError as sre:
+        bookings_total.inc("hold", "slot_taken")
+        logger.info(f"Conflicto al confirmar retención: {str(sre)}")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(sre))
+    except Exception as e:
+        bookings_total.inc("hold", "error")
+        logger.error(f"Error al confirmar retención: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
+
+@router.delete(
+    "/holds/{token}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Libera una retención.",
+    description="Libera anticipadamente un slot retenido para que vuelva a estar disponible.",
+    responses={
+        204: {"description": "Retención liberada"},
+        404: {"description": "La retención no existe o ya venció"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def release_hold(
+    token: str,
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    logger.info(f"Solicitud recibida para liberar retención: {token}")
+    try:
+        await HoldService.release_hold(token, db)
+        response = Response(status_code=status.HTTP_204_NO_CONTENT)
+        mark_recent_write(response)
+        return response
+    except HoldNotFoundError as hnf:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(hnf))
+    except Exception as e:
+        logger.error(f"Error al liberar retención: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
\ No newline at end of file
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.core.database import get_db
-from src.core.logging_config import get_logger, setup_logging
+from datetime import date
+from typing import Optional
+from src.core.database import get_read_db, read_session_factory, reads_from_primary, reads_forced_to_primary
 from src.core.config import settings
-from src.schemas.availability import AvailabilityQuery, AvailabilityResponse
-from src.services.availability import AvailabilityService
+from src.core.logging_config import get_logger
+from src.schemas.availability import (
+    AvailabilityQuery, AvailabilityPageQuery, AvailabilityResponse, AvailabilityBatchRequest, AvailabilityBatchResponse,
+    SlotEventQuery, NextAvailableQuery
+)
+from src.services.availability import AvailabilityService, availability_etag
+from src.services.slot_events import SlotEventService
+from src.services.catalog import resolve_filter
+from src.core.responses import FastJSONResponse, availability_payload, etag_matches
 
-setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
 logger = get_logger(__name__)
 
 router = APIRouter()
@@ -16,32 +24,52 @@ router = APIRouter()
     response_model=AvailabilityResponse,
     status_code=status.HTTP_200_OK,
     summary="Verifica la disponibilidad de horas médicas",
-    description="Consulta la disponibilidad de horas médicas según región, comuna, área, especialidad y rango horario.",
+    description=(
+        "Consulta la disponibilidad de horas médicas según región, comuna, área, especialidad y rango horario. "
+        "Los resultados se acotan a una ventana de fechas y se paginan con el cursor devuelto en next_cursor. "
+        "La respuesta incluye un ETag: reenviándolo en If-None-Match se obtiene 304 si la disponibilidad no cambió."
+    ),
     responses={
         200: {"description": "Devuelve las citas disponibles según los datos ingresados"},
+        304: {"description": "La disponibilidad no cambió desde el ETag enviado en If-None-Match"},
         400: {"description": "Parámetros inválidos proporcionados"},
         404: {"description": "No se encontraron citas disponibles para los criterios especificados"},
         500: {"description": "Error interno del servidor"}
     }
 )
 async def check_availability(
+    request: Request,
     query: AvailabilityQuery = Depends(),
-    db: AsyncSession = Depends(get_db)
-) -> AvailabilityResponse:
+    page: AvailabilityPageQuery = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+) -> Response:
     logger.info(
         "Solicitud recibida para verificar disponibilidad: region=%s, comuna=%s, area=%s, specialty=%s, time_range_filter=%s",
         query.region, query.commune, query.area, query.specialty, query.time_range_filter
     )
     try:
-        normalized_specialty = query.specialty.lower()
+        specialty_id = resolve_filter(query.region, query.commune, query.area, query.specialty)
+        # El ETag se calcula antes de consultar: un cambio concurrente deja la respuesta con la versión anterior
+        # y la siguiente solicitud condicional no coincide, nunca al revés. Solo se emite si la lectura va al
+        # primario: una réplica atrasada devolvería datos anteriores a la versión y el 304 los fijaría.
+        etag = availability_etag(
+            query.region, query.commune, query.area, specialty_id, query.time_range_filter.value, page
+        ) if reads_from_primary(request) else None
+        if etag and etag_matches(request, etag):
+            logger.debug("Disponibilidad sin cambios (304): %s", etag)
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "no-cache"})
         result = await AvailabilityService.check_availability(
-            query.region, query.commune, query.area, normalized_specialty, query.time_range_filter, db
+            query.region, query.commune, query.area, specialty_id, query.time_range_filter, db, page=page,
+            use_cache=not reads_forced_to_primary(request)
         )
         logger.debug(
-            "Disponibilidad encontrada para region=%s, comuna=%s, area=%s, specialty=%s, time_range_filter=%s: %s",
-            query.region, query.commune, query.area, normalized_specialty, query.time_range_filter, result.model_dump()
+            "Disponibilidad encontrada para region=%s, comuna=%s, area=%s, specialty_id=%s, time_range_filter=%s: %d slots",
+            query.region, query.commune, query.area, specialty_id, query.time_range_filter, len(result.slots)
         )
-        return result
+        headers = {"ETag": etag, "Cache-Control": "no-cache"} if etag else None
+        return FastJSONResponse(availability_payload(result.slots, result.next_cursor), headers=headers)
+    except HTTPException:
+        raise
     except ValueError as ve:
         logger.error("Error de validación: %s", str(ve))
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
@@ -50,4 +78,162 @@ async def check_availability(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor. Contacte al soporte con el ID de traza en los logs."
-        )
\ No newline at end of file
+        )
+
+@router.post(
+    "/batch",
+    response_model=AvailabilityBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Verifica la disponibilidad para varias combinaciones de filtros",
+    description=(
+        "Resuelve en una sola solicitud y una sola consulta SQL varias combinaciones de región, comuna, área, "
+        "especialidad y rango horario. Los resultados se devuelven en el mismo orden de las consultas."
+    ),
+    responses={
+        200: {"description": "Devuelve las citas disponibles para cada consulta"},
+        422: {"description": "Parámetros inválidos proporcionados"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def check_availability_batch(
+    request: AvailabilityBatchRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_read_db)
+) -> FastJSONResponse:
+    logger.info("Solicitud recibida para verificar disponibilidad en lote: %d consultas", len(request.queries))
+    try:
+        queries = [
+            query.model_copy(update={"specialty": query.specialty.lower()})
+            for query in request.queries
+        ]
+        pages = await AvailabilityService.check_availability_batch(
+            queries, db, use_cache=not reads_forced_to_primary(http_request)
+        )
+        return FastJSONResponse({
+            "results": [
+                {"index": idx, "query": query.model_dump(mode="json"), **availability_payload(page.slots, page.next_cursor)}
+                for idx, (query, page) in enumerate(zip(queries, pages))
+            ]
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.critical("Error inesperado en el endpoint de lote: %s", str(e), exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor. Contacte al soporte con el ID de traza en los logs."
+        )
+
+@router.get(
+    "/next",
+    status_code=status.HTTP_200_OK,
+    summary="Busca las próximas horas disponibles de una especialidad",
+    description=(
+        "Devuelve las horas libres más próximas para un área y especialidad entre todos los médicos y franjas "
+        "horarias, ordenadas por inicio. Región y comuna son opcionales para ampliar la búsqueda."
+    ),
+    responses={
+        200: {"description": "Próximas horas disponibles en orden cronológico"},
+        404: {"description": "No hay horas disponibles o la combinación de filtros no existe en el catálogo"},
+        422: {"description": "Parámetros inválidos proporcionados"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def next_available(
+    query: NextAvailableQuery = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+) -> FastJSONResponse:
+    logger.info(
+        "Solicitud recibida para próximas horas disponibles: area=%s, specialty=%s, region=%s, comuna=%s, limit=%s",
+        query.area, query.specialty, query.region, query.commune, query.limit
+    )
+    try:
+        specialty_id = resolve_filter(query.region, query.commune, query.area, query.specialty)
+        slots = await AvailabilityService.next_available(
+            query.area, specialty_id, db, region=query.region, commune=query.commune, limit=query.limit
+        )
+        return FastJSONResponse({
+            "available_slots": [
+                {
+                    "id": slot_id,
+                    "medic_id": medic_id,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "time_range": time_bucket
+                }
+                for slot_id, medic_id, start_time, end_time, time_bucket in slots
+            ]
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.critical("Error inesperado en el endpoint de próximas horas: %s", str(e), exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor. Contacte al soporte con el ID de traza en los logs."
+        )
+
+@router.get(
+    "/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Transmite la disponibilidad de horas médicas como NDJSON",
+    description=(
+        "Devuelve todos los slots disponibles de la ventana de fechas solicitada como un flujo NDJSON, "
+        "un slot por línea, leyendo la base de datos por bloques para mantener acotado el uso de memoria."
+    ),
+    responses={
+        200: {"description": "Flujo NDJSON de slots disponibles", "content": {"application/x-ndjson": {}}},
+        404: {"description": "La combinación de filtros no existe en el catálogo"},
+        422: {"description": "Parámetros inválidos proporcionados"}
+    }
+)
+async def stream_availability(
+    request: Request,
+    query: AvailabilityQuery = Depends(),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None
+) -> StreamingResponse:
+    logger.info(
+        "Solicitud recibida para transmitir disponibilidad: region=%s, comuna=%s, area=%s, specialty=%s, time_range_filter=%s",
+        query.region, query.commune, query.area, query.specialty, query.time_range_filter
+    )
+    specialty_id = resolve_filter(query.region, query.commune, query.area, query.specialty)
+    return StreamingResponse(
+        AvailabilityService.stream_availability(
+            query.region, query.commune, query.area, specialty_id, query.time_range_filter,
+            from_date=from_date, to_date=to_date, session_factory=read_session_factory(request)
+        ),
+        media_type="application/x-ndjson"
+    )
+
+@router.get(
+    "/events",
+    status_code=status.HTTP_200_OK,
+    summary="Transmite los cambios de disponibilidad en tiempo real (SSE)",
+    description=(
+        "Abre un flujo server-sent events con los slots retenidos, reservados y liberados para la región, comuna, "
+        "área y especialidad indicadas. Un evento resync indica que el cliente debe volver a consultar la "
+        "disponibilidad completa, por ejemplo tras no consumir sus eventos a tiempo."
+    ),
+    responses={
+        200: {"description": "Flujo de eventos de slots", "content": {"text/event-stream": {}}},
+        404: {"description": "La combinación de filtros no existe en el catálogo"},
+        422: {"description": "Parámetros inválidos proporcionados"},
+        503: {"description": "El feed de eventos está deshabilitado"}
+    }
+)
+async def stream_slot_events(query: SlotEventQuery = Depends()) -> StreamingResponse:
+    if not settings.SLOT_EVENTS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="El feed de eventos de disponibilidad está deshabilitado."
+        )
+    logger.info(
+        "Suscripción a eventos de disponibilidad: region=%s, comuna=%s, area=%s, specialty=%s",
+        query.region, query.commune, query.area, query.specialty
+    )
+    specialty_id = resolve_filter(query.region, query.commune, query.area, query.specialty)
+    return StreamingResponse(
+        SlotEventService.stream(query.region, query.commune, query.area, specialty_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
\ No newline at end of file
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from src.core.config import settings
+from src.core.logging_config import get_logger
+from src.core.responses import FastJSONResponse, etag_json_response
+from src.services.catalog import reference_catalog
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+_CATALOG_RESPONSES = {
+    200: {"description": "Datos del catálogo con su ETag"},
+    304: {"description": "El catálogo no cambió desde el ETag enviado en If-None-Match"},
+    503: {"description": "El catálogo aún no está cargado"}
+}
+
+def _catalog_response(request: Request, payload_key: str) -> Response:
+    snapshot = reference_catalog.snapshot
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="El catálogo de referencia aún no está cargado."
+        )
+    body = snapshot.payloads.get(payload_key)
+    if body is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="El recurso solicitado no existe en el catálogo.")
+    return etag_json_response(request, reference_catalog.etag, body, settings.CATALOG_MAX_AGE_SECONDS)
+
+@router.get(
+    "/",
+    summary="Devuelve el catálogo completo de regiones, comunas y áreas",
+    description="Catálogo servido desde memoria. Envíe el ETag recibido en If-None-Match para obtener 304 si no cambió.",
+    responses=_CATALOG_RESPONSES
+)
+async def get_catalog(request: Request) -> Response:
+    return _catalog_response(request, "catalog")
+
+@router.get(
+    "/regions",
+    summary="Lista las regiones",
+    responses=_CATALOG_RESPONSES
+)
+async def get_regions(request: Request) -> Response:
+    return _catalog_response(request, "regions")
+
+@router.get(
+    "/regions/{region_id}/communes",
+    summary="Lista las comunas de una región",
+    responses={**_CATALOG_RESPONSES, 404: {"description": "La región no existe"}}
+)
+async def get_region_communes(region_id: int, request: Request) -> Response:
+    return _catalog_response(request, f"communes:{region_id}")
+
+@router.get(
+    "/areas",
+    summary="Lista las áreas médicas",
+    responses=_CATALOG_RESPONSES
+)
+async def get_areas(request: Request) -> Response:
+    return _catalog_response(request, "areas")
+
+@router.get(
+    "/specialties",
+    summary="Lista las especialidades",
+    responses=_CATALOG_RESPONSES
+)
+async def get_specialties(request: Request) -> Response:
+    return _catalog_response(request, "specialties")
+
+@router.get(
+    "/specialties/search",
+    summary="Autocompleta especialidades por prefijo",
+    description=(
+        "Busca en memoria las especialidades cuyo nombre, o alguna de sus palabras, comienza con el texto indicado. "
+        "No distingue mayúsculas ni tildes."
+    ),
+    responses={200: {"description": "Especialidades que coinciden con el prefijo"}}
+)
+async def search_specialties(
+    q: str = Query(..., min_length=1, max_length=50, description="Texto inicial de la especialidad"),
+    limit: int = Query(10, ge=1, le=50, description="Cantidad máxima de resultados")
+) -> FastJSONResponse:
+    return FastJSONResponse(reference_catalog.search_specialties(q, limit))
\ No newline at end of file
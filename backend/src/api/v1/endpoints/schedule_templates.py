@@ -0,0 +1,180 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import List, Optional
+from src.core.database import get_db, get_read_db, mark_recent_write
+from src.core.exceptions import SlotAlreadyReservedError, TemplateNotFoundError
+from src.core.logging_config import get_logger
+from src.core.metrics import bookings_total
+from src.schemas.availability import AvailabilityQuery
+from src.schemas.appointments import AppointmentResponse
+from src.schemas.schedule_templates import (
+    ScheduleTemplateCreate, ScheduleTemplateResponse, ScheduleExceptionCreate, ScheduleExceptionResponse,
+    TemplateAvailabilityResponse, TemplateAppointmentCreate
+)
+from src.services.schedule_templates import ScheduleTemplateService
+from src.services.catalog import resolve_filter
+from src.core.responses import FastJSONResponse
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+@router.post(
+    "/",
+    response_model=List[ScheduleTemplateResponse],
+    status_code=status.HTTP_201_CREATED,
+    summary="Crea una regla de horario semanal recurrente.",
+    description=(
+        "Registra la jornada semanal de un médico (por ejemplo lunes a viernes de 09:00 a 12:00 cada 60 minutos). "
+        "Se crea una plantilla por cada día de la semana indicado; los slots no se guardan hasta que se reservan."
+    ),
+    responses={
+        201: {"description": "Plantillas creadas satisfactoriamente"},
+        400: {"description": "Datos de entrada inválidos"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def create_templates(
+    data: ScheduleTemplateCreate,
+    db: AsyncSession = Depends(get_db)
+) -> List[ScheduleTemplateResponse]:
+    logger.info(f"Solicitud recibida para crear plantillas de horario: {data.model_dump(mode='json')}")
+    try:
+        return await ScheduleTemplateService.create_templates(data, db)
+    except ValueError as ve:
+        logger.error(f"Error de validación: {str(ve)}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error al crear plantillas de horario: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
+
+@router.post(
+    "/exceptions",
+    response_model=ScheduleExceptionResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Bloquea un día o un tramo horario de la agenda de un médico.",
+    description="Los slots de plantilla que caen dentro de la excepción dejan de ofrecerse y no pueden reservarse.",
+    responses={
+        201: {"description": "Excepción creada satisfactoriamente"},
+        400: {"description": "Datos de entrada inválidos"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def create_exception(
+    data: ScheduleExceptionCreate,
+    db: AsyncSession = Depends(get_db)
+) -> ScheduleExceptionResponse:
+    logger.info(f"Solicitud recibida para crear excepción de horario: {data.model_dump(mode='json')}")
+    try:
+        return await ScheduleTemplateService.create_exception(data, db)
+    except ValueError as ve:
+        logger.error(f"Error de validación: {str(ve)}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error al crear excepción de horario: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
+
+@router.get(
+    "/availability",
+    response_model=TemplateAvailabilityResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Verifica la disponibilidad generada por plantillas de horario",
+    description=(
+        "Expande al vuelo las plantillas de los médicos que cumplen los filtros dentro de la ventana de fechas, "
+        "descontando excepciones, slots ya materializados y citas existentes."
+    ),
+    responses={
+        200: {"description": "Devuelve los slots disponibles generados por las plantillas"},
+        400: {"description": "Parámetros inválidos proporcionados"},
+        404: {"description": "No se encontraron slots disponibles para los criterios especificados"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def check_template_availability(
+    query: AvailabilityQuery = Depends(),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db)
+) -> FastJSONResponse:
+    logger.info(
+        "Solicitud recibida para disponibilidad por plantillas: region=%s, comuna=%s, area=%s, specialty=%s, time_range_filter=%s",
+        query.region, query.commune, query.area, query.specialty, query.time_range_filter
+    )
+    try:
+        specialty_id = resolve_filter(query.region, query.commune, query.area, query.specialty)
+        slots = await ScheduleTemplateService.check_availability(
+            query.region, query.commune, query.area, specialty_id, query.time_range_filter, db,
+            from_date=from_date, to_date=to_date
+        )
+        if not slots:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=(
+                    f"No se encontraron slots de plantilla para la región {query.region}, comuna {query.commune}, "
+                    f"área {query.area}, especialidad '{query.specialty}' y rango horario '{query.time_range_filter.value}'."
+                )
+            )
+        return FastJSONResponse({
+            "available_slots": [
+                {"template_id": template_id, "start_time": start_time, "end_time": end_time}
+                for template_id, start_time, end_time in slots
+            ]
+        })
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        logger.error("Error de validación: %s", str(ve))
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except Exception as e:
+        logger.critical("Error inesperado en el endpoint de plantillas: %s", str(e), exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor. Contacte al soporte con el ID de traza en los logs."
+        )
+
+@router.post(
+    "/appointments",
+    response_model=AppointmentResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Reserva un slot generado por una plantilla.",
+    description=(
+        "Materializa el slot en available_slots, ya reservado, y crea la cita en una sola sentencia. "
+        "Si el mismo horario ya estaba publicado como slot libre, se reserva ese slot. "
+        "Si otro usuario reservó el mismo horario del médico se responde 409."
+    ),
+    responses={
+        201: {"description": "Cita agendada satisfactoriamente"},
+        400: {"description": "El horario no corresponde a la plantilla, está bloqueado o se traslapa con un slot publicado"},
+        404: {"description": "La plantilla no existe"},
+        409: {"description": "El slot ya fue reservado por otro usuario"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def book_template_slot(
+    data: TemplateAppointmentCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+) -> AppointmentResponse:
+    logger.info(f"Solicitud recibida para reservar slot de plantilla: {data.model_dump(mode='json')}")
+    try:
+        appointment = await ScheduleTemplateService.book_template_slot(data, db)
+        bookings_total.inc("template", "success")
+        mark_recent_write(response)
+        logger.info(f"Cita creada exitosamente desde plantilla con ID: {appointment.id}")
+        return appointment
+    except TemplateNotFoundError as tnf:
+        bookings_total.inc("template", "error")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(tnf))
+    except SlotAlreadyReservedError as sre:
+        bookings_total.inc("template", "slot_taken")
+        logger.info(f"Conflicto de reserva: {str(sre)}")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(sre))
+    except ValueError as ve:
+        bookings_total.inc("template", "error")
+        logger.error(f"Error de validación: {str(ve)}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except Exception as e:
+        bookings_total.inc("template", "error")
+        logger.error(f"Error al reservar slot de plantilla: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
\ No newline at end of file
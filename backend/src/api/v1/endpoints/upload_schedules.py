@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.database import get_db
+from src.core.logging_config import get_logger
+from src.schemas.upload_schedules import ScheduleUploadResponse
+from src.services.upload_schedules import ScheduleUploadService
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+UPLOAD_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson"
+}
+
+@router.post(
+    "/",
+    response_model=ScheduleUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Carga masiva de horarios de médicos",
+    description=(
+        "Recibe un archivo CSV (columnas medic_id,start_time,end_time) o NDJSON como cuerpo de la solicitud y lo "
+        "procesa en streaming por bloques: cada bloque se valida y se copia con COPY a una tabla de staging, y al "
+        "final se incorpora a available_slots descartando repetidos, traslapes y médicos inexistentes. La respuesta "
+        "llega al terminar la carga completa e incluye el resumen de cada bloque."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}}
+            }
+        }
+    },
+    responses={
+        201: {"description": "Resumen de la carga con el detalle de cada bloque"},
+        415: {"description": "Tipo de contenido no soportado"},
+        500: {"description": "Error interno del servidor"}
+    }
+)
+async def upload_schedules(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+) -> ScheduleUploadResponse:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    upload_format = UPLOAD_CONTENT_TYPES.get(content_type)
+    if upload_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Tipo de contenido no soportado: '{content_type}'. Use text/csv o application/x-ndjson."
+        )
+    logger.info("Solicitud recibida para carga masiva de horarios (%s)", upload_format)
+    try:
+        return await ScheduleUploadService.upload(request.stream(), upload_format, db)
+    except Exception as e:
+        logger.critical("Error inesperado en la carga masiva de horarios: %s", str(e), exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor. Contacte al soporte con el ID de traza en los logs."
+        )
\ No newline at end of file
@@ -0,0 +1,107 @@
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+from src.core.database import engine
+from src.core.exceptions import SchemaVersionError
+from src.models.database_models import Base, SchemaVersion, schema_fingerprint
+from src.core.logging_config import get_logger, setup_logging
+from src.core.config import settings
+import asyncio
+import time
+
+logger = get_logger(__name__)
+
+# Uso en despliegues: python -m src.core.bootstrap crea las tablas faltantes y registra la versión del esquema
+# una sola vez, antes de reiniciar los workers en modo producción.
+
+SELECT_SCHEMA_VERSION = select(SchemaVersion.version).where(SchemaVersion.id == 1)
+
+@asynccontextmanager
+async def startup_phase(name: str) -> AsyncIterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        logger.info("Fase de arranque '%s' completada en %.1f ms", name, (time.perf_counter() - started) * 1000)
+
+def _missing_schema_objects(connection) -> List[str]:
+    # create_all solo crea tablas que no existen: en las existentes no agrega columnas, índices ni restricciones.
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        live_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in live_columns)
+        live_names = {index["name"] for index in inspector.get_indexes(table.name)}
+        live_names.update(constraint["name"] for constraint in inspector.get_unique_constraints(table.name))
+        live_names.update(constraint["name"] for constraint in inspector.get_foreign_keys(table.name))
+        live_names.update(constraint["name"] for constraint in inspector.get_check_constraints(table.name))
+        live_names.add(inspector.get_pk_constraint(table.name).get("name"))
+        declared = {str(index.name) for index in table.indexes if index.name}
+        declared.update(str(constraint.name) for constraint in table.constraints if constraint.name)
+        missing.extend(f"{table.name}.{name}" for name in sorted(declared - live_names))
+    return missing
+
+async def create_schema() -> str:
+    version = schema_fingerprint()
+    async with engine.begin() as conn:
+        # La versión solo se registra si las tablas existentes ya tienen todo lo que declaran los modelos.
+        missing = await conn.run_sync(_missing_schema_objects)
+        if missing:
+            raise SchemaVersionError(
+                "Las tablas existentes no coinciden con los modelos y no se alteran automáticamente. "
+                f"Aplique la migración antes de registrar el esquema. Faltan: {', '.join(missing)}"
+            )
+        await conn.run_sync(Base.metadata.create_all)
+        stamp = pg_insert(SchemaVersion).values(id=1, version=version)
+        await conn.execute(stamp.on_conflict_do_update(
+            index_elements=[SchemaVersion.id], set_={"version": version, "applied_at": text("now()")}
+        ))
+    logger.info("Esquema creado o actualizado y versión registrada: %s", version)
+    return version
+
+async def verify_schema() -> str:
+    # Una sola lectura indexada en lugar de reflejar todas las tablas con inspect().
+    expected = schema_fingerprint()
+    try:
+        async with engine.connect() as conn:
+            current = (await conn.execute(SELECT_SCHEMA_VERSION)).scalar_one_or_none()
+    except ProgrammingError:
+        current = None
+    if current is None:
+        raise SchemaVersionError(
+            "La base de datos no tiene versión de esquema registrada. Ejecute 'python -m src.core.bootstrap' antes de iniciar."
+        )
+    if current != expected:
+        raise SchemaVersionError(
+            f"La versión del esquema en la base de datos ({current}) no coincide con la de los modelos ({expected})."
+        )
+    logger.debug("Versión del esquema verificada: %s", current)
+    return current
+
+async def bootstrap_database() -> None:
+    logger.info("Modo de arranque: %s", settings.APP_BOOT_MODE)
+    if settings.APP_BOOT_MODE == "production":
+        async with startup_phase("verificación de esquema"):
+            await verify_schema()
+        return
+
+    async with startup_phase("creación de esquema"):
+        await create_schema()
+    if settings.APP_SEED_ON_STARTUP:
+        # Import diferido: el generador de datos ficticios no se carga en producción.
+        from src.dummy_data_generator import insert_dummy_data
+        async with startup_phase("datos ficticios"):
+            await insert_dummy_data()
+
+async def _stamp_schema() -> None:
+    await create_schema()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
+    asyncio.run(_stamp_schema())
\ No newline at end of file
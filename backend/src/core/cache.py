@@ -0,0 +1,109 @@
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Literal, Tuple
+
+CacheState = Literal["fresh", "stale", "miss"]
+
+class TTLCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, stale_seconds: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._refreshing: set = set()
+        # La generación global avanza con clear(); la de cada clave, con su invalidación.
+        self.generation = 0
+        self._key_generations: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[CacheState, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return "miss", None
+
+        stored_at, value = entry
+        age = time.monotonic() - stored_at
+        if age <= self.ttl_seconds:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return "fresh", value
+        if age <= self.ttl_seconds + self.stale_seconds:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return "stale", value
+
+        del self._entries[key]
+        self.misses += 1
+        return "miss", None
+
+    def generation_of(self, key: Hashable) -> Tuple[int, int]:
+        return self.generation, self._key_generations.get(key, 0)
+
+    def set(self, key: Hashable, value: Any, generation: Tuple[int, int] | None = None) -> None:
+        # Una invalidación de esta clave, o un clear(), ocurrida mientras se cargaba el valor lo vuelve obsoleto.
+        # Las invalidaciones de otras claves no descartan la carga.
+        if generation is not None and generation != self.generation_of(key):
+            return
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._key_generations[key] = self._key_generations.get(key, 0) + 1
+        self._entries.pop(key, None)
+        if len(self._key_generations) > 4 * self.max_entries:
+            # Acota la memoria de claves invalidadas; avanzar la generación global cubre las cargas en curso.
+            self.clear()
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._key_generations.clear()
+        self._entries.clear()
+
+    def begin_refresh(self, key: Hashable) -> bool:
+        if key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        return True
+
+    def end_refresh(self, key: Hashable) -> None:
+        self._refreshing.discard(key)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class VersionCounters:
+    # Versión por clave que avanza con cada cambio; el epoch distingue procesos para que dos workers
+    # nunca emitan la misma versión para datos distintos.
+    def __init__(self, tracking: bool = True):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.generation = 0
+        self.tracking = tracking
+        self._versions: Dict[Hashable, int] = {}
+
+    def bump(self, key: Hashable) -> None:
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def bump_all(self) -> None:
+        self.generation += 1
+        self._versions.clear()
+
+    def version(self, key: Hashable) -> str | None:
+        # Sin seguimiento confiable de cambios (por ejemplo, sin LISTEN entre workers) no hay versión.
+        if not self.tracking:
+            return None
+        return f"{self.epoch}.{self.generation}.{self._versions.get(key, 0)}"
\ No newline at end of file
@@ -1,5 +1,30 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, computed_field
+from typing import Literal, Optional, Tuple
+from urllib.parse import urlsplit
+from src.core.exceptions import ConnectionBudgetError
+
+def divide_connection_budget(
+    max_connections: Optional[int], workers: int, pool_size: int, max_overflow: int, reserved: int = 0, pools: int = 1
+) -> Tuple[int, int]:
+    # Sin presupuesto se respetan DB_POOL_SIZE y DB_MAX_OVERFLOW; con presupuesto actúan como máximos por worker.
+    # reserved son las conexiones de cada worker fuera de los pools (la conexión LISTEN) y pools cuántos pools
+    # del worker apuntan al mismo servidor y se reparten lo que queda.
+    if not max_connections:
+        return pool_size, max_overflow
+    per_worker = (max_connections // max(1, workers) - reserved) // max(1, pools)
+    if per_worker < 1:
+        # Subir la cuota a 1 superaría el presupuesto: se rechaza la configuración en vez de exceder el límite.
+        raise ConnectionBudgetError(
+            f"DB_MAX_CONNECTIONS={max_connections} no alcanza para {workers} workers con {pools} pool(s) y "
+            f"{reserved} conexión(es) reservada(s) por worker"
+        )
+    size = min(pool_size, per_worker)
+    return size, min(max_overflow, per_worker - size)
+
+def database_server(url: str) -> Tuple[Optional[str], int]:
+    parts = urlsplit(url)
+    return parts.hostname, parts.port or 5432
 
 class Settings(BaseSettings):
     # Configuración general de la aplicación
@@ -11,12 +36,14 @@ class Settings(BaseSettings):
     APP_HOST: str = Field(default="0.0.0.0")
     APP_PORT: int = Field(default=8005)
     APP_PAYMENT_REDIRECT_HOST: str = Field(default="localhost")
+    # Solo fuera de producción se crean las tablas y se cargan datos ficticios al arrancar.
+    APP_SEED_ON_STARTUP: bool = Field(default=True)
 
     # Configuración CORS
     CORS_ORIGINS: list[str] = Field(default=["*"])
     CORS_METHODS: list[str] = Field(default=["*"])
     CORS_HEADERS: list[str] = Field(default=["*"])
-    CORS_EXPOSE_HEADERS: list[str] = Field(default=["Content-Disposition"])
+    CORS_EXPOSE_HEADERS: list[str] = Field(default=["Content-Disposition", "ETag"])
     
     # Configuración de base de datos
     DB_POSTGRES_USER: str
@@ -27,6 +54,69 @@ class Settings(BaseSettings):
     DB_ECHO: bool = Field(default=False)
     DB_POOL_SIZE: int = Field(default=5)
     DB_MAX_OVERFLOW: int = Field(default=10)
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = Field(default=256)
+    # Réplica de lectura opcional para disponibilidad; sin URL se lee desde el primario.
+    DB_READ_DATABASE_URL: Optional[str] = Field(default=None)
+    DB_READ_POOL_SIZE: int = Field(default=10)
+    DB_READ_MAX_OVERFLOW: int = Field(default=10)
+    DB_READ_YOUR_WRITES_SECONDS: float = Field(default=5.0)
+    # Presupuesto global de conexiones por servidor de base de datos, repartido entre los workers de uvicorn.
+    APP_WORKERS: int = Field(default=1)
+    DB_MAX_CONNECTIONS: Optional[int] = Field(default=None)
+    # Compatible con poolers en modo transacción (PgBouncer): sin pool propio ni sentencias preparadas en caché.
+    DB_PGBOUNCER_MODE: bool = Field(default=False)
+
+    # Caché de disponibilidad
+    AVAILABILITY_CACHE_ENABLED: bool = Field(default=True)
+    AVAILABILITY_CACHE_MAX_ENTRIES: int = Field(default=10_000)
+    AVAILABILITY_CACHE_TTL_SECONDS: float = Field(default=5.0)
+    AVAILABILITY_CACHE_STALE_SECONDS: float = Field(default=0.0)
+    AVAILABILITY_BATCH_MAX_QUERIES: int = Field(default=50)
+    AVAILABILITY_ETAG_ENABLED: bool = Field(default=True)
+
+    # Paginación y streaming de disponibilidad
+    AVAILABILITY_PAGE_SIZE: int = Field(default=100)
+    AVAILABILITY_MAX_PAGE_SIZE: int = Field(default=500)
+    AVAILABILITY_STREAM_CHUNK_SIZE: int = Field(default=500)
+    AVAILABILITY_TIE_BREAK: Literal["random", "least_loaded"] = Field(default="random")
+    AVAILABILITY_NEXT_DEFAULT_LIMIT: int = Field(default=5)
+    AVAILABILITY_NEXT_MAX_LIMIT: int = Field(default=50)
+
+    # Reservas
+    APPOINTMENT_BULK_MAX_SLOTS: int = Field(default=50)
+    SLOT_HOLD_DEFAULT_MINUTES: int = Field(default=10)
+    SLOT_HOLD_MAX_MINUTES: int = Field(default=30)
+    SLOT_HOLD_SWEEP_INTERVAL_SECONDS: float = Field(default=30.0)
+
+    # Catálogo de referencia (regiones, comunas, áreas) cargado en memoria
+    CATALOG_REFRESH_SECONDS: float = Field(default=300.0)
+    CATALOG_NOTIFY_CHANNEL: str = Field(default="catalog_refresh")
+    CATALOG_MAX_AGE_SECONDS: int = Field(default=60)
+    # Rechaza con 404, sin consultar la base de datos, filtros de disponibilidad que no existen en el catálogo.
+    CATALOG_VALIDATE_FILTERS: bool = Field(default=True)
+
+    # Feed de cambios de disponibilidad (LISTEN/NOTIFY + SSE)
+    SLOT_EVENTS_ENABLED: bool = Field(default=True)
+    SLOT_EVENTS_CHANNEL: str = Field(default="slot_events")
+    SLOT_EVENTS_QUEUE_SIZE: int = Field(default=100)
+    SLOT_EVENTS_HEARTBEAT_SECONDS: float = Field(default=15.0)
+    # LISTEN requiere una conexión de sesión: con PgBouncer en modo transacción debe apuntar directo a Postgres.
+    SLOT_EVENTS_DATABASE_URL: Optional[str] = Field(default=None)
+
+    # Carga masiva de horarios
+    SCHEDULE_UPLOAD_CHUNK_SIZE: int = Field(default=5000)
+    SCHEDULE_UPLOAD_MAX_ERRORS: int = Field(default=100)
+
+    # Plantillas de horario recurrente
+    SCHEDULE_TEMPLATE_DEFAULT_DAYS: int = Field(default=14)
+    SCHEDULE_TEMPLATE_MAX_DAYS: int = Field(default=90)
+
+    # Métricas y perfilado
+    METRICS_ENABLED: bool = Field(default=True)
+    PROFILING_ENABLED: bool = Field(default=True)
+    DB_SLOW_QUERY_MS: float = Field(default=250.0)
+    DB_EXPLAIN_SLOW_QUERIES: bool = Field(default=True)
+    DB_EXPLAIN_COOLDOWN_SECONDS: float = Field(default=300.0)
 
     # Logging
     LOG_LEVEL: str = Field(default="INFO")
@@ -35,12 +125,32 @@ class Settings(BaseSettings):
     LOG_FILE_ENCODING: str = Field(default="utf-8")
     LOG_MAX_BYTES: int = Field(default=5 * 1024 * 1024)  # 5 MB
     LOG_BACKUP_COUNT: int = Field(default=5)
+    LOG_FORMAT: Literal["text", "json"] = Field(default="text")
+    # Fracción de los INFO que se conserva para los loggers de alto volumen (1.0 = sin muestreo).
+    LOG_INFO_SAMPLE_RATE: float = Field(default=1.0)
+    LOG_SAMPLED_LOGGERS: list[str] = Field(default=["src.api.v1.endpoints", "src.services.availability"])
 
     # Configuración de Transbank
     TBK_COMMERCE_CODE: str
     TBK_API_KEY: str
     TBK_ENVIRONMENT: str = Field(default="TEST")
     
+    def worker_pool_limits(self, pool_size: int, max_overflow: int, read: bool = False) -> Tuple[int, int]:
+        # DB_MAX_CONNECTIONS es el límite de cada servidor: se descuenta la conexión LISTEN del worker y, si la
+        # réplica apunta al mismo servidor que el primario, ambos pools se reparten el resto.
+        server = database_server(self.DB_READ_DATABASE_URL if read else self.DATABASE_URL)
+        pool_urls = [self.DATABASE_URL] + ([self.DB_READ_DATABASE_URL] if self.DB_READ_DATABASE_URL else [])
+        pools = sum(database_server(url) == server for url in pool_urls)
+        listener_url = self.SLOT_EVENTS_DATABASE_URL or self.DATABASE_URL
+        reserved = int(database_server(listener_url) == server)
+        return divide_connection_budget(
+            self.DB_MAX_CONNECTIONS, self.APP_WORKERS, pool_size, max_overflow, reserved=reserved, pools=pools
+        )
+
+    @computed_field(return_type=str)
+    def APP_BOOT_MODE(self) -> str:
+        return "production" if self.APP_ENVIRONMENT == "production" else "development"
+
     @computed_field(return_type=str)
     def DATABASE_URL(self) -> str:
         return (
@@ -1,45 +1,165 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from src.core.logging_config import setup_logging, get_logger
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy import event
+from src.core.logging_config import get_logger
 from sqlalchemy.sql import text
 from src.core.config import settings
 from src.models.database_models import Base
-from typing import AsyncGenerator
-from fastapi import HTTPException
+from src.core.metrics import registry, db_query_duration_seconds, db_pool_wait_seconds
+from src.core.profiling import record_query
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
+import time
+import uuid
+from fastapi import HTTPException, Request, Response
 
-setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
 logger = get_logger(__name__)
 
-try:
-    logger.debug("Inicializando motor de base de datos con URL: %s", settings.DATABASE_URL)
-    engine = create_async_engine(
-        settings.DATABASE_URL,
-        echo=settings.DB_ECHO,
-        pool_size=settings.DB_POOL_SIZE,
-        max_overflow=settings.DB_MAX_OVERFLOW,
-        pool_pre_ping=True,
-        pool_recycle=3600,
-        pool_timeout=30
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # Mide cuánto espera una sesión por una conexión, incluida la apertura de conexiones nuevas.
+    metric_label = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait_seconds.observe(time.perf_counter() - started, self.metric_label)
+
+class ReadInstrumentedQueuePool(InstrumentedQueuePool):
+    metric_label = "read"
+
+class InstrumentedNullPool(NullPool):
+    # Modo PgBouncer: cada checkout abre una conexión nueva contra el pooler; se mide igual que la espera del pool.
+    metric_label = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait_seconds.observe(time.perf_counter() - started, self.metric_label)
+
+class ReadInstrumentedNullPool(InstrumentedNullPool):
+    metric_label = "read"
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _observe_query_duration(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    db_query_duration_seconds.observe(elapsed, statement.lstrip().split(None, 1)[0].upper())
+    record_query(elapsed, statement)
+    if elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+        logger.warning("Consulta lenta (%.1f ms): %s | parámetros: %s", elapsed * 1000, statement, parameters)
+
+def _discard_query_timer(exception_context) -> None:
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+def _create_engine(url: str, pool_size: int, max_overflow: int, read: bool = False) -> AsyncEngine:
+    metric_prefix = "db_read_pool" if read else "db_pool"
+    if settings.DB_PGBOUNCER_MODE:
+        # El pooler reparte las conexiones entre transacciones: las sentencias preparadas no sobreviven entre
+        # ellas, así que se desactivan ambas cachés y se usan nombres únicos para las que asyncpg prepara.
+        pool_options = {"poolclass": ReadInstrumentedNullPool if read else InstrumentedNullPool}
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4().hex}__"
+        }
+    else:
+        pool_size, max_overflow = settings.worker_pool_limits(pool_size, max_overflow, read=read)
+        pool_options = {
+            "poolclass": ReadInstrumentedQueuePool if read else InstrumentedQueuePool,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_pre_ping": True,
+            "pool_recycle": 3600,
+            "pool_timeout": 30
+        }
+        connect_args = {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE}
+
+    logger.debug("Inicializando motor de base de datos (%s) con URL: %s, %s", metric_prefix, url, pool_options)
+    new_engine = create_async_engine(url, echo=settings.DB_ECHO, connect_args=connect_args, **pool_options)
+    event.listen(new_engine.sync_engine, "before_cursor_execute", _start_query_timer)
+    event.listen(new_engine.sync_engine, "after_cursor_execute", _observe_query_duration)
+    event.listen(new_engine.sync_engine, "handle_error", _discard_query_timer)
+    if settings.DB_PGBOUNCER_MODE:
+        return new_engine
+
+    pool = new_engine.pool
+    registry.gauge(f"{metric_prefix}_size", "Tamaño configurado del pool de conexiones.", lambda: pool.size())
+    registry.gauge(f"{metric_prefix}_checked_out", "Conexiones en uso.", lambda: pool.checkedout())
+    registry.gauge(
+        f"{metric_prefix}_overflow", "Conexiones abiertas por sobre el tamaño del pool.", lambda: max(pool.overflow(), 0)
+    )
+    return new_engine
+
+def _create_sessionmaker(bind: AsyncEngine) -> sessionmaker:
+    return sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False
     )
+
+try:
+    engine = _create_engine(settings.DATABASE_URL, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+    # Sin DB_READ_DATABASE_URL las lecturas usan el mismo engine del primario.
+    read_engine = engine
+    if settings.DB_READ_DATABASE_URL:
+        read_engine = _create_engine(
+            settings.DB_READ_DATABASE_URL, settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW, read=True
+        )
     logger.info("Motor de base de datos inicializado correctamente.")
 except Exception as e:
     logger.critical("Error al inicializar el motor de base de datos: %s", str(e), exc_info=True)
     raise
 
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False
-)
+AsyncSessionLocal = _create_sessionmaker(engine)
+ReadSessionLocal = _create_sessionmaker(read_engine) if read_engine is not engine else AsyncSessionLocal
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    session: AsyncSession = AsyncSessionLocal()
+READ_YOUR_WRITES_COOKIE = "read_primary_until"
+READ_CONSISTENCY_HEADER = "x-read-consistency"
+
+def mark_recent_write(response: Response) -> None:
+    # Tras una reserva el cliente lee desde el primario durante unos segundos para no ver el atraso de la réplica.
+    if read_engine is engine:
+        return
+    until = time.time() + settings.DB_READ_YOUR_WRITES_SECONDS
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE, f"{until:.3f}", max_age=int(settings.DB_READ_YOUR_WRITES_SECONDS) + 1, httponly=True
+    )
+
+def read_session_factory(request: Request) -> sessionmaker:
+    if ReadSessionLocal is AsyncSessionLocal:
+        return AsyncSessionLocal
+    if request.headers.get(READ_CONSISTENCY_HEADER, "").lower() == "primary":
+        return AsyncSessionLocal
+    try:
+        if float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time():
+            return AsyncSessionLocal
+    except ValueError:
+        pass
+    return ReadSessionLocal
+
+def reads_from_primary(request: Request) -> bool:
+    return read_session_factory(request) is AsyncSessionLocal
+
+def reads_forced_to_primary(request: Request) -> bool:
+    # Hay réplica, pero la cookie o el encabezado exigen leer del primario.
+    return read_session_factory(request) is not ReadSessionLocal
+
+@asynccontextmanager
+async def _session_scope(session_factory: sessionmaker) -> AsyncIterator[AsyncSession]:
+    # La sesión toma una conexión del pool recién con la primera consulta; pool_pre_ping valida la conexión.
+    session: AsyncSession = session_factory()
     try:
         logger.debug("Iniciando nueva sesión de base de datos: %s", id(session))
-        await session.execute(text("SELECT 1"))
-        logger.debug("Conexión a la base de datos confirmada en la sesión: %s", id(session))
         yield session
     except HTTPException as e:
         logger.debug("Excepción HTTP controlada en la sesión: %s", str(e))
@@ -53,6 +173,14 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         await session.close()
         logger.debug("Sesión cerrada correctamente: %s", id(session))
 
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with _session_scope(AsyncSessionLocal) as session:
+        yield session
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with _session_scope(read_session_factory(request)) as session:
+        yield session
+
 async def test_connection() -> None:
     async with AsyncSessionLocal() as session:
         try:
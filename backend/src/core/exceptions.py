@@ -0,0 +1,19 @@
+class SlotAlreadyReservedError(ValueError):
+    pass
+
+class BulkReservationError(ValueError):
+    def __init__(self, message: str, results: list):
+        super().__init__(message)
+        self.results = results
+
+class HoldNotFoundError(ValueError):
+    pass
+
+class TemplateNotFoundError(ValueError):
+    pass
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+class ConnectionBudgetError(ValueError):
+    pass
\ No newline at end of file
@@ -1,18 +1,72 @@
+import atexit
+import copy
+import json
 import logging
 import logging.handlers
+import queue
+import random
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional
 from src.core.config import settings
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 LOG_DIR = BASE_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Atributos propios de LogRecord; el resto proviene de extra= y se incluye en la salida JSON.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        payload.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+class InfoSamplingFilter(logging.Filter):
+    # Conserva solo una fracción de los INFO de los loggers de alto volumen; WARNING y superiores pasan siempre.
+    def __init__(self, rate: float, logger_prefixes: list[str]):
+        super().__init__()
+        self.rate = rate
+        self.logger_prefixes = tuple(f"schedule_api.{prefix}" for prefix in logger_prefixes)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.INFO or self.rate >= 1 or not record.name.startswith(self.logger_prefixes):
+            return True
+        return random.random() < self.rate
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A diferencia de QueueHandler.prepare no aplica el formato aquí: el formateador real corre en el listener.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
 def setup_logging(
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO",
-    log_to_file: bool = True
+    log_to_file: bool = True,
+    force: bool = False
 ) -> None:
+    # Se configura una sola vez por proceso; las llamadas siguientes no reconstruyen los handlers.
+    global _listener
+    if _listener is not None and not force:
+        return
     try:
+        shutdown_logging()
         log_level_upper = log_level.upper()
         numeric_level = getattr(logging, log_level_upper, logging.INFO)
 
@@ -20,15 +74,18 @@ def setup_logging(
         logger.setLevel(numeric_level)
         logger.handlers.clear()
 
-        log_formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
+        if settings.LOG_FORMAT == "json":
+            log_formatter = JsonFormatter(datefmt="%Y-%m-%d %H:%M:%S")
+        else:
+            log_formatter = logging.Formatter(
+                "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S"
+            )
 
         console_handler = logging.StreamHandler()
         console_handler.setLevel(numeric_level)
         console_handler.setFormatter(log_formatter)
-        logger.addHandler(console_handler)
+        handlers: list[logging.Handler] = [console_handler]
 
         if log_to_file:
             log_file = LOG_DIR / settings.LOG_FILE_NAME
@@ -40,7 +97,16 @@ def setup_logging(
             )
             file_handler.setLevel(numeric_level)
             file_handler.setFormatter(log_formatter)
-            logger.addHandler(file_handler)
+            handlers.append(file_handler)
+
+        # El event loop solo encola registros; la escritura a consola y archivo ocurre en el hilo del listener.
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        queue_handler = _QueueHandler(log_queue)
+        queue_handler.addFilter(InfoSamplingFilter(settings.LOG_INFO_SAMPLE_RATE, settings.LOG_SAMPLED_LOGGERS))
+        logger.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
 
     except PermissionError as e:
         print(f"Error de permisos al configurar logging: {e}")
@@ -49,5 +115,17 @@ def setup_logging(
         print(f"Error inesperado al configurar logging: {e}")
         raise
 
+def shutdown_logging() -> None:
+    # Vacía la cola y cierra los handlers; se registra con atexit para no perder los últimos registros.
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+atexit.register(shutdown_logging)
+
 def get_logger(name: str) -> logging.Logger:
     return logging.getLogger(f"schedule_api.{name}")
\ No newline at end of file
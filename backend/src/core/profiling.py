@@ -0,0 +1,88 @@
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.ext.compiler import compiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.core.logging_config import get_logger
+from src.core.config import settings
+import logging
+import time
+
+logger = get_logger(__name__)
+
+class RequestProfile:
+    __slots__ = ("query_count", "db_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, elapsed: float, statement: str) -> None:
+        self.query_count += 1
+        self.db_seconds += elapsed
+        if elapsed > self.slowest_seconds:
+            self.slowest_seconds = elapsed
+            self.slowest_statement = statement
+
+# SQLAlchemy copia el contexto de la tarea a los greenlets donde corren los eventos del engine, así que el
+# listener de cursor ve el perfil de la solicitud en curso; fuera de una solicitud el valor es None.
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+def record_query(elapsed: float, statement: str) -> None:
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(elapsed, statement)
+
+class Explain(Executable, ClauseElement):
+    # EXPLAIN (ANALYZE, BUFFERS) sobre una sentencia Core, reutilizando sus mismos bindparams.
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (ANALYZE, BUFFERS) " + compiler.process(element.statement, **kw)
+
+class ProfilingMiddleware:
+    # Perfil SQL por solicitud: cantidad de consultas, tiempo total en base de datos y sentencia más lenta,
+    # informados en el header Server-Timing.
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                server_timing = (
+                    f'db;dur={profile.db_seconds * 1000:.1f};desc="{profile.query_count} queries", '
+                    f"app;dur={total_ms:.1f}"
+                )
+                message["headers"] = [*message.get("headers", []), (b"server-timing", server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            if profile.db_seconds * 1000 >= settings.DB_SLOW_QUERY_MS:
+                logger.warning(
+                    "Solicitud con alto tiempo en base de datos: %s %s, %d consultas, %.1f ms, más lenta %.1f ms: %s",
+                    scope["method"], scope["path"], profile.query_count, profile.db_seconds * 1000,
+                    profile.slowest_seconds * 1000, profile.slowest_statement
+                )
+            elif logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Perfil SQL de %s %s: %d consultas, %.1f ms",
+                    scope["method"], scope["path"], profile.query_count, profile.db_seconds * 1000
+                )
\ No newline at end of file
@@ -0,0 +1,44 @@
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from typing import Any, Iterable, Optional, Tuple
+from datetime import datetime
+
+SlotRow = Tuple[int, datetime, datetime]
+
+class FastJSONResponse(Response):
+    # Serializa directamente a bytes con orjson, sin volver a validar con response_model.
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+def slot_rows_to_dicts(rows: Iterable[SlotRow]) -> list:
+    return [
+        {"id": slot_id, "start_time": start_time, "end_time": end_time}
+        for slot_id, start_time, end_time in rows
+    ]
+
+def availability_payload(rows: Iterable[SlotRow], next_cursor: Optional[str]) -> dict:
+    return {"available_slots": slot_rows_to_dicts(rows), "next_cursor": next_cursor}
+
+def ndjson_line(content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_APPEND_NEWLINE)
+
+def sse_event(event: str, content: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(content) + b"\n\n"
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # Comparación débil: GET condicional solo requiere equivalencia semántica de la representación.
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def etag_json_response(request: Request, etag: str, body: bytes, max_age: int) -> Response:
+    # body ya viene serializado: con If-None-Match vigente se responde 304 sin cuerpo.
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
\ No newline at end of file
@@ -2,12 +2,10 @@ from sqlalchemy import text, inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from datetime import datetime, date, timedelta
-from src.core.config import settings
-from src.models.database_models import Region, Province, Commune, Area, AvailableSlot, Medic, Appointment, Patient, Payment
+from src.models.database_models import Region, Province, Commune, Area, AvailableSlot, Medic, Appointment, Patient, Payment, SlotHold, ScheduleTemplate, ScheduleException, Specialty, specialty_key
 from src.core.database import AsyncSessionLocal, engine
-from src.core.logging_config import setup_logging, get_logger
+from src.core.logging_config import get_logger
 
-setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
 logger = get_logger(__name__)
 
 async def check_tables_exist() -> bool:
@@ -19,9 +17,13 @@ async def check_tables_exist() -> bool:
         existing_tables = await conn.run_sync(sync_inspector)
         expected_tables = [
             Payment.__tablename__,
+            SlotHold.__tablename__,
+            ScheduleException.__tablename__,
+            ScheduleTemplate.__tablename__,
             Appointment.__tablename__,
             AvailableSlot.__tablename__,
             Medic.__tablename__,
+            Specialty.__tablename__,
             Patient.__tablename__,
             Province.__tablename__,
             Commune.__tablename__,
@@ -46,9 +48,13 @@ async def clear_tables(session: AsyncSession) -> None:
     try:
         tables = [
             Payment.__tablename__,
+            SlotHold.__tablename__,
+            ScheduleException.__tablename__,
+            ScheduleTemplate.__tablename__,
             Appointment.__tablename__,
             AvailableSlot.__tablename__,
             Medic.__tablename__,
+            Specialty.__tablename__,
             Patient.__tablename__,
             Province.__tablename__,
             Commune.__tablename__,
@@ -126,11 +132,17 @@ async def insert_dummy_data() -> None:
             await session.flush()
             logger.debug("Pacientes insertados: %s", [p.full_name for p in patients])
 
+            # Insertar especialidades
+            specialties = [Specialty(id=1, name="Trauma", key=specialty_key("Trauma"))]
+            session.add_all(specialties)
+            await session.flush()
+            logger.debug("Especialidades insertadas: %s", [s.name for s in specialties])
+
             # Insertar médicos
             medics = [
-                Medic(id=1, full_name="Dr Mavencio Dota N00b", specialty="trauma", area_id=3, region_id=1, commune_id=1),
-                Medic(id=2, full_name="Dr SeWaN Oliva Ogre", specialty="trauma", area_id=3, region_id=1, commune_id=1),
-                Medic(id=3, full_name="Dra Pepe Julian Onzima", specialty="trauma", area_id=3, region_id=1, commune_id=1),
+                Medic(id=1, full_name="Dr Mavencio Dota N00b", specialty_id=1, area_id=3, region_id=1, commune_id=1),
+                Medic(id=2, full_name="Dr SeWaN Oliva Ogre", specialty_id=1, area_id=3, region_id=1, commune_id=1),
+                Medic(id=3, full_name="Dra Pepe Julian Onzima", specialty_id=1, area_id=3, region_id=1, commune_id=1),
             ]
             session.add_all(medics)
             await session.flush()
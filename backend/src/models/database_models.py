@@ -1,10 +1,42 @@
-from datetime import datetime
-from sqlalchemy import Integer, String, DateTime, ForeignKey, Boolean, func
+from datetime import date, datetime, time
+import hashlib
+import unicodedata
+from sqlalchemy import Integer, SmallInteger, String, Date, DateTime, Time, ForeignKey, Boolean, Index, UniqueConstraint, func, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+# Franjas horarias precalculadas para available_slots.time_bucket.
+# La franja nocturna admite slots que terminan al día siguiente antes de las 18:00.
+TIME_BUCKET_RANGES = {
+    "morning": {"start": time(7, 0), "end": time(12, 0), "next_cycle": None},
+    "afternoon": {"start": time(12, 0), "end": time(18, 0), "next_cycle": None},
+    "night": {"start": time(18, 0), "end": time(23, 59, 59), "next_cycle": time(18, 0)}
+}
+
+def resolve_time_bucket(start_time: datetime, end_time: datetime) -> str | None:
+    start, end = start_time.time(), end_time.time()
+    for bucket, range_info in reversed(TIME_BUCKET_RANGES.items()):
+        if start < range_info["start"]:
+            continue
+        if end <= range_info["end"] or (range_info["next_cycle"] and end < range_info["next_cycle"]):
+            return bucket
+        return None
+    return None
+
+def _default_time_bucket(context) -> str | None:
+    params = context.get_current_parameters()
+    start_time, end_time = params.get("start_time"), params.get("end_time")
+    if start_time is None or end_time is None:
+        return None
+    return resolve_time_bucket(start_time, end_time)
+
+def specialty_key(name: str) -> str:
+    # Clave canónica de una especialidad: sin tildes, en minúsculas y con espacios simples ("Neurológica" -> "neurologica").
+    decomposed = unicodedata.normalize("NFKD", name)
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).lower().split())
+
 class Region(Base):
     __tablename__ = "regions"
     
@@ -35,6 +67,13 @@ class Area(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(100), unique=True)
 
+class Specialty(Base):
+    __tablename__ = "specialties"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(50))
+    key: Mapped[str] = mapped_column(String(50), unique=True)
+
 class Patient(Base):
     __tablename__ = "patients"
     
@@ -52,7 +91,7 @@ class Medic(Base):
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     full_name: Mapped[str] = mapped_column(String(100), nullable=False)
-    specialty: Mapped[str] = mapped_column(String(50), nullable=False)
+    specialty_id: Mapped[int] = mapped_column(ForeignKey("specialties.id"), nullable=False)
     area_id: Mapped[int] = mapped_column(ForeignKey("areas.id"), nullable=True)
     region_id: Mapped[int] = mapped_column(ForeignKey("regions.id"), nullable=True)
     commune_id: Mapped[int] = mapped_column(ForeignKey("communes.id"), nullable=True)
@@ -61,6 +100,12 @@ class Medic(Base):
     area: Mapped["Area"] = relationship()
     region: Mapped["Region"] = relationship()
     commune: Mapped["Commune"] = relationship()
+    specialty: Mapped["Specialty"] = relationship()
+
+    __table_args__ = (
+        # Filtro de disponibilidad por igualdad de enteros, cubierto por un índice B-tree.
+        Index("ix_medics_filter", "region_id", "commune_id", "area_id", "specialty_id"),
+    )
 
 class Appointment(Base):
     __tablename__ = "appointments"
@@ -86,11 +131,64 @@ class AvailableSlot(Base):
     start_time: Mapped[datetime] = mapped_column(DateTime, index=True)
     end_time: Mapped[datetime] = mapped_column(DateTime)
     is_reserved: Mapped[bool] = mapped_column(Boolean, default=False)
+    time_bucket: Mapped[str | None] = mapped_column(String(10), nullable=True, default=_default_time_bucket)
+    # Vencimiento de la retención vigente, copiado en la fila para que las reservas lo vean al tomar su bloqueo.
+    held_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
     
     medic: Mapped["Medic"] = relationship(back_populates="available_slots")
 
+    __table_args__ = (
+        Index("ix_available_slots_lookup", "medic_id", "is_reserved", "time_bucket", "start_time"),
+        # Slots libres de cada médico en orden cronológico, sin importar la franja: base de la búsqueda
+        # de la próxima hora disponible.
+        Index("ix_available_slots_open", "medic_id", "start_time", postgresql_where=text("is_reserved = false")),
+        UniqueConstraint("medic_id", "start_time", name="uq_available_slots_medic_start"),
+    )
+
+class ScheduleTemplate(Base):
+    __tablename__ = "schedule_templates"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    medic_id: Mapped[int] = mapped_column(ForeignKey("medics.id"), index=True)
+    weekday: Mapped[int] = mapped_column(SmallInteger)  # 0 = lunes ... 6 = domingo
+    start_time: Mapped[time] = mapped_column(Time)
+    end_time: Mapped[time] = mapped_column(Time)
+    slot_minutes: Mapped[int] = mapped_column(Integer, default=60)
+    valid_from: Mapped[date] = mapped_column(Date)
+    valid_until: Mapped[date | None] = mapped_column(Date, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
+
+    medic: Mapped["Medic"] = relationship()
+
+class ScheduleException(Base):
+    __tablename__ = "schedule_exceptions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    medic_id: Mapped[int] = mapped_column(ForeignKey("medics.id"))
+    day: Mapped[date] = mapped_column(Date)
+    # Sin horario se bloquea el día completo.
+    start_time: Mapped[time | None] = mapped_column(Time, nullable=True)
+    end_time: Mapped[time | None] = mapped_column(Time, nullable=True)
+    reason: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+    __table_args__ = (
+        Index("ix_schedule_exceptions_medic_day", "medic_id", "day"),
+    )
+
+class SlotHold(Base):
+    __tablename__ = "slot_holds"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    slot_id: Mapped[int] = mapped_column(ForeignKey("available_slots.id"), unique=True)
+    patient_id: Mapped[int] = mapped_column(ForeignKey("patients.id"))
+    token: Mapped[str] = mapped_column(String(32), unique=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
 class Payment(Base):
     __tablename__ = "payments"
     
@@ -102,4 +200,21 @@ class Payment(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
     
-    appointment: Mapped["Appointment"] = relationship(back_populates="payment")
\ No newline at end of file
+    appointment: Mapped["Appointment"] = relationship(back_populates="payment")
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[str] = mapped_column(String(64))
+    applied_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
+
+def schema_fingerprint() -> str:
+    # Huella del esquema declarado en los modelos; cambia al agregar o modificar tablas, columnas o índices.
+    parts = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(table.name)
+        parts.extend(f"{column.name}:{column.type}:{column.nullable}" for column in table.columns)
+        parts.extend(sorted(index.name for index in table.indexes if index.name))
+        parts.extend(sorted(str(constraint.name) for constraint in table.constraints if constraint.name))
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
\ No newline at end of file
@@ -1,33 +1,138 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from src.models.database_models import Appointment, AvailableSlot
-from src.core.logging_config import get_logger, setup_logging
-from src.core.config import settings
+from sqlalchemy import select, update, insert, bindparam, literal, Integer, String, Row
+from typing import List
+from src.models.database_models import Appointment, AvailableSlot, Medic
+from src.repositories.holds import SLOT_IS_HELD
+from src.core.logging_config import get_logger
 
-setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
 logger = get_logger(__name__)
 
+# Reserva atómica en una sola sentencia: el UPDATE condicional reclama el slot solo si sigue libre
+# y el INSERT de la cita se alimenta de su RETURNING, sin SELECT ... FOR UPDATE previo.
+_claimed_slot = (
+    update(AvailableSlot)
+    .where(
+        AvailableSlot.id == bindparam("slot_id"),
+        AvailableSlot.is_reserved.is_(False),
+        ~SLOT_IS_HELD
+    )
+    .values(is_reserved=True)
+    .returning(
+        AvailableSlot.id,
+        AvailableSlot.medic_id,
+        AvailableSlot.start_time,
+        AvailableSlot.end_time,
+        AvailableSlot.time_bucket
+    )
+    .cte("claimed_slot")
+)
+# status va explícito: dentro de un CTE el default de Python de la columna se enviaría como NULL.
+_inserted_appointment = (
+    insert(Appointment)
+    .from_select(
+        ["patient_id", "medic_id", "start_time", "end_time", "status"],
+        select(
+            bindparam("patient_id", type_=Integer),
+            _claimed_slot.c.medic_id,
+            _claimed_slot.c.start_time,
+            _claimed_slot.c.end_time,
+            literal("pending", String)
+        )
+    )
+    .returning(
+        Appointment.id,
+        Appointment.patient_id,
+        Appointment.medic_id,
+        Appointment.start_time,
+        Appointment.end_time,
+        Appointment.status
+    )
+    .cte("inserted_appointment")
+)
+RESERVE_SLOT = (
+    select(
+        _inserted_appointment.c.id,
+        _inserted_appointment.c.patient_id,
+        _inserted_appointment.c.medic_id,
+        _inserted_appointment.c.start_time,
+        _inserted_appointment.c.end_time,
+        _inserted_appointment.c.status,
+        _claimed_slot.c.id.label("slot_id"),
+        _claimed_slot.c.time_bucket,
+        Medic.region_id,
+        Medic.commune_id,
+        Medic.area_id,
+        Medic.specialty_id
+    )
+    .select_from(_inserted_appointment)
+    .join(_claimed_slot, _claimed_slot.c.medic_id == _inserted_appointment.c.medic_id)
+    .join(Medic, Medic.id == _inserted_appointment.c.medic_id)
+)
+SLOT_EXISTS = select(AvailableSlot.id).where(AvailableSlot.id == bindparam("slot_id"))
+
+# Reserva múltiple: los slots se bloquean siempre en orden de ID para evitar deadlocks entre transacciones.
+LOCK_SLOTS = (
+    select(
+        AvailableSlot.id,
+        AvailableSlot.medic_id,
+        AvailableSlot.start_time,
+        AvailableSlot.end_time,
+        AvailableSlot.is_reserved,
+        SLOT_IS_HELD.label("is_held"),
+        AvailableSlot.time_bucket,
+        Medic.region_id,
+        Medic.commune_id,
+        Medic.area_id,
+        Medic.specialty_id
+    )
+    .join(Medic, Medic.id == AvailableSlot.medic_id)
+    .where(AvailableSlot.id.in_(bindparam("slot_ids", expanding=True)))
+    .order_by(AvailableSlot.id)
+    .with_for_update(of=AvailableSlot)
+)
+MARK_SLOTS_RESERVED = (
+    update(AvailableSlot)
+    .where(AvailableSlot.id.in_(bindparam("slot_ids", expanding=True)))
+    .values(is_reserved=True)
+)
+INSERT_APPOINTMENTS = insert(Appointment).returning(
+    Appointment.id,
+    Appointment.patient_id,
+    Appointment.medic_id,
+    Appointment.start_time,
+    Appointment.end_time,
+    Appointment.status,
+    sort_by_parameter_order=True
+)
+
 class AppointmentRepository:
     @staticmethod
-    async def get_available_slot(db: AsyncSession, slot_id: int) -> AvailableSlot:
-        query = select(AvailableSlot).where(AvailableSlot.id == slot_id).with_for_update()
-        sql_query = str(query.compile(compile_kwargs={"literal_binds": True}))
-        logger.debug("Ejecutando consulta SQL:\n%s", sql_query)
-        result = await db.execute(query)
-        slot = result.scalar_one_or_none()
-        logger.debug(f"Slot ID {slot_id} encontrado: {slot is not None}")
-        return slot
+    async def reserve_slot(db: AsyncSession, slot_id: int, patient_id: int) -> Row | None:
+        result = await db.execute(RESERVE_SLOT, {"slot_id": slot_id, "patient_id": patient_id})
+        reservation = result.one_or_none()
+        logger.debug("Reserva atómica del slot ID %s: %s", slot_id, "exitosa" if reservation else "sin filas")
+        return reservation
+
+    @staticmethod
+    async def slot_exists(db: AsyncSession, slot_id: int) -> bool:
+        result = await db.execute(SLOT_EXISTS, {"slot_id": slot_id})
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def lock_slots(db: AsyncSession, slot_ids: List[int]) -> List[Row]:
+        result = await db.execute(LOCK_SLOTS, {"slot_ids": slot_ids})
+        slots = result.all()
+        logger.debug("Slots bloqueados para reserva múltiple: %s", [slot.id for slot in slots])
+        return slots
 
     @staticmethod
-    async def mark_slot_as_reserved(db: AsyncSession, slot_id: int):
-        query = update(AvailableSlot).where(AvailableSlot.id == slot_id).values(is_reserved=True)
-        await db.execute(query)
-        logger.debug(f"Slot ID {slot_id} marcado como reservado")
+    async def mark_slots_as_reserved(db: AsyncSession, slot_ids: List[int]) -> None:
+        await db.execute(MARK_SLOTS_RESERVED, {"slot_ids": slot_ids})
+        logger.debug("Slots marcados como reservados: %s", slot_ids)
 
     @staticmethod
-    async def create(db: AsyncSession, data: dict) -> Appointment:
-        appointment = Appointment(**data)
-        db.add(appointment)
-        await db.flush()
-        logger.debug(f"Cita creada en DB con ID: {appointment.id}")
-        return appointment
\ No newline at end of file
+    async def create_many(db: AsyncSession, data: List[dict]) -> List[Row]:
+        result = await db.execute(INSERT_APPOINTMENTS, data)
+        appointments = result.all()
+        logger.debug("Citas creadas en lote: %d", len(appointments))
+        return appointments
\ No newline at end of file
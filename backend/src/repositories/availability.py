@@ -1,15 +1,179 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, TIME, or_
-from src.models.database_models import AvailableSlot, Medic
-from src.core.logging_config import get_logger, setup_logging
+from sqlalchemy import select, and_, or_, func, values, column, bindparam, false, true, Integer, String, Row, Select
+from src.models.database_models import AvailableSlot, Medic, Appointment
+from src.repositories.holds import active_hold_exists
+from src.core.logging_config import get_logger
+from src.core.database import ReadSessionLocal
+from src.core.profiling import Explain
 from src.core.config import settings
 from src.schemas.availability import TimeRangeFilterEnum
-from datetime import time
-from typing import List
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from time import monotonic, perf_counter
+import asyncio
+import logging
 
-setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
 logger = get_logger(__name__)
 
+# Proyección mínima del camino de lectura: evita hidratar entidades ORM completas.
+SLOT_COLUMNS = (AvailableSlot.id, AvailableSlot.start_time, AvailableSlot.end_time)
+
+def _window_conditions(has_from: bool, has_to: bool) -> list:
+    conditions = []
+    if has_from:
+        conditions.append(AvailableSlot.start_time >= bindparam("window_start"))
+    if has_to:
+        conditions.append(AvailableSlot.start_time < bindparam("window_end"))
+    return conditions
+
+def _window_params(from_date: Optional[date], to_date: Optional[date]) -> dict:
+    params = {}
+    if from_date:
+        params["window_start"] = datetime.combine(from_date, time.min)
+    if to_date:
+        params["window_end"] = datetime.combine(to_date + timedelta(days=1), time.min)
+    return params
+
+def _keyset_condition(entity=AvailableSlot, tie: str = "id"):
+    return or_(
+        entity.start_time > bindparam("after_start_time"),
+        and_(entity.start_time == bindparam("after_start_time"), getattr(entity, tie) > bindparam(f"after_{tie}"))
+    )
+
+def _tie_break_ordering(query, has_from: bool, tie_break: str):
+    # Define qué médico se conserva cuando varios ofrecen la misma ventana horaria.
+    if tie_break == "least_loaded":
+        load_conditions = [Appointment.start_time >= bindparam("window_start")] if has_from else []
+        medic_load = (
+            select(Appointment.medic_id, func.count().label("load"))
+            .where(*load_conditions)
+            .group_by(Appointment.medic_id)
+            .subquery("medic_load")
+        )
+        query = query.outerjoin(medic_load, medic_load.c.medic_id == AvailableSlot.medic_id)
+        return query, (func.coalesce(medic_load.c.load, 0), AvailableSlot.id)
+    return query, (func.random(),)
+
+@lru_cache(maxsize=64)
+def _build_slots_query(
+    collapse: bool,
+    has_from: bool,
+    has_to: bool,
+    has_after: bool,
+    has_limit: bool,
+    tie_break: str
+) -> Select:
+    # Cada variante se construye una sola vez con parámetros enlazados y se reutiliza en cada llamada,
+    # lo que también aprovecha la caché de compilación de SQLAlchemy y la de sentencias preparadas de asyncpg.
+    conditions = [
+        Medic.region_id == bindparam("region"),
+        Medic.commune_id == bindparam("commune"),
+        Medic.area_id == bindparam("area"),
+        Medic.specialty_id == bindparam("specialty_id"),
+        AvailableSlot.is_reserved == bindparam("is_reserved"),
+        AvailableSlot.time_bucket == bindparam("time_bucket"),
+        ~active_hold_exists(AvailableSlot.id),
+        *_window_conditions(has_from, has_to)
+    ]
+
+    if collapse:
+        # DISTINCT ON deja una sola fila por ventana (start_time, end_time) dentro de la base de datos.
+        # El cursor usa esa misma clave: el médico elegido por el desempate puede variar entre páginas,
+        # pero cada ventana aparece una sola vez.
+        if has_after:
+            conditions.append(_keyset_condition(AvailableSlot, "end_time"))
+        inner = (
+            select(*SLOT_COLUMNS)
+            .join(Medic, Medic.id == AvailableSlot.medic_id)
+            .where(and_(*conditions))
+        )
+        inner, tie_break_columns = _tie_break_ordering(inner, has_from, tie_break)
+        inner = (
+            inner
+            .distinct(AvailableSlot.start_time, AvailableSlot.end_time)
+            .order_by(AvailableSlot.start_time, AvailableSlot.end_time, *tie_break_columns)
+            .subquery("collapsed_slots")
+        )
+        query = select(inner.c.id, inner.c.start_time, inner.c.end_time).order_by(
+            inner.c.start_time, inner.c.end_time
+        )
+    else:
+        if has_after:
+            conditions.append(_keyset_condition())
+        query = (
+            select(*SLOT_COLUMNS)
+            .join(Medic, Medic.id == AvailableSlot.medic_id)
+            .where(and_(*conditions))
+            .order_by(AvailableSlot.start_time, AvailableSlot.id)
+        )
+    if has_limit:
+        query = query.limit(bindparam("limit"))
+    return query
+
+@lru_cache(maxsize=4)
+def _build_next_available_query(has_region: bool, has_commune: bool) -> Select:
+    # Por cada médico del filtro, LATERAL lee solo sus primeros :limit slots libres recorriendo
+    # ix_available_slots_open en orden; el ORDER BY ... LIMIT externo los mezcla con un top-N heapsort.
+    # El costo depende de médicos x :limit, no de cuántos días de agenda estén publicados.
+    medic_conditions = [Medic.area_id == bindparam("area"), Medic.specialty_id == bindparam("specialty_id")]
+    if has_region:
+        medic_conditions.append(Medic.region_id == bindparam("region"))
+    if has_commune:
+        medic_conditions.append(Medic.commune_id == bindparam("commune"))
+    medic_slots = (
+        select(AvailableSlot.id, AvailableSlot.start_time, AvailableSlot.end_time, AvailableSlot.time_bucket)
+        .where(
+            AvailableSlot.medic_id == Medic.id,
+            AvailableSlot.is_reserved == false(),
+            AvailableSlot.start_time >= func.localtimestamp(),
+            AvailableSlot.time_bucket.is_not(None),
+            ~active_hold_exists(AvailableSlot.id)
+        )
+        .order_by(AvailableSlot.start_time)
+        .limit(bindparam("limit"))
+        .lateral("medic_slots")
+    )
+    return (
+        select(
+            medic_slots.c.id,
+            Medic.id.label("medic_id"),
+            medic_slots.c.start_time,
+            medic_slots.c.end_time,
+            medic_slots.c.time_bucket
+        )
+        .select_from(Medic)
+        .join(medic_slots, true())
+        .where(*medic_conditions)
+        .order_by(medic_slots.c.start_time, medic_slots.c.id)
+        .limit(bindparam("limit"))
+    )
+
+_last_explained: Dict[tuple, float] = {}
+_explain_tasks: set = set()
+
+async def _explain_slow_query(query: Select, params: dict, elapsed_ms: float) -> None:
+    # Sesión propia: el plan se obtiene fuera de la solicitud lenta y sin alterar su transacción.
+    try:
+        async with ReadSessionLocal() as session:
+            result = await session.execute(Explain(query), params)
+            plan = "\n".join(row[0] for row in result)
+        logger.warning(
+            "Plan de consulta lenta de disponibilidad (%.1f ms) con parámetros %s:\n%s", elapsed_ms, params, plan
+        )
+    except Exception as e:
+        logger.error("No se pudo obtener el plan de la consulta lenta: %s", str(e), exc_info=True)
+
+def _schedule_explain(shape: tuple, query: Select, params: dict, elapsed_ms: float) -> None:
+    # EXPLAIN ANALYZE vuelve a ejecutar la consulta: se limita a una captura por forma de consulta y periodo.
+    now = monotonic()
+    if now - _last_explained.get(shape, float("-inf")) < settings.DB_EXPLAIN_COOLDOWN_SECONDS:
+        return
+    _last_explained[shape] = now
+    task = asyncio.create_task(_explain_slow_query(query, params, elapsed_ms))
+    _explain_tasks.add(task)
+    task.add_done_callback(_explain_tasks.discard)
+
 class AvailabilityRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -19,76 +183,146 @@ class AvailabilityRepository:
         region: int,
         commune: int,
         area: int,
-        specialty: str,
+        specialty_id: int,
         time_range_filter: TimeRangeFilterEnum,
-        is_reserved: bool = False
-    ) -> List[AvailableSlot]:
-        time_ranges = {
-            "morning": {"start": time(7, 0), "end": time(12, 0), "next_cycle": None},
-            "afternoon": {"start": time(12, 0), "end": time(18, 0), "next_cycle": None},
-            "night": {"start": time(18, 0), "end": time(23, 59, 59), "next_cycle": time(18, 0)}
-        }
-        range_info = time_ranges[time_range_filter.value]
-        start_range = range_info["start"]
-        end_range = range_info["end"]
-        next_cycle_limit = range_info["next_cycle"]
-
-        base_conditions = [
-            Medic.region_id == region,
-            Medic.commune_id == commune,
-            Medic.area_id == area,
-            Medic.specialty.ilike(specialty),
-            AvailableSlot.is_reserved == is_reserved
-        ]
-
-        time_condition = and_(
-            func.cast(AvailableSlot.start_time, TIME) >= start_range,
-            func.cast(AvailableSlot.end_time, TIME) <= end_range
+        is_reserved: bool = False,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        after: Optional[Tuple[datetime, Union[int, datetime]]] = None,
+        limit: Optional[int] = None,
+        collapse: bool = False
+    ) -> List[Row]:
+        # after es (start_time, end_time) con collapse y (start_time, id) sin él.
+        query = _build_slots_query(
+            collapse, bool(from_date), bool(to_date), bool(after), bool(limit), settings.AVAILABILITY_TIE_BREAK
         )
-        if next_cycle_limit:
-            time_condition = or_(
-                time_condition,
+        params = {
+            "region": region,
+            "commune": commune,
+            "area": area,
+            "specialty_id": specialty_id,
+            "is_reserved": is_reserved,
+            "time_bucket": time_range_filter.value,
+            **_window_params(from_date, to_date)
+        }
+        if after:
+            params["after_start_time"], params["after_end_time" if collapse else "after_id"] = after
+        if limit:
+            params["limit"] = limit
+
+        if logger.isEnabledFor(logging.DEBUG):
+            # Renderizar la sentencia tiene costo; solo se hace si el nivel DEBUG está habilitado.
+            logger.debug("Ejecutando consulta SQL:\n%s\nParámetros: %s", query, params)
+
+        started = perf_counter()
+        result = await self.db.execute(query, params)
+        slots = result.all()
+        elapsed_ms = (perf_counter() - started) * 1000
+        logger.debug("Slots disponibles encontrados: %d", len(slots))
+        if elapsed_ms >= settings.DB_SLOW_QUERY_MS and settings.DB_EXPLAIN_SLOW_QUERIES:
+            _schedule_explain(
+                (collapse, bool(from_date), bool(to_date), bool(after), bool(limit)), query, params, elapsed_ms
+            )
+        return slots
+
+    async def get_available_slots_batch(
+        self,
+        filters: Sequence[Tuple[int, int, int, int, TimeRangeFilterEnum]],
+        is_reserved: bool = False,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        limit_per_filter: Optional[int] = None,
+        collapse: bool = False
+    ) -> Dict[int, List[Row]]:
+        # Todas las combinaciones se resuelven en una sola consulta uniendo contra una lista VALUES.
+        filter_values = values(
+            column("idx", Integer),
+            column("region_id", Integer),
+            column("commune_id", Integer),
+            column("area_id", Integer),
+            column("specialty_id", Integer),
+            column("time_bucket", String),
+            name="filters"
+        ).data([
+            (idx, region, commune, area, specialty_id, time_range_filter.value)
+            for idx, (region, commune, area, specialty_id, time_range_filter) in enumerate(filters)
+        ])
+
+        matched = (
+            select(
+                filter_values.c.idx, AvailableSlot.id.label("slot_id"), AvailableSlot.start_time, AvailableSlot.end_time
+            )
+            .select_from(filter_values)
+            .join(
+                Medic,
                 and_(
-                    func.cast(AvailableSlot.start_time, TIME) >= start_range,
-                    func.cast(AvailableSlot.end_time, TIME) < next_cycle_limit
+                    Medic.region_id == filter_values.c.region_id,
+                    Medic.commune_id == filter_values.c.commune_id,
+                    Medic.area_id == filter_values.c.area_id,
+                    Medic.specialty_id == filter_values.c.specialty_id
+                )
+            )
+            .join(
+                AvailableSlot,
+                and_(
+                    AvailableSlot.medic_id == Medic.id,
+                    AvailableSlot.is_reserved == is_reserved,
+                    AvailableSlot.time_bucket == filter_values.c.time_bucket,
+                    ~active_hold_exists(AvailableSlot.id),
+                    *_window_conditions(bool(from_date), bool(to_date))
                 )
             )
-
-        query = (
-            select(AvailableSlot)
-            .join(Medic, Medic.id == AvailableSlot.medic_id)
-            .where(and_(*base_conditions, time_condition))
         )
+        if collapse:
+            matched, tie_break = _tie_break_ordering(matched, bool(from_date), settings.AVAILABILITY_TIE_BREAK)
+            matched = (
+                matched
+                .distinct(filter_values.c.idx, AvailableSlot.start_time, AvailableSlot.end_time)
+                .order_by(filter_values.c.idx, AvailableSlot.start_time, AvailableSlot.end_time, *tie_break)
+            )
+        matched = matched.subquery("matched")
 
-        sql_query_base = """
-            SELECT available_slots.id, available_slots.start_time, available_slots.end_time
-            FROM available_slots
-            JOIN medics ON medics.id = available_slots.medic_id
-            WHERE medics.region_id = {}
-            AND medics.commune_id = {}
-            AND medics.area_id = {}
-            AND medics.specialty ILIKE '{}'
-            AND available_slots.is_reserved = {}
-        """
-        sql_query_time = (
-            "AND ((CAST(available_slots.start_time AS TIME) >= '{}' AND CAST(available_slots.end_time AS TIME) <= '{}') "
-            "OR (CAST(available_slots.start_time AS TIME) >= '{}' AND CAST(available_slots.end_time AS TIME) < '{}'))"
-            if next_cycle_limit else
-            "AND CAST(available_slots.start_time AS TIME) >= '{}' "
-            "AND CAST(available_slots.end_time AS TIME) <= '{}'"
-        )
-        sql_query_template = sql_query_base + sql_query_time + "\n"
+        row_number = func.row_number().over(
+            partition_by=matched.c.idx,
+            order_by=(matched.c.start_time, matched.c.end_time, matched.c.slot_id)
+        ).label("row_number")
+        ranked = select(matched.c.idx, matched.c.slot_id, row_number).subquery("ranked")
 
-        log_params = (
-            [region, commune, area, specialty, is_reserved, start_range, end_range, start_range, next_cycle_limit]
-            if next_cycle_limit else
-            [region, commune, area, specialty, is_reserved, start_range, end_range]
+        query = (
+            select(ranked.c.idx, *SLOT_COLUMNS)
+            .join(AvailableSlot, AvailableSlot.id == ranked.c.slot_id)
+            .order_by(ranked.c.idx, ranked.c.row_number)
         )
+        if limit_per_filter:
+            query = query.where(ranked.c.row_number <= limit_per_filter)
+        logger.debug("Ejecutando consulta de disponibilidad en lote para %d filtros", len(filters))
 
-        sql_query = sql_query_template.format(*log_params)
-        logger.debug("Ejecutando consulta SQL:\n%s", sql_query)
+        result = await self.db.execute(query, _window_params(from_date, to_date))
+        slots_by_filter: Dict[int, List[Row]] = {idx: [] for idx in range(len(filters))}
+        for idx, *slot in result.all():
+            slots_by_filter[idx].append(tuple(slot))
+        logger.debug("Slots disponibles encontrados en lote: %d", sum(len(s) for s in slots_by_filter.values()))
+        return slots_by_filter
 
-        result = await self.db.execute(query)
-        slots = result.scalars().all()
-        logger.debug("Slots disponibles encontrados: %d", len(slots))
+    async def get_next_available_slots(
+        self,
+        area: int,
+        specialty_id: int,
+        region: Optional[int] = None,
+        commune: Optional[int] = None,
+        limit: int = 5
+    ) -> List[Row]:
+        query = _build_next_available_query(region is not None, commune is not None)
+        params = {"area": area, "specialty_id": specialty_id, "limit": limit}
+        if region is not None:
+            params["region"] = region
+        if commune is not None:
+            params["commune"] = commune
+        started = perf_counter()
+        result = await self.db.execute(query, params)
+        slots = result.all()
+        elapsed_ms = (perf_counter() - started) * 1000
+        logger.debug("Próximos slots disponibles encontrados: %d en %.1f ms", len(slots), elapsed_ms)
+        if elapsed_ms >= settings.DB_SLOW_QUERY_MS and settings.DB_EXPLAIN_SLOW_QUERIES:
+            _schedule_explain(("next", region is not None, commune is not None), query, params, elapsed_ms)
         return slots
\ No newline at end of file
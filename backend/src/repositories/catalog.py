@@ -0,0 +1,45 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, Row
+from typing import List, NamedTuple
+from src.models.database_models import Area, Commune, Medic, Province, Region, Specialty
+from src.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SELECT_REGIONS = select(Region.id, Region.name).order_by(Region.id)
+SELECT_COMMUNES = (
+    select(Commune.id, Commune.name, Commune.province_id, Province.region_id)
+    .join(Province, Province.id == Commune.province_id)
+    .order_by(Commune.id)
+)
+SELECT_AREAS = select(Area.id, Area.name).order_by(Area.id)
+SELECT_SPECIALTIES = select(Specialty.id, Specialty.name, Specialty.key).order_by(Specialty.key)
+# Combinaciones con al menos un médico: son las únicas que pueden tener disponibilidad.
+SELECT_MEDIC_FILTERS = (
+    select(Medic.region_id, Medic.commune_id, Medic.area_id, Medic.specialty_id)
+    .where(Medic.region_id.is_not(None), Medic.commune_id.is_not(None), Medic.area_id.is_not(None))
+    .distinct()
+)
+
+class CatalogRows(NamedTuple):
+    regions: List[Row]
+    communes: List[Row]
+    areas: List[Row]
+    specialties: List[Row]
+    medic_filters: List[Row]
+
+class CatalogRepository:
+    @staticmethod
+    async def load(db: AsyncSession) -> CatalogRows:
+        rows = CatalogRows(
+            regions=(await db.execute(SELECT_REGIONS)).all(),
+            communes=(await db.execute(SELECT_COMMUNES)).all(),
+            areas=(await db.execute(SELECT_AREAS)).all(),
+            specialties=(await db.execute(SELECT_SPECIALTIES)).all(),
+            medic_filters=(await db.execute(SELECT_MEDIC_FILTERS)).all()
+        )
+        logger.debug(
+            "Catálogo leído: %d regiones, %d comunas, %d áreas, %d especialidades, %d combinaciones de médicos",
+            len(rows.regions), len(rows.communes), len(rows.areas), len(rows.specialties), len(rows.medic_filters)
+        )
+        return rows
\ No newline at end of file
@@ -0,0 +1,221 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, insert, exists, func, bindparam, literal, false, Integer, String, Interval, Row
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import List
+from src.models.database_models import Appointment, AvailableSlot, Medic, SlotHold
+from src.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+def active_hold_exists(slot_id_column):
+    return exists(
+        select(SlotHold.id).where(SlotHold.slot_id == slot_id_column, SlotHold.expires_at > func.localtimestamp())
+    )
+
+# Un UPDATE condicional que esperó el bloqueo de la fila solo vuelve a evaluar las columnas del propio slot, no
+# subconsultas sobre slot_holds; por eso las reservas revisan held_until y no active_hold_exists.
+SLOT_IS_HELD = func.coalesce(AvailableSlot.held_until > func.localtimestamp(), false())
+
+# Columnas del médico necesarias para invalidar la caché de disponibilidad del slot afectado.
+_MEDIC_COLUMNS = (Medic.region_id, Medic.commune_id, Medic.area_id, Medic.specialty_id)
+
+# Una retención solo se concede sobre un slot libre; si ya existe una retención vencida para el slot se reemplaza.
+# FOR UPDATE espera a una reserva directa en curso sobre el slot y vuelve a evaluar is_reserved tras su commit.
+_new_hold = pg_insert(SlotHold).from_select(
+    ["slot_id", "patient_id", "token", "expires_at"],
+    select(
+        AvailableSlot.id,
+        bindparam("patient_id", type_=Integer),
+        bindparam("token"),
+        func.localtimestamp() + bindparam("duration", type_=Interval)
+    )
+    .where(AvailableSlot.id == bindparam("slot_id"), AvailableSlot.is_reserved.is_(False))
+    .with_for_update(of=AvailableSlot)
+)
+_created_hold = (
+    _new_hold
+    .on_conflict_do_update(
+        index_elements=[SlotHold.slot_id],
+        set_={
+            "patient_id": _new_hold.excluded.patient_id,
+            "token": _new_hold.excluded.token,
+            "expires_at": _new_hold.excluded.expires_at,
+            "created_at": func.now()
+        },
+        where=SlotHold.expires_at <= func.localtimestamp()
+    )
+    .returning(SlotHold.slot_id, SlotHold.patient_id, SlotHold.token, SlotHold.expires_at)
+    .cte("created_hold")
+)
+_held_slot = (
+    update(AvailableSlot)
+    .where(AvailableSlot.id == _created_hold.c.slot_id)
+    .values(held_until=_created_hold.c.expires_at)
+    .returning(
+        AvailableSlot.id, AvailableSlot.medic_id, AvailableSlot.start_time, AvailableSlot.end_time,
+        AvailableSlot.time_bucket
+    )
+    .cte("held_slot")
+)
+CREATE_HOLD = (
+    select(
+        *_created_hold.c, _held_slot.c.start_time, _held_slot.c.end_time, _held_slot.c.time_bucket,
+        *_MEDIC_COLUMNS
+    )
+    .select_from(_created_hold)
+    .join(_held_slot, _held_slot.c.id == _created_hold.c.slot_id)
+    .join(Medic, Medic.id == _held_slot.c.medic_id)
+)
+
+# Confirmar convierte la retención en cita en una sola sentencia, sin SELECT ... FOR UPDATE.
+_consumed_hold = (
+    delete(SlotHold)
+    .where(SlotHold.token == bindparam("token"), SlotHold.expires_at > func.localtimestamp())
+    .returning(SlotHold.slot_id, SlotHold.patient_id)
+    .cte("consumed_hold")
+)
+_claimed_slot = (
+    update(AvailableSlot)
+    .where(
+        AvailableSlot.id.in_(select(_consumed_hold.c.slot_id)),
+        AvailableSlot.is_reserved.is_(False)
+    )
+    .values(is_reserved=True, held_until=None)
+    .returning(
+        AvailableSlot.id,
+        AvailableSlot.medic_id,
+        AvailableSlot.start_time,
+        AvailableSlot.end_time,
+        AvailableSlot.time_bucket
+    )
+    .cte("claimed_slot")
+)
+# status va explícito: dentro de un CTE el default de Python de la columna se enviaría como NULL.
+_inserted_appointment = (
+    insert(Appointment)
+    .from_select(
+        ["patient_id", "medic_id", "start_time", "end_time", "status"],
+        select(
+            _consumed_hold.c.patient_id,
+            _claimed_slot.c.medic_id,
+            _claimed_slot.c.start_time,
+            _claimed_slot.c.end_time,
+            literal("pending", String)
+        )
+        .select_from(_claimed_slot)
+        .join(_consumed_hold, _consumed_hold.c.slot_id == _claimed_slot.c.id)
+    )
+    .returning(
+        Appointment.id,
+        Appointment.patient_id,
+        Appointment.medic_id,
+        Appointment.start_time,
+        Appointment.end_time,
+        Appointment.status
+    )
+    .cte("inserted_appointment")
+)
+CONFIRM_HOLD = (
+    select(
+        *_inserted_appointment.c, _claimed_slot.c.id.label("slot_id"), _claimed_slot.c.time_bucket, *_MEDIC_COLUMNS
+    )
+    .select_from(_inserted_appointment)
+    .join(_claimed_slot, _claimed_slot.c.medic_id == _inserted_appointment.c.medic_id)
+    .join(Medic, Medic.id == _inserted_appointment.c.medic_id)
+)
+
+SLOT_TAKEN_FOR_HOLD = (
+    select(SlotHold.id)
+    .join(AvailableSlot, AvailableSlot.id == SlotHold.slot_id)
+    .where(
+        SlotHold.token == bindparam("token"),
+        SlotHold.expires_at > func.localtimestamp(),
+        AvailableSlot.is_reserved.is_(True)
+    )
+)
+
+_released_hold = (
+    delete(SlotHold)
+    .where(SlotHold.token == bindparam("token"))
+    .returning(SlotHold.slot_id)
+    .cte("released_hold")
+)
+_unheld_slot = (
+    update(AvailableSlot)
+    .where(AvailableSlot.id == _released_hold.c.slot_id)
+    .values(held_until=None)
+    .returning(
+        AvailableSlot.id, AvailableSlot.medic_id, AvailableSlot.start_time, AvailableSlot.end_time,
+        AvailableSlot.time_bucket
+    )
+    .cte("unheld_slot")
+)
+RELEASE_HOLD = (
+    select(
+        _released_hold.c.slot_id, _unheld_slot.c.start_time, _unheld_slot.c.end_time, _unheld_slot.c.time_bucket,
+        *_MEDIC_COLUMNS
+    )
+    .select_from(_released_hold)
+    .join(_unheld_slot, _unheld_slot.c.id == _released_hold.c.slot_id)
+    .join(Medic, Medic.id == _unheld_slot.c.medic_id)
+)
+
+_expired_holds = (
+    delete(SlotHold)
+    .where(SlotHold.expires_at <= func.localtimestamp())
+    .returning(SlotHold.slot_id)
+    .cte("expired_holds")
+)
+DELETE_EXPIRED_HOLDS = (
+    select(
+        _expired_holds.c.slot_id, AvailableSlot.start_time, AvailableSlot.end_time, AvailableSlot.time_bucket,
+        *_MEDIC_COLUMNS
+    )
+    .select_from(_expired_holds)
+    .join(AvailableSlot, AvailableSlot.id == _expired_holds.c.slot_id)
+    .join(Medic, Medic.id == AvailableSlot.medic_id)
+)
+
+SELECT_ACTIVE_HOLDS = select(
+    SlotHold.slot_id,
+    SlotHold.patient_id,
+    SlotHold.token,
+    (func.extract("epoch", SlotHold.expires_at - func.localtimestamp())).label("remaining_seconds")
+).where(SlotHold.expires_at > func.localtimestamp())
+
+class HoldRepository:
+    @staticmethod
+    async def create(db: AsyncSession, slot_id: int, patient_id: int, token: str, duration) -> Row | None:
+        result = await db.execute(
+            CREATE_HOLD, {"slot_id": slot_id, "patient_id": patient_id, "token": token, "duration": duration}
+        )
+        hold = result.one_or_none()
+        logger.debug("Retención del slot ID %s: %s", slot_id, "concedida" if hold else "rechazada")
+        return hold
+
+    @staticmethod
+    async def confirm(db: AsyncSession, token: str) -> Row | None:
+        result = await db.execute(CONFIRM_HOLD, {"token": token})
+        return result.one_or_none()
+
+    @staticmethod
+    async def slot_taken(db: AsyncSession, token: str) -> bool:
+        result = await db.execute(SLOT_TAKEN_FOR_HOLD, {"token": token})
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def release(db: AsyncSession, token: str) -> Row | None:
+        result = await db.execute(RELEASE_HOLD, {"token": token})
+        return result.one_or_none()
+
+    @staticmethod
+    async def delete_expired(db: AsyncSession) -> List[Row]:
+        result = await db.execute(DELETE_EXPIRED_HOLDS)
+        expired = result.all()
+        logger.debug("Retenciones vencidas eliminadas: %d", len(expired))
+        return expired
+
+    @staticmethod
+    async def get_active(db: AsyncSession) -> List[Row]:
+        result = await db.execute(SELECT_ACTIVE_HOLDS)
+        return result.all()
@@ -0,0 +1,221 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, exists, or_, union_all, literal, bindparam, Integer, DateTime, String, Boolean, Row
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import date, datetime
+from typing import List, Optional
+from src.models.database_models import Appointment, AvailableSlot, Medic, ScheduleTemplate, ScheduleException
+from src.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# El slot de una plantilla se materializa recién al reservarlo, ya marcado como reservado. El conflicto sobre
+# (medic_id, start_time) resuelve reservas concurrentes del mismo horario y el NOT EXISTS descarta traslapes
+# con slots cargados por otra vía.
+_new_slot_medic = bindparam("medic_id", type_=Integer)
+_new_slot_start = bindparam("start_time", type_=DateTime)
+_new_slot_end = bindparam("end_time", type_=DateTime)
+_materialized_slot = (
+    pg_insert(AvailableSlot)
+    .from_select(
+        ["medic_id", "start_time", "end_time", "time_bucket", "is_reserved"],
+        select(
+            _new_slot_medic,
+            _new_slot_start,
+            _new_slot_end,
+            bindparam("time_bucket", type_=String),
+            literal(True, Boolean)
+        ).where(
+            ~exists(
+                select(AvailableSlot.id).where(
+                    AvailableSlot.medic_id == _new_slot_medic,
+                    AvailableSlot.start_time < _new_slot_end,
+                    AvailableSlot.end_time > _new_slot_start
+                )
+            )
+        )
+    )
+    .on_conflict_do_nothing(constraint="uq_available_slots_medic_start")
+    .returning(
+        AvailableSlot.id, AvailableSlot.medic_id, AvailableSlot.start_time, AvailableSlot.end_time,
+        AvailableSlot.time_bucket
+    )
+    .cte("materialized_slot")
+)
+# status va explícito: dentro de un CTE el default de Python de la columna se enviaría como NULL.
+_inserted_appointment = (
+    insert(Appointment)
+    .from_select(
+        ["patient_id", "medic_id", "start_time", "end_time", "status"],
+        select(
+            bindparam("patient_id", type_=Integer),
+            _materialized_slot.c.medic_id,
+            _materialized_slot.c.start_time,
+            _materialized_slot.c.end_time,
+            literal("pending", String)
+        )
+    )
+    .returning(
+        Appointment.id,
+        Appointment.patient_id,
+        Appointment.medic_id,
+        Appointment.start_time,
+        Appointment.end_time,
+        Appointment.status
+    )
+    .cte("inserted_appointment")
+)
+# Incluye el slot y las columnas del médico para publicar el evento e invalidar la disponibilidad afectada.
+BOOK_TEMPLATE_SLOT = (
+    select(
+        *_inserted_appointment.c, _materialized_slot.c.id.label("slot_id"), _materialized_slot.c.time_bucket,
+        Medic.region_id, Medic.commune_id, Medic.area_id, Medic.specialty_id
+    )
+    .select_from(_inserted_appointment)
+    .join(_materialized_slot, _materialized_slot.c.medic_id == _inserted_appointment.c.medic_id)
+    .join(Medic, Medic.id == _inserted_appointment.c.medic_id)
+)
+
+# Primer slot existente del médico que se traslapa con el horario pedido; explica por qué no se materializó.
+SELECT_OVERLAPPING_SLOT = (
+    select(AvailableSlot.id, AvailableSlot.start_time, AvailableSlot.end_time, AvailableSlot.is_reserved)
+    .where(
+        AvailableSlot.medic_id == bindparam("medic_id"),
+        AvailableSlot.start_time < bindparam("end_time"),
+        AvailableSlot.end_time > bindparam("start_time")
+    )
+    .order_by(AvailableSlot.start_time)
+    .limit(1)
+)
+
+SELECT_TEMPLATES = (
+    select(ScheduleTemplate)
+    .join(Medic, Medic.id == ScheduleTemplate.medic_id)
+    .where(
+        Medic.region_id == bindparam("region"),
+        Medic.commune_id == bindparam("commune"),
+        Medic.area_id == bindparam("area"),
+        Medic.specialty_id == bindparam("specialty_id"),
+        ScheduleTemplate.valid_from <= bindparam("to_date"),
+        or_(ScheduleTemplate.valid_until.is_(None), ScheduleTemplate.valid_until >= bindparam("from_date"))
+    )
+    .order_by(ScheduleTemplate.id)
+)
+
+SELECT_EXCEPTIONS = select(ScheduleException).where(
+    ScheduleException.medic_id.in_(bindparam("medic_ids", expanding=True)),
+    ScheduleException.day.between(bindparam("from_date"), bindparam("to_date"))
+)
+
+# Horarios ya ocupados de cada médico en la ventana: slots materializados (reservados, retenidos o cargados
+# por otra vía) y citas existentes.
+SELECT_BUSY_WINDOWS = union_all(
+    select(AvailableSlot.medic_id, AvailableSlot.start_time, AvailableSlot.end_time).where(
+        AvailableSlot.medic_id.in_(bindparam("medic_ids", expanding=True)),
+        AvailableSlot.start_time < bindparam("window_end"),
+        AvailableSlot.end_time > bindparam("window_start")
+    ),
+    select(Appointment.medic_id, Appointment.start_time, Appointment.end_time).where(
+        Appointment.medic_id.in_(bindparam("medic_ids", expanding=True)),
+        Appointment.start_time < bindparam("window_end"),
+        Appointment.end_time > bindparam("window_start")
+    )
+)
+
+SELECT_TEMPLATE = select(ScheduleTemplate).where(ScheduleTemplate.id == bindparam("template_id"))
+
+SELECT_DAY_EXCEPTIONS = select(ScheduleException).where(
+    ScheduleException.medic_id == bindparam("medic_id"), ScheduleException.day == bindparam("day")
+)
+
+class ScheduleTemplateRepository:
+    @staticmethod
+    async def create_templates(db: AsyncSession, templates: List[ScheduleTemplate]) -> List[ScheduleTemplate]:
+        db.add_all(templates)
+        await db.flush()
+        logger.debug("Plantillas de horario creadas: %s", [template.id for template in templates])
+        return templates
+
+    @staticmethod
+    async def create_exception(db: AsyncSession, exception: ScheduleException) -> ScheduleException:
+        db.add(exception)
+        await db.flush()
+        logger.debug("Excepción de horario creada: %s", exception.id)
+        return exception
+
+    @staticmethod
+    async def medic_exists(db: AsyncSession, medic_id: int) -> bool:
+        result = await db.execute(select(Medic.id).where(Medic.id == medic_id))
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def get_templates(
+        db: AsyncSession,
+        region: int,
+        commune: int,
+        area: int,
+        specialty_id: int,
+        from_date: date,
+        to_date: date
+    ) -> List[ScheduleTemplate]:
+        result = await db.execute(SELECT_TEMPLATES, {
+            "region": region, "commune": commune, "area": area, "specialty_id": specialty_id,
+            "from_date": from_date, "to_date": to_date
+        })
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_template(db: AsyncSession, template_id: int) -> Optional[ScheduleTemplate]:
+        result = await db.execute(SELECT_TEMPLATE, {"template_id": template_id})
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_exceptions(
+        db: AsyncSession, medic_ids: List[int], from_date: date, to_date: date
+    ) -> List[ScheduleException]:
+        result = await db.execute(
+            SELECT_EXCEPTIONS, {"medic_ids": medic_ids, "from_date": from_date, "to_date": to_date}
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_day_exceptions(db: AsyncSession, medic_id: int, day: date) -> List[ScheduleException]:
+        result = await db.execute(SELECT_DAY_EXCEPTIONS, {"medic_id": medic_id, "day": day})
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_busy_windows(
+        db: AsyncSession, medic_ids: List[int], window_start: datetime, window_end: datetime
+    ) -> List[Row]:
+        result = await db.execute(
+            SELECT_BUSY_WINDOWS, {"medic_ids": medic_ids, "window_start": window_start, "window_end": window_end}
+        )
+        return result.all()
+
+    @staticmethod
+    async def get_overlapping_slot(
+        db: AsyncSession, medic_id: int, start_time: datetime, end_time: datetime
+    ) -> Row | None:
+        result = await db.execute(
+            SELECT_OVERLAPPING_SLOT, {"medic_id": medic_id, "start_time": start_time, "end_time": end_time}
+        )
+        return result.one_or_none()
+
+    @staticmethod
+    async def book_slot(
+        db: AsyncSession,
+        medic_id: int,
+        patient_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        time_bucket: Optional[str]
+    ) -> Row | None:
+        result = await db.execute(BOOK_TEMPLATE_SLOT, {
+            "medic_id": medic_id, "patient_id": patient_id, "start_time": start_time,
+            "end_time": end_time, "time_bucket": time_bucket
+        })
+        appointment = result.one_or_none()
+        logger.debug(
+            "Materialización del slot %s del médico %s: %s",
+            start_time, medic_id, "reservado" if appointment else "rechazado"
+        )
+        return appointment
\ No newline at end of file
@@ -0,0 +1,15 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from typing import List
+from src.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# NOTIFY es transaccional: los eventos se entregan a los LISTEN solo si la transacción de la reserva confirma.
+NOTIFY_SLOT_EVENTS = text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload")
+
+class SlotEventRepository:
+    @staticmethod
+    async def notify(db: AsyncSession, channel: str, payloads: List[str]) -> None:
+        await db.execute(NOTIFY_SLOT_EVENTS, {"channel": channel, "payloads": payloads})
+        logger.debug("Eventos de slot publicados en %s: %d", channel, len(payloads))
\ No newline at end of file
@@ -0,0 +1,101 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, Row
+from datetime import datetime
+from typing import List, Tuple
+from src.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+STAGING_TABLE = "available_slots_staging"
+STAGING_COLUMNS = ["line_number", "medic_id", "start_time", "end_time", "time_bucket"]
+
+CREATE_STAGING_TABLE = text(f"""
+    CREATE TEMPORARY TABLE {STAGING_TABLE} (
+        line_number INTEGER NOT NULL,
+        medic_id INTEGER NOT NULL,
+        start_time TIMESTAMP NOT NULL,
+        end_time TIMESTAMP NOT NULL,
+        time_bucket VARCHAR(10)
+    ) ON COMMIT DROP
+""")
+
+# Merge por conjuntos desde staging: descarta repetidos del archivo (mismo médico e inicio), slots ya existentes,
+# traslapes contra available_slots o contra una fila anterior del mismo archivo y médicos inexistentes.
+# La búsqueda de traslapes se acota a slots que comienzan hasta un día antes, lo que asume slots menores a 24 horas.
+# Una carga concurrente puede insertar el mismo slot después de la clasificación: ON CONFLICT lo omite y se cuenta
+# como repetido en vez de abortar toda la carga con la violación de uq_available_slots_medic_start.
+MERGE_STAGING = text(f"""
+    WITH candidates AS (
+        SELECT DISTINCT ON (s.medic_id, s.start_time)
+            s.line_number, s.medic_id, s.start_time, s.end_time, s.time_bucket
+        FROM {STAGING_TABLE} s
+        ORDER BY s.medic_id, s.start_time, s.line_number
+    ),
+    classified AS (
+        SELECT
+            c.*,
+            CASE
+                WHEN NOT EXISTS (SELECT 1 FROM medics m WHERE m.id = c.medic_id) THEN 'unknown_medic'
+                WHEN EXISTS (
+                    SELECT 1 FROM available_slots a
+                    WHERE a.medic_id = c.medic_id AND a.start_time = c.start_time AND a.end_time = c.end_time
+                ) THEN 'duplicate'
+                WHEN EXISTS (
+                    SELECT 1 FROM available_slots a
+                    WHERE a.medic_id = c.medic_id
+                    AND a.start_time > c.start_time - INTERVAL '1 day'
+                    AND a.start_time < c.end_time
+                    AND a.end_time > c.start_time
+                ) THEN 'overlap'
+                WHEN EXISTS (
+                    SELECT 1 FROM candidates o
+                    WHERE o.medic_id = c.medic_id
+                    AND o.start_time < c.start_time
+                    AND o.start_time > c.start_time - INTERVAL '1 day'
+                    AND o.end_time > c.start_time
+                ) THEN 'overlap'
+                ELSE 'new'
+            END AS outcome
+        FROM candidates c
+    ),
+    inserted AS (
+        INSERT INTO available_slots (medic_id, start_time, end_time, time_bucket, is_reserved, created_at, updated_at)
+        SELECT medic_id, start_time, end_time, time_bucket, false, now(), now()
+        FROM classified
+        WHERE outcome = 'new'
+        ON CONFLICT (medic_id, start_time) DO NOTHING
+        RETURNING id
+    )
+    SELECT
+        (SELECT count(*) FROM {STAGING_TABLE}) - (SELECT count(*) FROM candidates)
+            + (SELECT count(*) FROM classified WHERE outcome IN ('duplicate', 'new'))
+            - (SELECT count(*) FROM inserted) AS duplicates,
+        (SELECT count(*) FROM classified WHERE outcome = 'overlap') AS overlaps,
+        (SELECT count(*) FROM classified WHERE outcome = 'unknown_medic') AS unknown_medics,
+        (SELECT count(*) FROM inserted) AS inserted
+""")
+
+StagingRecord = Tuple[int, int, datetime, datetime, str | None]
+
+class ScheduleUploadRepository:
+    @staticmethod
+    async def create_staging_table(db: AsyncSession) -> None:
+        await db.execute(CREATE_STAGING_TABLE)
+        logger.debug("Tabla temporal de staging creada: %s", STAGING_TABLE)
+
+    @staticmethod
+    async def copy_to_staging(db: AsyncSession, records: List[StagingRecord]) -> None:
+        # COPY binario de asyncpg sobre la misma conexión de la sesión, para que vea la tabla temporal.
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            STAGING_TABLE, records=records, columns=STAGING_COLUMNS
+        )
+        logger.debug("Filas copiadas a staging: %d", len(records))
+
+    @staticmethod
+    async def merge_staging(db: AsyncSession) -> Row:
+        result = await db.execute(MERGE_STAGING)
+        summary = result.one()
+        logger.debug("Merge de staging completado: %s", summary._asdict())
+        return summary
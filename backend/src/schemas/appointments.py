@@ -1,5 +1,8 @@
 from datetime import datetime
+from enum import Enum
+from typing import List, Optional
 from pydantic import BaseModel, ConfigDict, Field
+from src.core.config import settings
 
 class AppointmentBase(BaseModel):
     patient_id: int = Field(..., description="ID del paciente")
@@ -36,6 +39,97 @@ class AppointmentResponse(AppointmentBase):
         }
     )
 
+class BulkAppointmentCreate(AppointmentBase):
+    slot_ids: List[int] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.APPOINTMENT_BULK_MAX_SLOTS,
+        description="IDs de los slots disponibles a reservar"
+    )
+    all_or_nothing: bool = Field(
+        True,
+        description="Si es verdadero, no se reserva ningún slot cuando alguno no está disponible"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [{"patient_id": 1, "slot_ids": [1, 2, 3], "all_or_nothing": True}]
+        }
+    )
+
+class BulkSlotStatusEnum(str, Enum):
+    RESERVED = "reserved"
+    UNAVAILABLE = "unavailable"
+    NOT_FOUND = "not_found"
+
+class BulkSlotResult(BaseModel):
+    slot_id: int = Field(..., description="ID del slot solicitado")
+    status: BulkSlotStatusEnum = Field(..., description="Resultado de la reserva del slot")
+    appointment: Optional[AppointmentResponse] = Field(None, description="Cita creada para el slot")
+
+class BulkAppointmentResponse(BaseModel):
+    reserved: int = Field(..., description="Cantidad de slots reservados")
+    results: List[BulkSlotResult]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "reserved": 1,
+                    "results": [
+                        {
+                            "slot_id": 1,
+                            "status": "reserved",
+                            "appointment": {
+                                "id": 1,
+                                "patient_id": 1,
+                                "medic_id": 1,
+                                "start_time": "2025-03-03T09:00:00",
+                                "end_time": "2025-03-03T10:00:00",
+                                "status": "pending"
+                            }
+                        },
+                        {"slot_id": 2, "status": "unavailable", "appointment": None}
+                    ]
+                }
+            ]
+        }
+    )
+
+class SlotHoldCreate(AppointmentBase):
+    id: int = Field(..., description="ID del slot disponible desde available_slots")
+    minutes: int = Field(
+        settings.SLOT_HOLD_DEFAULT_MINUTES,
+        ge=1,
+        le=settings.SLOT_HOLD_MAX_MINUTES,
+        description="Duración de la retención en minutos"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [{"id": 1, "patient_id": 1, "minutes": 10}]
+        }
+    )
+
+class SlotHoldResponse(AppointmentBase):
+    slot_id: int = Field(..., description="ID del slot retenido")
+    token: str = Field(..., description="Token para confirmar o liberar la retención")
+    expires_at: datetime = Field(..., description="Fecha y hora de vencimiento de la retención")
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
+            "examples": [
+                {
+                    "slot_id": 1,
+                    "patient_id": 1,
+                    "token": "3f2b9c1e8d4a4b6f9e0c7a5d2b1f4e8c",
+                    "expires_at": "2025-03-03T08:40:00"
+                }
+            ]
+        }
+    )
+
 # Esquema para crear un nuevo pago
 class PaymentCreate(BaseModel):
     appointment_id: int
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List
+from typing import List, Optional
+from datetime import date
 from enum import Enum
+from src.core.config import settings
 
 class TimeRangeFilterEnum(str, Enum):
     MORNING = "morning"
@@ -18,6 +20,42 @@ class AvailabilityQuery(BaseModel):
         strict=True
     )
 
+class SlotEventQuery(BaseModel):
+    region: int = Field(..., ge=1, le=999, description="Region ID for the appointment")
+    commune: int = Field(..., ge=1, le=999, description="Commune ID within the region")
+    area: int = Field(..., ge=1, le=999, description="Medical area ID")
+    specialty: str = Field(..., min_length=1, description="Specialty within the medical area")
+
+    model_config = ConfigDict(
+        strict=True
+    )
+
+class NextAvailableQuery(BaseModel):
+    area: int = Field(..., ge=1, le=999, description="Medical area ID")
+    specialty: str = Field(..., min_length=1, description="Specialty within the medical area")
+    region: Optional[int] = Field(None, ge=1, le=999, description="Region ID; all regions if omitted")
+    commune: Optional[int] = Field(None, ge=1, le=999, description="Commune ID; all communes if omitted")
+    limit: int = Field(
+        settings.AVAILABILITY_NEXT_DEFAULT_LIMIT, ge=1, le=settings.AVAILABILITY_NEXT_MAX_LIMIT,
+        description="Number of earliest slots to return"
+    )
+
+    model_config = ConfigDict(
+        strict=True
+    )
+
+class AvailabilityPageQuery(BaseModel):
+    from_date: Optional[date] = Field(None, description="First day to include (defaults to today)")
+    to_date: Optional[date] = Field(None, description="Last day to include")
+    cursor: Optional[str] = Field(None, description="Opaque cursor returned as next_cursor by the previous page")
+    limit: Optional[int] = Field(
+        None, ge=1, le=settings.AVAILABILITY_MAX_PAGE_SIZE, description="Maximum number of slots to scan for the page"
+    )
+
+    model_config = ConfigDict(
+        strict=True
+    )
+
 class AvailableSlot(BaseModel):
     id: int
     start_time: str
@@ -36,6 +74,7 @@ class AvailableSlot(BaseModel):
 
 class AvailabilityResponse(BaseModel):
     available_slots: List[AvailableSlot]
+    next_cursor: Optional[str] = None
 
     model_config = ConfigDict(
         from_attributes=True,
@@ -44,6 +83,64 @@ class AvailabilityResponse(BaseModel):
                 "available_slots": [
                     {"id": 1, "start_time": "2025-03-03T09:00:00", "end_time": "2025-03-03T10:00:00"},
                     {"id": 2, "start_time": "2025-03-03T12:00:00", "end_time": "2025-03-03T13:00:00"}
+                ],
+                "next_cursor": None
+            }
+        }
+    )
+
+class AvailabilityBatchQuery(AvailabilityQuery):
+    # En el cuerpo JSON el rango horario llega como texto, por lo que no se usa modo estricto.
+    model_config = ConfigDict(
+        strict=False
+    )
+
+class AvailabilityBatchRequest(BaseModel):
+    queries: List[AvailabilityBatchQuery] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.AVAILABILITY_BATCH_MAX_QUERIES,
+        description="List of availability queries to resolve in a single request"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "queries": [
+                    {"region": 1, "commune": 1, "area": 3, "specialty": "trauma", "time_range_filter": "morning"},
+                    {"region": 1, "commune": 1, "area": 3, "specialty": "trauma", "time_range_filter": "afternoon"}
+                ]
+            }
+        }
+    )
+
+class AvailabilityBatchResult(BaseModel):
+    index: int = Field(..., description="Position of the query in the request")
+    query: AvailabilityBatchQuery
+    available_slots: List[AvailableSlot]
+    next_cursor: Optional[str] = None
+
+class AvailabilityBatchResponse(BaseModel):
+    results: List[AvailabilityBatchResult]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "results": [
+                    {
+                        "index": 0,
+                        "query": {"region": 1, "commune": 1, "area": 3, "specialty": "trauma", "time_range_filter": "morning"},
+                        "available_slots": [
+                            {"id": 1, "start_time": "2025-03-03T09:00:00", "end_time": "2025-03-03T10:00:00"}
+                        ],
+                        "next_cursor": None
+                    },
+                    {
+                        "index": 1,
+                        "query": {"region": 1, "commune": 1, "area": 3, "specialty": "trauma", "time_range_filter": "afternoon"},
+                        "available_slots": [],
+                        "next_cursor": None
+                    }
                 ]
             }
         }
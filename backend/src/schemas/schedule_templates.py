@@ -0,0 +1,107 @@
+from datetime import date, datetime, time
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from src.schemas.appointments import AppointmentBase
+
+class ScheduleTemplateCreate(BaseModel):
+    medic_id: int = Field(..., ge=1, description="ID del médico")
+    weekdays: List[int] = Field(
+        ..., min_length=1, max_length=7, description="Días de la semana en que se repite (0 = lunes ... 6 = domingo)"
+    )
+    start_time: time = Field(..., description="Hora de inicio de la jornada")
+    end_time: time = Field(..., description="Hora de fin de la jornada")
+    slot_minutes: int = Field(60, ge=5, le=480, description="Duración de cada slot en minutos")
+    valid_from: date = Field(..., description="Primer día de vigencia")
+    valid_until: Optional[date] = Field(None, description="Último día de vigencia; sin límite si se omite")
+
+    @model_validator(mode="after")
+    def check_rule(self) -> "ScheduleTemplateCreate":
+        if any(weekday < 0 or weekday > 6 for weekday in self.weekdays):
+            raise ValueError("weekdays debe contener valores entre 0 y 6")
+        if self.end_time <= self.start_time:
+            raise ValueError("end_time debe ser posterior a start_time")
+        if self.valid_until and self.valid_until < self.valid_from:
+            raise ValueError("valid_until no puede ser anterior a valid_from")
+        return self
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "medic_id": 1,
+                    "weekdays": [0, 1, 2, 3, 4],
+                    "start_time": "09:00:00",
+                    "end_time": "12:00:00",
+                    "slot_minutes": 60,
+                    "valid_from": "2025-03-03",
+                    "valid_until": None
+                }
+            ]
+        }
+    )
+
+class ScheduleTemplateResponse(BaseModel):
+    id: int = Field(..., description="ID único de la plantilla")
+    medic_id: int = Field(..., description="ID del médico")
+    weekday: int = Field(..., description="Día de la semana (0 = lunes ... 6 = domingo)")
+    start_time: time = Field(..., description="Hora de inicio de la jornada")
+    end_time: time = Field(..., description="Hora de fin de la jornada")
+    slot_minutes: int = Field(..., description="Duración de cada slot en minutos")
+    valid_from: date = Field(..., description="Primer día de vigencia")
+    valid_until: Optional[date] = Field(None, description="Último día de vigencia")
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ScheduleExceptionCreate(BaseModel):
+    medic_id: int = Field(..., ge=1, description="ID del médico")
+    day: date = Field(..., description="Día bloqueado")
+    start_time: Optional[time] = Field(None, description="Inicio del bloqueo; sin horario se bloquea el día completo")
+    end_time: Optional[time] = Field(None, description="Fin del bloqueo")
+    reason: Optional[str] = Field(None, max_length=100, description="Motivo del bloqueo")
+
+    @model_validator(mode="after")
+    def check_time_range(self) -> "ScheduleExceptionCreate":
+        if (self.start_time is None) != (self.end_time is None):
+            raise ValueError("start_time y end_time deben indicarse juntos")
+        if self.start_time and self.end_time <= self.start_time:
+            raise ValueError("end_time debe ser posterior a start_time")
+        return self
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [{"medic_id": 1, "day": "2025-03-05", "start_time": None, "end_time": None, "reason": "Feriado"}]
+        }
+    )
+
+class ScheduleExceptionResponse(ScheduleExceptionCreate):
+    id: int = Field(..., description="ID único de la excepción")
+
+    model_config = ConfigDict(from_attributes=True)
+
+class TemplateSlot(BaseModel):
+    template_id: int = Field(..., description="ID de la plantilla que genera el slot")
+    start_time: datetime = Field(..., description="Hora de inicio")
+    end_time: datetime = Field(..., description="Hora de fin")
+
+class TemplateAvailabilityResponse(BaseModel):
+    available_slots: List[TemplateSlot]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "available_slots": [
+                    {"template_id": 1, "start_time": "2025-03-03T09:00:00", "end_time": "2025-03-03T10:00:00"}
+                ]
+            }
+        }
+    )
+
+class TemplateAppointmentCreate(AppointmentBase):
+    template_id: int = Field(..., description="ID de la plantilla que genera el slot")
+    start_time: datetime = Field(..., description="Hora de inicio del slot generado por la plantilla")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [{"template_id": 1, "start_time": "2025-03-03T09:00:00", "patient_id": 1}]
+        }
+    )
\ No newline at end of file
@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import List
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+class ScheduleRow(BaseModel):
+    medic_id: int = Field(..., ge=1, description="ID del médico")
+    start_time: datetime = Field(..., description="Hora de inicio del slot")
+    end_time: datetime = Field(..., description="Hora de fin del slot")
+
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def to_local_naive(cls, value: datetime) -> datetime:
+        # available_slots guarda horas locales sin zona: una hora con offset se convierte a la hora local del
+        # servidor, así una fila con y otra sin zona se comparan y se copian igual a staging.
+        if value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+
+    @model_validator(mode="after")
+    def check_time_range(self) -> "ScheduleRow":
+        if self.end_time <= self.start_time:
+            raise ValueError("end_time debe ser posterior a start_time")
+        return self
+
+class ScheduleUploadChunk(BaseModel):
+    chunk: int = Field(..., description="Número correlativo del bloque")
+    rows: int = Field(..., description="Filas leídas en el bloque")
+    staged: int = Field(..., description="Filas válidas cargadas al área de staging")
+    invalid: int = Field(..., description="Filas rechazadas por validación")
+
+class ScheduleRowError(BaseModel):
+    line: int = Field(..., description="Número de línea en el archivo")
+    error: str = Field(..., description="Motivo del rechazo")
+
+class ScheduleUploadResponse(BaseModel):
+    received: int = Field(..., description="Filas recibidas")
+    invalid: int = Field(..., description="Filas rechazadas por validación")
+    inserted: int = Field(..., description="Slots insertados en available_slots")
+    duplicates: int = Field(..., description="Slots repetidos en el archivo o ya existentes")
+    overlaps: int = Field(..., description="Slots que se traslapan con otro del mismo médico")
+    unknown_medics: int = Field(..., description="Slots de médicos inexistentes")
+    chunks: List[ScheduleUploadChunk] = Field(..., description="Resumen de cada bloque procesado")
+    errors: List[ScheduleRowError]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "received": 3,
+                "invalid": 1,
+                "inserted": 1,
+                "duplicates": 1,
+                "overlaps": 0,
+                "unknown_medics": 0,
+                "chunks": [{"chunk": 1, "rows": 3, "staged": 2, "invalid": 1}],
+                "errors": [{"line": 4, "error": "end_time debe ser posterior a start_time"}]
+            }
+        }
+    )
\ No newline at end of file
@@ -0,0 +1,72 @@
+from typing import List, Optional
+from src.core.config import Settings, settings
+from src.core.exceptions import ConnectionBudgetError
+from src.core.logging_config import get_logger, setup_logging
+import argparse
+import os
+import uvicorn
+
+logger = get_logger(__name__)
+
+# Uso (desde la carpeta backend): python -m src.server --workers 4 --max-connections 80
+# Cada worker crea su propio pool; el launcher fija APP_WORKERS y DB_MAX_CONNECTIONS en el entorno para que
+# todos dividan el mismo presupuesto en lugar de multiplicar DB_POOL_SIZE + DB_MAX_OVERFLOW por worker.
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Levanta la API con varios workers y un presupuesto global de conexiones.")
+    parser.add_argument("--host", default=settings.APP_HOST, help="Interfaz de escucha")
+    parser.add_argument("--port", type=int, default=settings.APP_PORT, help="Puerto de escucha")
+    parser.add_argument("--workers", type=int, default=settings.APP_WORKERS, help="Cantidad de workers de uvicorn")
+    parser.add_argument(
+        "--max-connections", type=int, default=settings.DB_MAX_CONNECTIONS,
+        help="Conexiones máximas contra cada servidor de base de datos, sumando todos los workers"
+    )
+    parser.add_argument(
+        "--pgbouncer", action="store_true", default=settings.DB_PGBOUNCER_MODE,
+        help="Modo compatible con PgBouncer en modo transacción (NullPool y sin caché de sentencias)"
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers debe ser al menos 1")
+    # Cada worker necesita al menos una conexión para su pool y otra para su conexión LISTEN.
+    if args.max_connections is not None and args.max_connections < args.workers * 2:
+        parser.error("--max-connections no alcanza para el pool y la conexión LISTEN de cada worker")
+    return args
+
+def main(argv: Optional[List[str]] = None) -> None:
+    setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
+    args = parse_args(argv)
+
+    os.environ["APP_WORKERS"] = str(args.workers)
+    os.environ["DB_PGBOUNCER_MODE"] = str(args.pgbouncer).lower()
+    if args.max_connections is not None:
+        os.environ["DB_MAX_CONNECTIONS"] = str(args.max_connections)
+
+    if args.pgbouncer:
+        logger.info("Modo PgBouncer: %d workers sin pool propio; el pooler limita las conexiones.", args.workers)
+    else:
+        # Misma configuración que leerán los workers con el entorno recién fijado.
+        worker_settings = Settings()
+        try:
+            pool_size, max_overflow = worker_settings.worker_pool_limits(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+            if settings.DB_READ_DATABASE_URL:
+                read_pool_size, read_max_overflow = worker_settings.worker_pool_limits(
+                    settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW, read=True
+                )
+        except ConnectionBudgetError as e:
+            # Los workers fallarían al crear sus pools: se detiene el arranque antes de levantarlos.
+            logger.critical("Presupuesto de conexiones insuficiente: %s", str(e))
+            raise SystemExit(2)
+        logger.info(
+            "Iniciando %d workers con pool_size=%d y max_overflow=%d por worker: hasta %d conexiones al primario.",
+            args.workers, pool_size, max_overflow, args.workers * (pool_size + max_overflow)
+        )
+        if settings.DB_READ_DATABASE_URL:
+            logger.info(
+                "Réplica de lectura: pool_size=%d y max_overflow=%d por worker.", read_pool_size, read_max_overflow
+            )
+
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
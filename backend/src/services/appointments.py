@@ -1,26 +1,91 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.schemas.appointments import AppointmentCreate, AppointmentResponse
+from src.schemas.appointments import (
+    AppointmentCreate, AppointmentResponse, BulkAppointmentCreate, BulkAppointmentResponse,
+    BulkSlotResult, BulkSlotStatusEnum
+)
 from src.repositories.appointments import AppointmentRepository
-from src.core.logging_config import get_logger, setup_logging
-from src.core.config import settings
+from src.services.availability import invalidate_slot_availability
+from src.services.slot_events import publish_slot_events, slot_event_payload
+from src.core.exceptions import SlotAlreadyReservedError, BulkReservationError
+from src.core.logging_config import get_logger
 
-setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
 logger = get_logger(__name__)
 
 class AppointmentService:
     @staticmethod
     async def create_appointment(data: AppointmentCreate, db: AsyncSession) -> AppointmentResponse:
         logger.debug(f"Procesando reserva para slot ID: {data.id}")
-        slot = await AppointmentRepository.get_available_slot(db, data.id)
-        if not slot or slot.is_reserved:
+        reservation = await AppointmentRepository.reserve_slot(db, data.id, data.patient_id)
+        if reservation is None:
+            await db.rollback()
+            if await AppointmentRepository.slot_exists(db, data.id):
+                raise SlotAlreadyReservedError("El slot seleccionado ya fue reservado por otro usuario")
             raise ValueError("El slot seleccionado no está disponible")
-        appointment_data = {
-            "patient_id": data.patient_id,
-            "medic_id": slot.medic_id,
-            "start_time": slot.start_time,
-            "end_time": slot.end_time
-        }
-        appointment = await AppointmentRepository.create(db, appointment_data)
-        await AppointmentRepository.mark_slot_as_reserved(db, slot.id)
+        await publish_slot_events(db, [slot_event_payload("reserved", reservation.slot_id, reservation)])
         await db.commit()
-        return AppointmentResponse(**appointment.__dict__)
\ No newline at end of file
+        invalidate_slot_availability(reservation)
+        return AppointmentResponse(
+            id=reservation.id,
+            patient_id=reservation.patient_id,
+            medic_id=reservation.medic_id,
+            start_time=reservation.start_time,
+            end_time=reservation.end_time,
+            status=reservation.status
+        )
+
+    @staticmethod
+    async def create_bulk_appointments(data: BulkAppointmentCreate, db: AsyncSession) -> BulkAppointmentResponse:
+        slot_ids = list(dict.fromkeys(data.slot_ids))
+        logger.debug("Procesando reserva múltiple para slots: %s", slot_ids)
+        locked_slots = {slot.id: slot for slot in await AppointmentRepository.lock_slots(db, sorted(slot_ids))}
+
+        statuses = {}
+        available_slots = []
+        for slot_id in slot_ids:
+            slot = locked_slots.get(slot_id)
+            if slot is None:
+                statuses[slot_id] = BulkSlotStatusEnum.NOT_FOUND
+            elif slot.is_reserved or slot.is_held:
+                statuses[slot_id] = BulkSlotStatusEnum.UNAVAILABLE
+            else:
+                statuses[slot_id] = BulkSlotStatusEnum.RESERVED
+                available_slots.append(slot)
+
+        if not available_slots or (data.all_or_nothing and len(available_slots) != len(slot_ids)):
+            await db.rollback()
+            results = [
+                BulkSlotResult(slot_id=slot_id, status=status)
+                for slot_id, status in statuses.items()
+                if status != BulkSlotStatusEnum.RESERVED
+            ]
+            raise BulkReservationError("Uno o más slots seleccionados no están disponibles", results)
+
+        await AppointmentRepository.mark_slots_as_reserved(db, [slot.id for slot in available_slots])
+        appointments = await AppointmentRepository.create_many(db, [
+            {
+                "patient_id": data.patient_id,
+                "medic_id": slot.medic_id,
+                "start_time": slot.start_time,
+                "end_time": slot.end_time
+            }
+            for slot in available_slots
+        ])
+        await publish_slot_events(db, [slot_event_payload("reserved", slot.id, slot) for slot in available_slots])
+        await db.commit()
+        for slot in available_slots:
+            invalidate_slot_availability(slot)
+
+        appointments_by_slot = {slot.id: appointment for slot, appointment in zip(available_slots, appointments)}
+        logger.debug("Reserva múltiple completada: %d de %d slots", len(appointments), len(slot_ids))
+        return BulkAppointmentResponse(
+            reserved=len(appointments),
+            results=[
+                BulkSlotResult(
+                    slot_id=slot_id,
+                    status=status,
+                    appointment=AppointmentResponse.model_validate(appointments_by_slot[slot_id])
+                    if slot_id in appointments_by_slot else None
+                )
+                for slot_id, status in statuses.items()
+            ]
+        )
\ No newline at end of file
@@ -2,84 +2,360 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from sqlalchemy.exc import NoResultFound
 from src.repositories.availability import AvailabilityRepository
-from src.schemas.availability import AvailabilityResponse, AvailableSlot, TimeRangeFilterEnum
-from src.core.logging_config import get_logger, setup_logging
+from src.schemas.availability import TimeRangeFilterEnum, AvailabilityPageQuery, AvailabilityBatchQuery
+from src.services.catalog import reference_catalog
+from src.core.cache import TTLCache, VersionCounters
+from src.core.metrics import registry
+from src.core.responses import SlotRow, ndjson_line
+from src.core.database import ReadSessionLocal
+from src.core.logging_config import get_logger
 from src.core.config import settings
-from collections import defaultdict
-import random
+from datetime import date, datetime
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple
+import asyncio
+import base64
+import hashlib
 
-setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
 logger = get_logger(__name__)
 
+availability_cache = TTLCache(
+    max_entries=settings.AVAILABILITY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AVAILABILITY_CACHE_TTL_SECONDS,
+    stale_seconds=settings.AVAILABILITY_CACHE_STALE_SECONDS
+)
+_refresh_tasks: set = set()
+# Con un solo worker todos los cambios pasan por este proceso; con varios, el listener de eventos de slot
+# habilita el seguimiento mientras su conexión LISTEN está activa.
+filter_versions = VersionCounters(tracking=not settings.SLOT_EVENTS_ENABLED and settings.APP_WORKERS == 1)
+
+for _stat in ("entries", "hits", "stale_hits", "misses", "evictions"):
+    registry.gauge(
+        f"availability_cache_{_stat}",
+        f"Caché de disponibilidad: {_stat} acumulados en este worker.",
+        lambda stat=_stat: availability_cache.stats()[stat]
+    )
+
+def availability_cache_key(region: int, commune: int, area: int, specialty_id: int, time_range: str) -> tuple:
+    return (region, commune, area, specialty_id, time_range)
+
+def invalidate_slot_availability(slot) -> None:
+    # slot debe exponer time_bucket y region_id, commune_id, area_id y specialty_id de su médico.
+    filter_versions.bump((slot.region_id, slot.commune_id, slot.area_id, slot.specialty_id))
+    if slot.time_bucket:
+        availability_cache.invalidate(availability_cache_key(
+            slot.region_id, slot.commune_id, slot.area_id, slot.specialty_id, slot.time_bucket
+        ))
+
+def clear_availability() -> None:
+    availability_cache.clear()
+    filter_versions.bump_all()
+
+def availability_etag(
+    region: int, commune: int, area: int, specialty_id: int, time_range: str, page: AvailabilityPageQuery
+) -> Optional[str]:
+    if not settings.AVAILABILITY_ETAG_ENABLED:
+        return None
+    version = filter_versions.version((region, commune, area, specialty_id))
+    if version is None:
+        return None
+    # La respuesta también depende del rango, de la página pedida y del día actual (ventana por defecto).
+    variant = hashlib.blake2s(
+        repr((time_range, page.from_date, page.to_date, page.cursor, page.limit, date.today())).encode(), digest_size=6
+    ).hexdigest()
+    return f'W/"{version}.{variant}"'
+
+def encode_cursor(start_time: datetime, end_time: datetime) -> str:
+    # La clave del cursor es la ventana (start_time, end_time), la misma que colapsa DISTINCT ON.
+    raw = f"{start_time.isoformat()}|{end_time.isoformat()}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, datetime]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        start_time, end_time = raw.split("|")
+        return datetime.fromisoformat(start_time), datetime.fromisoformat(end_time)
+    except Exception:
+        raise ValueError("El cursor de paginación no es válido")
+
+class AvailabilityPage(NamedTuple):
+    slots: List[SlotRow]
+    next_cursor: Optional[str]
+
 class AvailabilityService:
+    @staticmethod
+    def _build_page(rows, limit: int) -> AvailabilityPage:
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            _, last_start_time, last_end_time = rows[-1]
+            next_cursor = encode_cursor(last_start_time, last_end_time)
+        return AvailabilityPage([tuple(row) for row in rows], next_cursor)
+
+    @staticmethod
+    async def _load_page(
+        region: int,
+        commune: int,
+        area: int,
+        specialty_id: int,
+        time_range_filter: TimeRangeFilterEnum,
+        db: AsyncSession,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        after: Optional[Tuple[datetime, datetime]] = None,
+        limit: Optional[int] = None
+    ) -> AvailabilityPage:
+        limit = limit or settings.AVAILABILITY_PAGE_SIZE
+        repo = AvailabilityRepository(db)
+        available_slots = await repo.get_available_slots(
+            region, commune, area, specialty_id, time_range_filter, is_reserved=False,
+            from_date=from_date or date.today(), to_date=to_date, after=after, limit=limit + 1, collapse=True
+        )
+        return AvailabilityService._build_page(available_slots, limit)
+
+    @staticmethod
+    async def _refresh_cache_entry(
+        key: tuple,
+        region: int,
+        commune: int,
+        area: int,
+        specialty_id: int,
+        time_range_filter: TimeRangeFilterEnum
+    ) -> None:
+        generation = availability_cache.generation_of(key)
+        try:
+            async with ReadSessionLocal() as session:
+                page = await AvailabilityService._load_page(
+                    region, commune, area, specialty_id, time_range_filter, session
+                )
+            availability_cache.set(key, page, generation)
+            logger.debug("Entrada de caché revalidada: %s", key)
+        except Exception as e:
+            logger.error("Error al revalidar la caché de disponibilidad %s: %s", key, str(e), exc_info=True)
+        finally:
+            availability_cache.end_refresh(key)
+
+    @staticmethod
+    def _schedule_refresh(
+        key: tuple,
+        region: int,
+        commune: int,
+        area: int,
+        specialty_id: int,
+        time_range_filter: TimeRangeFilterEnum
+    ) -> None:
+        if not availability_cache.begin_refresh(key):
+            return
+        task = asyncio.create_task(
+            AvailabilityService._refresh_cache_entry(key, region, commune, area, specialty_id, time_range_filter)
+        )
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+
     @staticmethod
     async def check_availability(
         region: int,
         commune: int,
         area: int,
-        specialty: str,
+        specialty_id: int,
         time_range_filter: TimeRangeFilterEnum,
-        db: AsyncSession
-    ) -> AvailabilityResponse:
+        db: AsyncSession,
+        page: Optional[AvailabilityPageQuery] = None,
+        use_cache: bool = True
+    ) -> AvailabilityPage:
         logger.info(
-            "Verificando disponibilidad: region=%s, commune=%s, area=%s, specialty=%s, time_range=%s",
-            region, commune, area, specialty, time_range_filter.value
+            "Verificando disponibilidad: region=%s, commune=%s, area=%s, specialty_id=%s, time_range=%s",
+            region, commune, area, specialty_id, time_range_filter.value
         )
-        repo = AvailabilityRepository(db)
+        page = page or AvailabilityPageQuery()
+        after = decode_cursor(page.cursor) if page.cursor else None
+        # Solo la primera página con la ventana por defecto se guarda en caché. Las lecturas forzadas al primario
+        # no la usan: la entrada pudo llenarse desde una réplica que aún no ve la reserva del cliente.
+        is_default_page = not (page.from_date or page.to_date or page.cursor or page.limit)
         try:
-            available_slots = await repo.get_available_slots(
-                region, commune, area, specialty, time_range_filter, is_reserved=False
-            )
-            if not available_slots:
+            if settings.AVAILABILITY_CACHE_ENABLED and is_default_page and use_cache:
+                key = availability_cache_key(region, commune, area, specialty_id, time_range_filter.value)
+                cache_state, cached_page = availability_cache.get(key)
+                if cache_state == "stale":
+                    AvailabilityService._schedule_refresh(key, region, commune, area, specialty_id, time_range_filter)
+                if cache_state == "miss":
+                    generation = availability_cache.generation_of(key)
+                    cached_page = await AvailabilityService._load_page(
+                        region, commune, area, specialty_id, time_range_filter, db
+                    )
+                    availability_cache.set(key, cached_page, generation)
+                logger.debug("Caché de disponibilidad (%s): %s", cache_state, key)
+                result = cached_page
+            else:
+                result = await AvailabilityService._load_page(
+                    region, commune, area, specialty_id, time_range_filter, db,
+                    from_date=page.from_date, to_date=page.to_date, after=after, limit=page.limit
+                )
+
+            if not result.slots:
                 detail_message = (
                     f"No se encontraron slots disponibles para la región {region}, comuna {commune}, "
-                    f"área {area}, especialidad '{specialty}' y rango horario '{time_range_filter.value}'."
+                    f"área {area}, especialidad '{reference_catalog.specialty_name(specialty_id)}' y rango horario '{time_range_filter.value}'."
                 )
                 logger.debug(
-                    "No se encontraron horarios disponibles: region=%s, commune=%s, area=%s, specialty=%s, time_range=%s",
-                    region, commune, area, specialty, time_range_filter.value
+                    "No se encontraron horarios disponibles: region=%s, commune=%s, area=%s, specialty_id=%s, time_range=%s",
+                    region, commune, area, specialty_id, time_range_filter.value
                 )
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail_message)
 
-            slot_dict = defaultdict(list)
-            for slot in available_slots:
-                time_key = (slot.start_time.isoformat(), slot.end_time.isoformat())
-                slot_dict[time_key].append(slot)
-
-            unique_slots = []
-            for time_key, slots in slot_dict.items():
-                selected_slot = random.choice(slots)
-                unique_slots.append(
-                    AvailableSlot(
-                        id=selected_slot.id,
-                        start_time=selected_slot.start_time.isoformat(),
-                        end_time=selected_slot.end_time.isoformat()
-                    )
-                )
-
             logger.debug(
-                "Disponibilidad encontrada: %s slots únicos, region=%s, commune=%s, area=%s, specialty=%s, time_range=%s",
-                len(unique_slots), region, commune, area, specialty, time_range_filter.value
+                "Disponibilidad encontrada: %s slots únicos, region=%s, commune=%s, area=%s, specialty_id=%s, time_range=%s",
+                len(result.slots), region, commune, area, specialty_id, time_range_filter.value
             )
-            return AvailabilityResponse(available_slots=unique_slots)
+            return result
 
+        except HTTPException:
+            raise
         except NoResultFound:
             logger.debug(
-                "No se encontraron resultados en la base de datos: region=%s, commune=%s, area=%s, specialty=%s, time_range=%s",
-                region, commune, area, specialty, time_range_filter.value
+                "No se encontraron resultados en la base de datos: region=%s, commune=%s, area=%s, specialty_id=%s, time_range=%s",
+                region, commune, area, specialty_id, time_range_filter.value
             )
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No se encontraron datos para la región {region}, comuna {commune}, área {area}, especialidad '{specialty}' y rango '{time_range_filter.value}'."
+                detail=f"No se encontraron datos para la región {region}, comuna {commune}, área {area}, especialidad '{reference_catalog.specialty_name(specialty_id)}' y rango '{time_range_filter.value}'."
             )
         except Exception as e:
             logger.critical(
                 "Error interno al consultar disponibilidad: %s",
                 str(e),
                 exc_info=True,
-                extra={"region": region, "commune": commune, "area": area, "specialty": specialty, "time_range": time_range_filter.value}
+                extra={"region": region, "commune": commune, "area": area, "specialty_id": specialty_id, "time_range": time_range_filter.value}
             )
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Error interno del servidor al verificar disponibilidad."
-            )
\ No newline at end of file
+            )
+
+    @staticmethod
+    async def check_availability_batch(
+        queries: List[AvailabilityBatchQuery],
+        db: AsyncSession,
+        use_cache: bool = True
+    ) -> List[AvailabilityPage]:
+        logger.info("Verificando disponibilidad en lote: %d consultas", len(queries))
+        try:
+            specialty_ids = [reference_catalog.resolve_specialty(q.specialty) for q in queries]
+            keys = [
+                availability_cache_key(q.region, q.commune, q.area, specialty_id, q.time_range_filter.value)
+                for q, specialty_id in zip(queries, specialty_ids)
+            ]
+            resolved: dict = {}
+            pending: dict = {}
+            for key, query, specialty_id in zip(keys, queries, specialty_ids):
+                if key in resolved or key in pending:
+                    continue
+                if specialty_id is None or reference_catalog.filter_error(
+                    query.region, query.commune, query.area, specialty_id
+                ):
+                    # Combinación inexistente según el catálogo: página vacía sin consultar la base de datos.
+                    resolved[key] = AvailabilityPage([], None)
+                    continue
+                if settings.AVAILABILITY_CACHE_ENABLED and use_cache:
+                    cache_state, cached_page = availability_cache.get(key)
+                    if cache_state == "stale":
+                        AvailabilityService._schedule_refresh(
+                            key, query.region, query.commune, query.area, specialty_id, query.time_range_filter
+                        )
+                    if cache_state != "miss":
+                        resolved[key] = cached_page
+                        continue
+                pending[key] = (query.region, query.commune, query.area, specialty_id, query.time_range_filter)
+
+            if pending:
+                generations = {key: availability_cache.generation_of(key) for key in pending}
+                repo = AvailabilityRepository(db)
+                pending_keys = list(pending)
+                slots_by_filter = await repo.get_available_slots_batch(
+                    list(pending.values()),
+                    is_reserved=False,
+                    from_date=date.today(),
+                    limit_per_filter=settings.AVAILABILITY_PAGE_SIZE + 1,
+                    collapse=True
+                )
+                for idx, key in enumerate(pending_keys):
+                    page = AvailabilityService._build_page(slots_by_filter[idx], settings.AVAILABILITY_PAGE_SIZE)
+                    resolved[key] = page
+                    if settings.AVAILABILITY_CACHE_ENABLED and use_cache:
+                        availability_cache.set(key, page, generations[key])
+
+            logger.debug(
+                "Disponibilidad en lote resuelta: %d consultas, %d consultadas en base de datos",
+                len(queries), len(pending)
+            )
+            return [resolved[key] for key in keys]
+
+        except Exception as e:
+            logger.critical("Error interno al consultar disponibilidad en lote: %s", str(e), exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error interno del servidor al verificar disponibilidad."
+            )
+
+    @staticmethod
+    async def next_available(
+        area: int,
+        specialty_id: int,
+        db: AsyncSession,
+        region: Optional[int] = None,
+        commune: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[tuple]:
+        logger.info(
+            "Buscando próximas horas disponibles: area=%s, specialty_id=%s, region=%s, commune=%s, limit=%s",
+            area, specialty_id, region, commune, limit
+        )
+        repo = AvailabilityRepository(db)
+        slots = await repo.get_next_available_slots(
+            area, specialty_id, region=region, commune=commune, limit=limit or settings.AVAILABILITY_NEXT_DEFAULT_LIMIT
+        )
+        if not slots:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=(
+                    f"No hay horas disponibles para el área {area} y la especialidad "
+                    f"'{reference_catalog.specialty_name(specialty_id)}'."
+                )
+            )
+        return slots
+
+    @staticmethod
+    async def stream_availability(
+        region: int,
+        commune: int,
+        area: int,
+        specialty_id: int,
+        time_range_filter: TimeRangeFilterEnum,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        session_factory=ReadSessionLocal
+    ) -> AsyncIterator[bytes]:
+        # La sesión es propia del stream: la de get_db se cierra antes de enviar el cuerpo.
+        logger.info(
+            "Transmitiendo disponibilidad: region=%s, commune=%s, area=%s, specialty_id=%s, time_range=%s",
+            region, commune, area, specialty_id, time_range_filter.value
+        )
+        chunk_size = settings.AVAILABILITY_STREAM_CHUNK_SIZE
+        after = None
+        streamed = 0
+        async with session_factory() as session:
+            repo = AvailabilityRepository(session)
+            while True:
+                rows = await repo.get_available_slots(
+                    region, commune, area, specialty_id, time_range_filter, is_reserved=False,
+                    from_date=from_date or date.today(), to_date=to_date, after=after, limit=chunk_size,
+                    collapse=True
+                )
+                # El cursor avanza por ventana (start_time, end_time): ningún bloque repite una ventana anterior.
+                for slot_id, start_time, end_time in rows:
+                    streamed += 1
+                    yield ndjson_line({"id": slot_id, "start_time": start_time, "end_time": end_time})
+                if len(rows) < chunk_size:
+                    break
+                _, last_start_time, last_end_time = rows[-1]
+                after = (last_start_time, last_end_time)
+        logger.debug("Stream de disponibilidad finalizado: %d slots", streamed)
\ No newline at end of file
@@ -0,0 +1,203 @@
+from fastapi import HTTPException, status
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+from src.repositories.catalog import CatalogRepository, CatalogRows
+from src.models.database_models import specialty_key
+from src.core.database import AsyncSessionLocal
+from src.core.logging_config import get_logger
+from src.core.config import settings
+import asyncio
+import bisect
+import difflib
+import hashlib
+import itertools
+import orjson
+
+logger = get_logger(__name__)
+
+_refresh_tasks: set = set()
+
+class CatalogSnapshot(NamedTuple):
+    version: str
+    region_ids: FrozenSet[int]
+    commune_regions: Dict[int, int]
+    area_ids: FrozenSet[int]
+    specialty_ids: Dict[str, int]
+    specialty_names: Dict[int, str]
+    # Índice de prefijos ordenado: una entrada por cada palabra inicial posible de la clave de cada especialidad.
+    specialty_prefixes: List[Tuple[str, int, int]]
+    medic_filters: FrozenSet[Tuple[int, int, int, int]]
+    # Respuestas ya serializadas: los endpoints del catálogo no vuelven a serializar en cada solicitud.
+    payloads: Dict[str, bytes]
+
+def build_snapshot(rows: CatalogRows) -> CatalogSnapshot:
+    regions = [{"id": row.id, "name": row.name} for row in rows.regions]
+    communes = [
+        {"id": row.id, "name": row.name, "province_id": row.province_id, "region_id": row.region_id}
+        for row in rows.communes
+    ]
+    areas = [{"id": row.id, "name": row.name} for row in rows.areas]
+    specialties = [{"id": row.id, "name": row.name, "key": row.key} for row in rows.specialties]
+    medic_filters = frozenset(
+        (row.region_id, row.commune_id, row.area_id, row.specialty_id) for row in rows.medic_filters
+    )
+    catalog = {"regions": regions, "communes": communes, "areas": areas, "specialties": specialties}
+    digest = hashlib.sha1(orjson.dumps(catalog))
+    digest.update(orjson.dumps(sorted(medic_filters)))
+    version = digest.hexdigest()[:16]
+
+    payloads = {
+        "catalog": orjson.dumps({"version": version, **catalog}),
+        "regions": orjson.dumps(regions),
+        "areas": orjson.dumps(areas),
+        "specialties": orjson.dumps(specialties)
+    }
+    communes_by_region: Dict[int, list] = {row["id"]: [] for row in regions}
+    for commune in communes:
+        communes_by_region.setdefault(commune["region_id"], []).append(commune)
+    for region_id, region_communes in communes_by_region.items():
+        payloads[f"communes:{region_id}"] = orjson.dumps(region_communes)
+
+    return CatalogSnapshot(
+        version=version,
+        region_ids=frozenset(row["id"] for row in regions),
+        commune_regions={row["id"]: row["region_id"] for row in communes},
+        area_ids=frozenset(row["id"] for row in areas),
+        specialty_ids={row["key"]: row["id"] for row in specialties},
+        specialty_names={row["id"]: row["name"] for row in specialties},
+        specialty_prefixes=sorted(
+            (" ".join(words[position:]), row["id"], position)
+            for row in specialties
+            for words in [row["key"].split()]
+            for position in range(len(words))
+        ),
+        medic_filters=medic_filters,
+        payloads=payloads
+    )
+
+class ReferenceCatalog:
+    # Copia en memoria de regiones, comunas, áreas y especialidades; cada recarga reemplaza la instantánea completa de una vez.
+    def __init__(self):
+        self.snapshot: Optional[CatalogSnapshot] = None
+
+    @property
+    def etag(self) -> Optional[str]:
+        return f'"{self.snapshot.version}"' if self.snapshot else None
+
+    def resolve_specialty(self, specialty: str) -> Optional[int]:
+        return self.snapshot.specialty_ids.get(specialty_key(specialty)) if self.snapshot else None
+
+    def specialty_name(self, specialty_id: int) -> str:
+        return self.snapshot.specialty_names.get(specialty_id, str(specialty_id)) if self.snapshot else str(specialty_id)
+
+    def search_specialties(self, prefix: str, limit: int) -> List[dict]:
+        snapshot = self.snapshot
+        if snapshot is None:
+            return []
+        key = specialty_key(prefix)
+        position = bisect.bisect_left(snapshot.specialty_prefixes, (key,))
+        # Menor posición de palabra por especialidad: primero las que comienzan con el texto buscado.
+        matches: Dict[int, int] = {}
+        for indexed, specialty_id, word_position in itertools.islice(snapshot.specialty_prefixes, position, None):
+            if not indexed.startswith(key):
+                break
+            matches[specialty_id] = min(word_position, matches.get(specialty_id, word_position))
+        ranked = sorted(matches, key=lambda specialty_id: (matches[specialty_id], snapshot.specialty_names[specialty_id]))
+        return [{"id": specialty_id, "name": snapshot.specialty_names[specialty_id]} for specialty_id in ranked[:limit]]
+
+    def suggest_specialties(self, specialty: str, limit: int = 3) -> List[str]:
+        if self.snapshot is None:
+            return []
+        keys = difflib.get_close_matches(specialty_key(specialty), self.snapshot.specialty_ids, n=limit, cutoff=0.6)
+        return [self.snapshot.specialty_names[self.snapshot.specialty_ids[key]] for key in keys]
+
+    def filter_error(
+        self, region: Optional[int], commune: Optional[int], area: int, specialty_id: int
+    ) -> Optional[str]:
+        # region y commune son opcionales para búsquedas que abarcan todas las comunas o regiones.
+        snapshot = self.snapshot
+        if snapshot is None or not settings.CATALOG_VALIDATE_FILTERS:
+            return None
+        if region is not None and region not in snapshot.region_ids:
+            return f"La región {region} no existe."
+        if commune is not None:
+            commune_region = snapshot.commune_regions.get(commune)
+            if commune_region is None:
+                return f"La comuna {commune} no existe."
+            if region is not None and commune_region != region:
+                return f"La comuna {commune} no pertenece a la región {region}."
+        if area not in snapshot.area_ids:
+            return f"El área {area} no existe."
+        if region is not None and commune is not None:
+            known = (region, commune, area, specialty_id) in snapshot.medic_filters
+        else:
+            known = any(
+                medic_area == area and medic_specialty == specialty_id
+                and region in (None, medic_region) and commune in (None, medic_commune)
+                for medic_region, medic_commune, medic_area, medic_specialty in snapshot.medic_filters
+            )
+        if not known:
+            return (
+                f"No hay médicos de la especialidad '{self.specialty_name(specialty_id)}' para el área {area}"
+                + (f", región {region}" if region is not None else "")
+                + (f", comuna {commune}" if commune is not None else "")
+                + "."
+            )
+        return None
+
+reference_catalog = ReferenceCatalog()
+
+def resolve_filter(region: Optional[int], commune: Optional[int], area: int, specialty: str) -> int:
+    # Traduce la especialidad a su ID y rechaza combinaciones inexistentes sin consultar la base de datos.
+    if reference_catalog.snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="El catálogo de referencia aún no está cargado."
+        )
+    specialty_id = reference_catalog.resolve_specialty(specialty)
+    if specialty_id is None:
+        suggestions = reference_catalog.suggest_specialties(specialty)
+        error = f"La especialidad '{specialty}' no existe."
+        if suggestions:
+            error += f" Quizás quiso decir: {', '.join(suggestions)}."
+    else:
+        error = reference_catalog.filter_error(region, commune, area, specialty_id)
+    if error:
+        logger.debug("Filtro rechazado por el catálogo: %s", error)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error)
+    return specialty_id
+
+class CatalogService:
+    @staticmethod
+    async def load_catalog() -> None:
+        async with AsyncSessionLocal() as session:
+            rows = await CatalogRepository.load(session)
+        snapshot = build_snapshot(rows)
+        previous = reference_catalog.snapshot
+        reference_catalog.snapshot = snapshot
+        if previous is None or previous.version != snapshot.version:
+            logger.info(
+                "Catálogo de referencia cargado (versión %s): %d regiones, %d comunas, %d áreas, %d especialidades, "
+                "%d combinaciones",
+                snapshot.version, len(snapshot.region_ids), len(snapshot.commune_regions), len(snapshot.area_ids),
+                len(snapshot.specialty_ids), len(snapshot.medic_filters)
+            )
+
+    @staticmethod
+    async def refresh_catalog() -> None:
+        try:
+            await CatalogService.load_catalog()
+        except Exception as e:
+            logger.error("Error al recargar el catálogo de referencia: %s", str(e), exc_info=True)
+
+    @staticmethod
+    def on_notification(connection, pid: int, channel: str, payload: str) -> None:
+        logger.debug("Recarga del catálogo solicitada por NOTIFY en %s", channel)
+        task = asyncio.create_task(CatalogService.refresh_catalog())
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+
+    @staticmethod
+    async def run_refresher() -> None:
+        logger.info("Recarga del catálogo de referencia cada %s segundos.", settings.CATALOG_REFRESH_SECONDS)
+        while True:
+            await asyncio.sleep(settings.CATALOG_REFRESH_SECONDS)
+            await CatalogService.refresh_catalog()
\ No newline at end of file
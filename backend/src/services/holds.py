@@ -0,0 +1,164 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import timedelta
+from typing import Dict, List, NamedTuple, Optional
+from src.schemas.appointments import AppointmentResponse, SlotHoldCreate, SlotHoldResponse
+from src.repositories.holds import HoldRepository
+from src.repositories.appointments import AppointmentRepository
+from src.services.availability import filter_versions, invalidate_slot_availability
+from src.services.slot_events import SlotEvent, add_slot_event_handler, publish_slot_events, slot_event_payload
+from src.core.database import AsyncSessionLocal
+from src.core.exceptions import SlotAlreadyReservedError, HoldNotFoundError
+from src.core.logging_config import get_logger
+from src.core.config import settings
+import asyncio
+import time
+import uuid
+
+logger = get_logger(__name__)
+
+class Lease(NamedTuple):
+    token: str
+    patient_id: int
+    deadline: float
+
+class LeaseTable:
+    # Copia en memoria de las retenciones vigentes de este proceso; la tabla slot_holds es la fuente de verdad.
+    def __init__(self):
+        self._leases: Dict[int, Lease] = {}
+        self._slots_by_token: Dict[str, int] = {}
+
+    def get_active(self, slot_id: int) -> Optional[Lease]:
+        lease = self._leases.get(slot_id)
+        if lease and lease.deadline <= time.monotonic():
+            self.release(slot_id)
+            return None
+        return lease
+
+    def grant(self, slot_id: int, token: str, patient_id: int, ttl_seconds: float) -> None:
+        self.release(slot_id)
+        self._leases[slot_id] = Lease(token, patient_id, time.monotonic() + ttl_seconds)
+        self._slots_by_token[token] = slot_id
+
+    def release(self, slot_id: int) -> None:
+        lease = self._leases.pop(slot_id, None)
+        if lease:
+            self._slots_by_token.pop(lease.token, None)
+
+    def release_token(self, token: str) -> None:
+        slot_id = self._slots_by_token.get(token)
+        if slot_id is not None:
+            self.release(slot_id)
+
+    def clear(self) -> None:
+        self._leases.clear()
+        self._slots_by_token.clear()
+
+    def sweep(self) -> List[int]:
+        now = time.monotonic()
+        expired = [slot_id for slot_id, lease in self._leases.items() if lease.deadline <= now]
+        for slot_id in expired:
+            self.release(slot_id)
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._leases)
+
+lease_table = LeaseTable()
+
+def _sync_lease_table(slot_event: Optional[SlotEvent]) -> None:
+    # Las retenciones confirmadas o liberadas en otro worker dejan de rechazar solicitudes en este.
+    if slot_event is None:
+        lease_table.clear()
+    elif slot_event.event in ("reserved", "released"):
+        lease_table.release(slot_event.slot_id)
+
+add_slot_event_handler(_sync_lease_table)
+
+class HoldService:
+    @staticmethod
+    async def create_hold(data: SlotHoldCreate, db: AsyncSession) -> SlotHoldResponse:
+        logger.debug(f"Procesando retención para slot ID: {data.id}")
+        # Rechazo rápido sin tocar la base de datos ni sus bloqueos. Solo es confiable mientras este worker ve los
+        # cambios de los demás (un único worker o el listener de eventos conectado); si no, decide la base de datos.
+        if filter_versions.tracking and lease_table.get_active(data.id):
+            raise SlotAlreadyReservedError("El slot seleccionado ya está retenido")
+
+        token = uuid.uuid4().hex
+        hold = await HoldRepository.create(db, data.id, data.patient_id, token, timedelta(minutes=data.minutes))
+        if hold is None:
+            await db.rollback()
+            if await AppointmentRepository.slot_exists(db, data.id):
+                raise SlotAlreadyReservedError("El slot seleccionado ya fue reservado o retenido por otro usuario")
+            raise ValueError("El slot seleccionado no está disponible")
+        await publish_slot_events(db, [slot_event_payload("held", hold.slot_id, hold)])
+        await db.commit()
+
+        lease_table.grant(data.id, token, data.patient_id, data.minutes * 60)
+        invalidate_slot_availability(hold)
+        return SlotHoldResponse.model_validate(hold)
+
+    @staticmethod
+    async def confirm_hold(token: str, db: AsyncSession) -> AppointmentResponse:
+        logger.debug("Confirmando retención: %s", token)
+        reservation = await HoldRepository.confirm(db, token)
+        if reservation is None:
+            await db.rollback()
+            if await HoldRepository.slot_taken(db, token):
+                # Una reserva directa ganó la carrera contra la retención vigente.
+                lease_table.release_token(token)
+                raise SlotAlreadyReservedError("El slot retenido ya fue reservado por otro usuario")
+            raise HoldNotFoundError("La retención no existe o ya venció")
+        await publish_slot_events(db, [slot_event_payload("reserved", reservation.slot_id, reservation)])
+        await db.commit()
+
+        lease_table.release_token(token)
+        invalidate_slot_availability(reservation)
+        return AppointmentResponse.model_validate(reservation)
+
+    @staticmethod
+    async def release_hold(token: str, db: AsyncSession) -> None:
+        logger.debug("Liberando retención: %s", token)
+        released = await HoldRepository.release(db, token)
+        if released is None:
+            await db.rollback()
+            raise HoldNotFoundError("La retención no existe o ya venció")
+        await publish_slot_events(db, [slot_event_payload("released", released.slot_id, released)])
+        await db.commit()
+
+        lease_table.release_token(token)
+        invalidate_slot_availability(released)
+
+    @staticmethod
+    async def load_active_holds() -> None:
+        async with AsyncSessionLocal() as session:
+            holds = await HoldRepository.get_active(session)
+        for hold in holds:
+            lease_table.grant(hold.slot_id, hold.token, hold.patient_id, float(hold.remaining_seconds))
+        logger.info("Retenciones vigentes cargadas en memoria: %d", len(holds))
+
+    @staticmethod
+    async def sweep_expired_holds() -> None:
+        expired_leases = lease_table.sweep()
+        async with AsyncSessionLocal() as session:
+            expired_holds = await HoldRepository.delete_expired(session)
+            await publish_slot_events(
+                session, [slot_event_payload("released", hold.slot_id, hold) for hold in expired_holds]
+            )
+            await session.commit()
+        for hold in expired_holds:
+            invalidate_slot_availability(hold)
+        if expired_leases or expired_holds:
+            logger.debug(
+                "Barrido de retenciones: %d vencidas en memoria, %d eliminadas en base de datos",
+                len(expired_leases), len(expired_holds)
+            )
+
+    @staticmethod
+    async def run_sweeper() -> None:
+        logger.info("Barredor de retenciones iniciado cada %s segundos.", settings.SLOT_HOLD_SWEEP_INTERVAL_SECONDS)
+        while True:
+            await asyncio.sleep(settings.SLOT_HOLD_SWEEP_INTERVAL_SECONDS)
+            try:
+                await HoldService.sweep_expired_holds()
+            except Exception as e:
+                logger.error("Error en el barrido de retenciones vencidas: %s", str(e), exc_info=True)
@@ -0,0 +1,211 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.schemas.schedule_templates import (
+    ScheduleTemplateCreate, ScheduleTemplateResponse, ScheduleExceptionCreate, ScheduleExceptionResponse,
+    TemplateAppointmentCreate
+)
+from src.schemas.availability import TimeRangeFilterEnum
+from src.schemas.appointments import AppointmentCreate, AppointmentResponse
+from src.repositories.schedule_templates import ScheduleTemplateRepository
+from src.services.appointments import AppointmentService
+from src.services.availability import invalidate_slot_availability
+from src.services.slot_events import publish_slot_events, slot_event_payload
+from src.models.database_models import ScheduleTemplate, ScheduleException, resolve_time_bucket
+from src.core.exceptions import SlotAlreadyReservedError, TemplateNotFoundError
+from src.core.logging_config import get_logger
+from src.core.config import settings
+import bisect
+
+logger = get_logger(__name__)
+
+TemplateSlotRow = Tuple[int, datetime, datetime]
+
+def expand_template(template: ScheduleTemplate, from_date: date, to_date: date) -> Iterator[Tuple[datetime, datetime]]:
+    first_day = max(from_date, template.valid_from)
+    last_day = min(to_date, template.valid_until) if template.valid_until else to_date
+    day = first_day + timedelta(days=(template.weekday - first_day.weekday()) % 7)
+    step = timedelta(minutes=template.slot_minutes)
+    while day <= last_day:
+        start_time = datetime.combine(day, template.start_time)
+        day_end = datetime.combine(day, template.end_time)
+        while start_time + step <= day_end:
+            yield start_time, start_time + step
+            start_time += step
+        day += timedelta(days=7)
+
+def template_slot_end(template: ScheduleTemplate, start_time: datetime) -> Optional[datetime]:
+    # Devuelve el fin del slot si start_time coincide con un inicio generado por la plantilla.
+    day = start_time.date()
+    if day.weekday() != template.weekday or day < template.valid_from:
+        return None
+    if template.valid_until and day > template.valid_until:
+        return None
+    offset = start_time - datetime.combine(day, template.start_time)
+    step = timedelta(minutes=template.slot_minutes)
+    end_time = start_time + step
+    if offset < timedelta(0) or offset % step or end_time > datetime.combine(day, template.end_time):
+        return None
+    return end_time
+
+def is_blocked(exceptions: List[ScheduleException], start_time: datetime, end_time: datetime) -> bool:
+    for exception in exceptions:
+        if exception.start_time is None:
+            return True
+        if (
+            datetime.combine(exception.day, exception.start_time) < end_time
+            and datetime.combine(exception.day, exception.end_time) > start_time
+        ):
+            return True
+    return False
+
+def overlaps_busy(
+    busy: List[Tuple[datetime, datetime]],
+    busy_starts: List[datetime],
+    start_time: datetime,
+    end_time: datetime
+) -> bool:
+    # busy está ordenado por inicio y sus ventanas no se traslapan entre sí (un médico no tiene dos slots
+    # simultáneos), así que basta revisar la última que comienza antes del fin del candidato.
+    idx = bisect.bisect_left(busy_starts, end_time)
+    return idx > 0 and busy[idx - 1][1] > start_time
+
+class ScheduleTemplateService:
+    @staticmethod
+    async def create_templates(data: ScheduleTemplateCreate, db: AsyncSession) -> List[ScheduleTemplateResponse]:
+        logger.debug(f"Creando plantillas de horario para el médico ID: {data.medic_id}")
+        if not await ScheduleTemplateRepository.medic_exists(db, data.medic_id):
+            raise ValueError(f"El médico {data.medic_id} no existe")
+        templates = await ScheduleTemplateRepository.create_templates(db, [
+            ScheduleTemplate(
+                medic_id=data.medic_id,
+                weekday=weekday,
+                start_time=data.start_time,
+                end_time=data.end_time,
+                slot_minutes=data.slot_minutes,
+                valid_from=data.valid_from,
+                valid_until=data.valid_until
+            )
+            for weekday in sorted(set(data.weekdays))
+        ])
+        await db.commit()
+        return [ScheduleTemplateResponse.model_validate(template) for template in templates]
+
+    @staticmethod
+    async def create_exception(data: ScheduleExceptionCreate, db: AsyncSession) -> ScheduleExceptionResponse:
+        logger.debug(f"Creando excepción de horario para el médico ID: {data.medic_id}")
+        if not await ScheduleTemplateRepository.medic_exists(db, data.medic_id):
+            raise ValueError(f"El médico {data.medic_id} no existe")
+        exception = await ScheduleTemplateRepository.create_exception(db, ScheduleException(**data.model_dump()))
+        await db.commit()
+        return ScheduleExceptionResponse.model_validate(exception)
+
+    @staticmethod
+    async def check_availability(
+        region: int,
+        commune: int,
+        area: int,
+        specialty_id: int,
+        time_range_filter: TimeRangeFilterEnum,
+        db: AsyncSession,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None
+    ) -> List[TemplateSlotRow]:
+        logger.info(
+            "Expandiendo plantillas de horario: region=%s, commune=%s, area=%s, specialty_id=%s, time_range=%s",
+            region, commune, area, specialty_id, time_range_filter.value
+        )
+        from_date = max(from_date or date.today(), date.today())
+        to_date = to_date or from_date + timedelta(days=settings.SCHEDULE_TEMPLATE_DEFAULT_DAYS - 1)
+        if to_date < from_date:
+            raise ValueError("to_date no puede ser anterior a from_date")
+        if (to_date - from_date).days >= settings.SCHEDULE_TEMPLATE_MAX_DAYS:
+            raise ValueError(f"La ventana de fechas no puede superar {settings.SCHEDULE_TEMPLATE_MAX_DAYS} días")
+
+        templates = await ScheduleTemplateRepository.get_templates(
+            db, region, commune, area, specialty_id, from_date, to_date
+        )
+        if not templates:
+            return []
+        medic_ids = sorted({template.medic_id for template in templates})
+        window_start = datetime.combine(from_date, datetime.min.time())
+        window_end = datetime.combine(to_date + timedelta(days=1), datetime.min.time())
+
+        exceptions: Dict[Tuple[int, date], List[ScheduleException]] = {}
+        for exception in await ScheduleTemplateRepository.get_exceptions(db, medic_ids, from_date, to_date):
+            exceptions.setdefault((exception.medic_id, exception.day), []).append(exception)
+        busy: Dict[int, List[Tuple[datetime, datetime]]] = {}
+        for medic_id, start_time, end_time in await ScheduleTemplateRepository.get_busy_windows(
+            db, medic_ids, window_start, window_end
+        ):
+            busy.setdefault(medic_id, []).append((start_time, end_time))
+        busy_starts: Dict[int, List[datetime]] = {}
+        for medic_id, windows in busy.items():
+            windows.sort()
+            busy_starts[medic_id] = [start_time for start_time, _ in windows]
+
+        now = datetime.now()
+        slots: Dict[Tuple[datetime, datetime], int] = {}
+        for template in templates:
+            for start_time, end_time in expand_template(template, from_date, to_date):
+                window = (start_time, end_time)
+                if window in slots or start_time <= now:
+                    continue
+                if resolve_time_bucket(start_time, end_time) != time_range_filter.value:
+                    continue
+                if is_blocked(exceptions.get((template.medic_id, start_time.date()), []), start_time, end_time):
+                    continue
+                if template.medic_id in busy and overlaps_busy(
+                    busy[template.medic_id], busy_starts[template.medic_id], start_time, end_time
+                ):
+                    continue
+                # Igual que en available_slots, cada ventana horaria se ofrece una sola vez.
+                slots[window] = template.id
+
+        result = [(template_id, start_time, end_time) for (start_time, end_time), template_id in sorted(slots.items())]
+        logger.debug("Slots generados desde plantillas: %d de %d plantillas", len(result), len(templates))
+        return result
+
+    @staticmethod
+    async def book_template_slot(data: TemplateAppointmentCreate, db: AsyncSession) -> AppointmentResponse:
+        logger.debug(f"Reservando slot de plantilla {data.template_id} en {data.start_time}")
+        template = await ScheduleTemplateRepository.get_template(db, data.template_id)
+        if template is None:
+            raise TemplateNotFoundError(f"La plantilla {data.template_id} no existe")
+        start_time = data.start_time
+        if start_time.tzinfo is not None:
+            # Las plantillas y available_slots usan la hora local del servidor sin zona.
+            start_time = start_time.astimezone().replace(tzinfo=None)
+        end_time = template_slot_end(template, start_time)
+        if end_time is None:
+            raise ValueError("El horario indicado no corresponde a un slot de la plantilla")
+        if start_time <= datetime.now():
+            raise ValueError("El horario indicado ya pasó")
+        # Se copia antes del rollback: después la plantilla queda expirada y no puede recargarse de forma implícita.
+        medic_id = template.medic_id
+        exceptions = await ScheduleTemplateRepository.get_day_exceptions(db, medic_id, start_time.date())
+        if is_blocked(exceptions, start_time, end_time):
+            raise ValueError("El horario indicado está bloqueado por una excepción de la agenda del médico")
+
+        appointment = await ScheduleTemplateRepository.book_slot(
+            db, medic_id, data.patient_id, start_time, end_time, resolve_time_bucket(start_time, end_time)
+        )
+        if appointment is None:
+            await db.rollback()
+            existing = await ScheduleTemplateRepository.get_overlapping_slot(db, medic_id, start_time, end_time)
+            if existing is not None and not existing.is_reserved:
+                if (existing.start_time, existing.end_time) == (start_time, end_time):
+                    # El mismo horario ya fue publicado como slot: se reserva ese slot por el camino normal.
+                    logger.debug("Horario de plantilla ya publicado como slot %s", existing.id)
+                    return await AppointmentService.create_appointment(
+                        AppointmentCreate(id=existing.id, patient_id=data.patient_id), db
+                    )
+                raise ValueError(
+                    f"El horario indicado se traslapa con el slot publicado {existing.id}; "
+                    "resérvelo desde la disponibilidad general"
+                )
+            raise SlotAlreadyReservedError("El slot seleccionado ya fue reservado por otro usuario")
+        await publish_slot_events(db, [slot_event_payload("reserved", appointment.slot_id, appointment)])
+        await db.commit()
+        invalidate_slot_availability(appointment)
+        return AppointmentResponse.model_validate(appointment)
\ No newline at end of file
@@ -0,0 +1,219 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Set
+from src.repositories.slot_events import SlotEventRepository
+from src.services.availability import clear_availability, filter_versions, invalidate_slot_availability
+from src.core.metrics import registry
+from src.core.responses import sse_event
+from src.core.logging_config import get_logger
+from src.core.config import settings
+import asyncio
+import asyncpg
+import orjson
+
+logger = get_logger(__name__)
+
+RESYNC_EVENT = "resync"
+
+class SlotEvent(NamedTuple):
+    event: str
+    slot_id: int
+    start_time: datetime
+    end_time: datetime
+    time_bucket: Optional[str]
+    region_id: int
+    commune_id: int
+    area_id: int
+    specialty_id: int
+
+def slot_event_key(region: int, commune: int, area: int, specialty_id: int) -> tuple:
+    return (region, commune, area, specialty_id)
+
+def slot_event_payload(event: str, slot_id: int, slot) -> str:
+    # slot debe exponer start_time, end_time, time_bucket y region_id, commune_id, area_id y specialty_id de su médico.
+    return orjson.dumps([
+        event, slot_id, slot.start_time, slot.end_time, slot.time_bucket,
+        slot.region_id, slot.commune_id, slot.area_id, slot.specialty_id
+    ]).decode()
+
+def parse_slot_event(payload: str) -> Optional[SlotEvent]:
+    # None indica una orden de resincronización completa, sin slot asociado.
+    event, *fields = orjson.loads(payload)
+    if event == RESYNC_EVENT:
+        return None
+    slot_id, start_time, end_time, *rest = fields
+    return SlotEvent(event, slot_id, datetime.fromisoformat(start_time), datetime.fromisoformat(end_time), *rest)
+
+async def publish_slot_events(db: AsyncSession, payloads: List[str]) -> None:
+    # Se llama dentro de la transacción de la reserva: Postgres entrega los NOTIFY solo si esta confirma.
+    if settings.SLOT_EVENTS_ENABLED and payloads:
+        await SlotEventRepository.notify(db, settings.SLOT_EVENTS_CHANNEL, payloads)
+
+async def publish_availability_resync(db: AsyncSession) -> None:
+    # Para cambios masivos, como una carga de horarios: cada worker descarta su caché y sus versiones de filtro.
+    await publish_slot_events(db, [orjson.dumps([RESYNC_EVENT]).decode()])
+
+class Subscription:
+    def __init__(self, key: tuple, queue_size: int):
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def resync(self) -> None:
+        # Descarta lo pendiente y deja solo la orden de resincronizar; el stream se cierra tras enviarla.
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+class SlotEventHub:
+    # Reparte los eventos recibidos por el LISTEN del worker entre los clientes SSE suscritos a cada filtro.
+    def __init__(self, queue_size: int):
+        self._queue_size = queue_size
+        self._subscriptions: Dict[tuple, Set[Subscription]] = {}
+        self.dropped = 0
+
+    def subscribe(self, key: tuple) -> Subscription:
+        subscription = Subscription(key, self._queue_size)
+        self._subscriptions.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.key)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.key]
+
+    def publish(self, slot_event: SlotEvent) -> None:
+        key = slot_event_key(slot_event.region_id, slot_event.commune_id, slot_event.area_id, slot_event.specialty_id)
+        for subscription in list(self._subscriptions.get(key, ())):
+            try:
+                subscription.queue.put_nowait(slot_event)
+            except asyncio.QueueFull:
+                # Un cliente lento no frena al resto: se le desconecta y debe volver a consultar la disponibilidad.
+                self.dropped += 1
+                self.unsubscribe(subscription)
+                subscription.resync()
+                logger.warning("Suscriptor de eventos de slot desconectado por cola llena: %s", key)
+
+    def resync_all(self) -> None:
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                self.unsubscribe(subscription)
+                subscription.resync()
+
+    def __len__(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+slot_event_hub = SlotEventHub(settings.SLOT_EVENTS_QUEUE_SIZE)
+
+registry.gauge(
+    "slot_event_subscribers", "Clientes SSE suscritos a eventos de slot en este worker.", lambda: len(slot_event_hub)
+)
+registry.gauge(
+    "slot_event_dropped_subscribers", "Clientes SSE desconectados por no consumir sus eventos a tiempo.",
+    lambda: slot_event_hub.dropped
+)
+
+# Otros servicios del worker que reaccionan a los eventos, como la tabla de retenciones en memoria.
+# Reciben el SlotEvent o None cuando se ordena resincronizar.
+_event_handlers: List[Callable[[Optional[SlotEvent]], None]] = []
+
+def add_slot_event_handler(handler: Callable[[Optional[SlotEvent]], None]) -> None:
+    _event_handlers.append(handler)
+
+def _listener_dsn() -> str:
+    url = settings.SLOT_EVENTS_DATABASE_URL or settings.DATABASE_URL
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+def _on_notification(connection, pid: int, channel: str, payload: str) -> None:
+    try:
+        slot_event = parse_slot_event(payload)
+    except Exception as e:
+        logger.error("Evento de slot inválido en %s: %s", channel, str(e))
+        return
+    for handler in _event_handlers:
+        handler(slot_event)
+    if slot_event is None:
+        logger.info("Resincronización de disponibilidad solicitada por NOTIFY en %s", channel)
+        clear_availability()
+        slot_event_hub.resync_all()
+        return
+    # Los eventos también llegan desde otros workers: se invalida la caché local de disponibilidad afectada.
+    invalidate_slot_availability(slot_event)
+    slot_event_hub.publish(slot_event)
+
+class SlotEventService:
+    @staticmethod
+    async def run_listener(
+        extra_listeners: Optional[Dict[str, Callable]] = None, max_backoff_seconds: float = 30.0
+    ) -> None:
+        # La misma conexión LISTEN atiende otros canales del worker, como la recarga del catálogo, y sigue
+        # activa para ellos aunque el feed de eventos de slot esté deshabilitado.
+        slot_events = settings.SLOT_EVENTS_ENABLED
+        listeners = dict(extra_listeners or {})
+        if slot_events:
+            listeners[settings.SLOT_EVENTS_CHANNEL] = _on_notification
+        if not listeners:
+            return
+        backoff = 1.0
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(_listener_dsn())
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                for listen_channel, callback in listeners.items():
+                    await connection.add_listener(listen_channel, callback)
+                logger.info("Escuchando eventos en los canales: %s.", ", ".join(listeners))
+                if slot_events:
+                    if backoff > 1.0:
+                        # Durante la desconexión pudieron perderse eventos: la caché y los clientes deben resincronizar.
+                        for handler in _event_handlers:
+                            handler(None)
+                        clear_availability()
+                        slot_event_hub.resync_all()
+                    filter_versions.tracking = True
+                backoff = 1.0
+                await lost.wait()
+                logger.warning("Conexión LISTEN perdida.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error en la conexión LISTEN: %s", str(e))
+            finally:
+                if slot_events:
+                    # Sin LISTEN no se ven los cambios de otros workers: se dejan de emitir ETags de disponibilidad.
+                    filter_versions.tracking = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff_seconds)
+
+    @staticmethod
+    async def stream(region: int, commune: int, area: int, specialty_id: int) -> AsyncIterator[bytes]:
+        subscription = slot_event_hub.subscribe(slot_event_key(region, commune, area, specialty_id))
+        logger.debug("Suscriptor de eventos de slot conectado: %s", subscription.key)
+        try:
+            yield sse_event("ready", {"region": region, "commune": commune, "area": area, "specialty_id": specialty_id})
+            while True:
+                try:
+                    slot_event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.SLOT_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Comentario SSE: mantiene viva la conexión a través de proxies sin generar eventos.
+                    yield b": ping\n\n"
+                    continue
+                if slot_event is None:
+                    yield sse_event(RESYNC_EVENT, {})
+                    break
+                yield sse_event(slot_event.event, {
+                    "id": slot_event.slot_id,
+                    "start_time": slot_event.start_time,
+                    "end_time": slot_event.end_time,
+                    "time_bucket": slot_event.time_bucket
+                })
+        finally:
+            slot_event_hub.unsubscribe(subscription)
+            logger.debug("Suscriptor de eventos de slot desconectado: %s", subscription.key)
\ No newline at end of file
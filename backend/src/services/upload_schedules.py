@@ -0,0 +1,129 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from typing import AsyncIterator, List, Literal, Tuple
+from src.schemas.upload_schedules import ScheduleRow, ScheduleRowError, ScheduleUploadChunk, ScheduleUploadResponse
+from src.repositories.upload_schedules import ScheduleUploadRepository, StagingRecord
+from src.services.availability import clear_availability
+from src.services.slot_events import publish_availability_resync
+from src.models.database_models import resolve_time_bucket
+from src.core.logging_config import get_logger
+from src.core.config import settings
+import csv
+import json
+
+logger = get_logger(__name__)
+
+UploadFormat = Literal["csv", "ndjson"]
+
+async def _iter_lines(body: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    # Solo se mantiene en memoria la línea incompleta del final de cada bloque recibido.
+    pending = b""
+    line_number = 0
+    async for chunk in body:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield line_number + 1, pending.decode("utf-8-sig").rstrip("\r")
+
+async def _iter_rows(body: AsyncIterator[bytes], upload_format: UploadFormat) -> AsyncIterator[Tuple[int, dict | str]]:
+    header = None
+    async for line_number, line in _iter_lines(body):
+        if not line.strip():
+            continue
+        if upload_format == "ndjson":
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, f"JSON inválido: {e.msg}"
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, f"Se esperaban {len(header)} columnas y se recibieron {len(values)}"
+            continue
+        yield line_number, dict(zip(header, values))
+
+class ScheduleUploadService:
+    @staticmethod
+    async def upload(
+        body: AsyncIterator[bytes],
+        upload_format: UploadFormat,
+        db: AsyncSession
+    ) -> ScheduleUploadResponse:
+        logger.info("Iniciando carga masiva de horarios en formato %s", upload_format)
+        chunk_size = settings.SCHEDULE_UPLOAD_CHUNK_SIZE
+        chunks: List[ScheduleUploadChunk] = []
+        errors: List[ScheduleRowError] = []
+        records: List[StagingRecord] = []
+        received = invalid = chunk_rows = chunk_invalid = 0
+
+        async def flush_chunk() -> None:
+            nonlocal records, chunk_rows, chunk_invalid
+            if records:
+                await ScheduleUploadRepository.copy_to_staging(db, records)
+            # El detalle de cada bloque se devuelve en la respuesta final, junto con el resultado del merge; el avance
+            # durante la carga solo queda en el log.
+            chunk_summary = ScheduleUploadChunk(
+                chunk=len(chunks) + 1, rows=chunk_rows, staged=len(records), invalid=chunk_invalid
+            )
+            chunks.append(chunk_summary)
+            logger.info(
+                "Bloque %d cargado a staging: %d filas, %d válidas, %d inválidas",
+                chunk_summary.chunk, chunk_summary.rows, chunk_summary.staged, chunk_summary.invalid
+            )
+            records, chunk_rows, chunk_invalid = [], 0, 0
+
+        try:
+            await ScheduleUploadRepository.create_staging_table(db)
+            async for line_number, raw_row in _iter_rows(body, upload_format):
+                received += 1
+                chunk_rows += 1
+                try:
+                    if isinstance(raw_row, str):
+                        raise ValueError(raw_row)
+                    row = ScheduleRow.model_validate(raw_row)
+                    records.append((
+                        line_number, row.medic_id, row.start_time, row.end_time,
+                        resolve_time_bucket(row.start_time, row.end_time)
+                    ))
+                except (ValidationError, ValueError) as e:
+                    invalid += 1
+                    chunk_invalid += 1
+                    if len(errors) < settings.SCHEDULE_UPLOAD_MAX_ERRORS:
+                        message = e.errors()[0]["msg"] if isinstance(e, ValidationError) else str(e)
+                        errors.append(ScheduleRowError(line=line_number, error=message))
+                if chunk_rows >= chunk_size:
+                    await flush_chunk()
+            if chunk_rows:
+                await flush_chunk()
+
+            summary = await ScheduleUploadRepository.merge_staging(db)
+            if summary.inserted:
+                # Los demás workers también deben descartar su caché y sus ETags de disponibilidad.
+                await publish_availability_resync(db)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        if summary.inserted:
+            clear_availability()
+        logger.info(
+            "Carga masiva finalizada: %d recibidas, %d insertadas, %d repetidas, %d traslapadas, %d inválidas",
+            received, summary.inserted, summary.duplicates, summary.overlaps, invalid
+        )
+        return ScheduleUploadResponse(
+            received=received,
+            invalid=invalid,
+            inserted=summary.inserted,
+            duplicates=summary.duplicates,
+            overlaps=summary.overlaps,
+            unknown_medics=summary.unknown_medics,
+            chunks=chunks,
+            errors=errors
+        )
@@ -0,0 +1,216 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, List, Optional, Tuple
+from src.core.config import settings
+from src.models.database_models import (
+    Region, Province, Commune, Area, Specialty, Medic, Patient, AvailableSlot, Appointment, resolve_time_bucket,
+    specialty_key
+)
+from src.core.database import AsyncSessionLocal, engine
+from src.core.bootstrap import create_schema
+from src.core.logging_config import get_logger, setup_logging
+from src.dummy_data_generator import clear_tables
+import argparse
+import asyncio
+import random
+import time as timer
+
+logger = get_logger(__name__)
+
+# Uso: python -m src.synthetic_data_generator --regions 16 --communes 20 --medics-per-specialty 5 --days 90
+# Genera un dataset reproducible (misma semilla, mismos datos) y lo carga con COPY sobre tablas vacías.
+
+AREAS = {
+    "Kinesiología": ["trauma", "respiratoria", "neurológica"],
+    "Cardiología": ["adulto", "infantil", "electrofisiología"],
+    "Fonoaudiología": ["lenguaje", "audiología", "deglución"],
+    "Medicina General": ["adulto", "infantil"],
+    "Traumatología": ["rodilla", "columna", "hombro"]
+}
+# Una especialidad puede repetirse entre áreas (por ejemplo "adulto"): se registra una sola vez.
+SPECIALTY_IDS = {
+    specialty: specialty_id
+    for specialty_id, specialty in enumerate(dict.fromkeys(s for specialties in AREAS.values() for s in specialties), start=1)
+}
+FIRST_NAMES = ["Juan", "María", "Pedro", "Camila", "José", "Valentina", "Diego", "Francisca", "Matías", "Catalina"]
+LAST_NAMES = ["González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez", "Sepúlveda"]
+
+SLOT_COLUMNS = ["id", "medic_id", "start_time", "end_time", "is_reserved", "time_bucket", "created_at", "updated_at"]
+APPOINTMENT_COLUMNS = ["id", "patient_id", "medic_id", "start_time", "end_time", "status", "created_at", "updated_at"]
+SEQUENCE_TABLES = [
+    Region.__tablename__, Province.__tablename__, Commune.__tablename__, Area.__tablename__,
+    Specialty.__tablename__, Medic.__tablename__, Patient.__tablename__, AvailableSlot.__tablename__, Appointment.__tablename__
+]
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Genera y carga un dataset sintético para pruebas de carga.")
+    parser.add_argument("--regions", type=int, default=1, help="Cantidad de regiones")
+    parser.add_argument("--communes", type=int, default=6, help="Comunas por región")
+    parser.add_argument("--medics-per-specialty", type=int, default=3, help="Médicos por especialidad en cada comuna")
+    parser.add_argument("--patients", type=int, default=1000, help="Cantidad de pacientes")
+    parser.add_argument("--days", type=int, default=30, help="Días de agenda a generar")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=None, help="Primer día (AAAA-MM-DD, por defecto hoy)")
+    parser.add_argument("--day-start", type=int, default=8, help="Hora de inicio de la jornada")
+    parser.add_argument("--day-end", type=int, default=20, help="Hora de fin de la jornada")
+    parser.add_argument("--slot-minutes", type=int, default=60, help="Duración de cada slot en minutos")
+    parser.add_argument("--reserved-fraction", type=float, default=0.3, help="Fracción de slots reservados (0 a 1)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla para reproducir el dataset")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Filas por bloque de COPY")
+    args = parser.parse_args(argv)
+    if not 0 <= args.reserved_fraction <= 1:
+        parser.error("--reserved-fraction debe estar entre 0 y 1")
+    if not 0 <= args.day_start < args.day_end <= 24:
+        parser.error("--day-start y --day-end deben cumplir 0 <= inicio < fin <= 24")
+    if args.slot_minutes <= 0 or args.batch_size <= 0:
+        parser.error("--slot-minutes y --batch-size deben ser positivos")
+    return args
+
+def _daily_offsets(day_start: int, day_end: int, slot_minutes: int) -> List[Tuple[timedelta, timedelta, Optional[str]]]:
+    # La franja horaria depende solo de la hora del día, así que se calcula una vez por jornada.
+    step = timedelta(minutes=slot_minutes)
+    offsets = []
+    start, limit = timedelta(hours=day_start), timedelta(hours=day_end)
+    reference = datetime.combine(date.today(), time())
+    while start + step <= limit:
+        offsets.append((start, start + step, resolve_time_bucket(reference + start, reference + start + step)))
+        start += step
+    return offsets
+
+def _person_name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+def _iter_medics(args: argparse.Namespace, rng: random.Random) -> Iterator[tuple]:
+    medic_id = 0
+    for region_id in range(1, args.regions + 1):
+        for commune_offset in range(args.communes):
+            commune_id = (region_id - 1) * args.communes + commune_offset + 1
+            for area_id, specialties in enumerate(AREAS.values(), start=1):
+                for specialty in specialties:
+                    for _ in range(args.medics_per_specialty):
+                        medic_id += 1
+                        yield (
+                            medic_id, f"Dr {_person_name(rng)}", SPECIALTY_IDS[specialty], area_id, region_id, commune_id
+                        )
+
+async def _copy(session: AsyncSession, table: str, columns: List[str], records: List[tuple]) -> None:
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(table, records=records, columns=columns)
+
+async def _load_reference_data(session: AsyncSession, args: argparse.Namespace, rng: random.Random) -> List[int]:
+    await _copy(session, Region.__tablename__, ["id", "name"], [
+        (region_id, f"Región {region_id}") for region_id in range(1, args.regions + 1)
+    ])
+    await _copy(session, Province.__tablename__, ["id", "name", "region_id"], [
+        (region_id, f"Provincia {region_id}", region_id) for region_id in range(1, args.regions + 1)
+    ])
+    await _copy(session, Commune.__tablename__, ["id", "name", "province_id"], [
+        ((region_id - 1) * args.communes + offset + 1, f"Comuna {region_id}-{offset + 1}", region_id)
+        for region_id in range(1, args.regions + 1)
+        for offset in range(args.communes)
+    ])
+    await _copy(session, Area.__tablename__, ["id", "name"], list(enumerate(AREAS, start=1)))
+    await _copy(session, Specialty.__tablename__, ["id", "name", "key"], [
+        (specialty_id, specialty.capitalize(), specialty_key(specialty))
+        for specialty, specialty_id in SPECIALTY_IDS.items()
+    ])
+    await _copy(session, Patient.__tablename__, ["id", "full_name", "email", "region_id", "commune_id"], [
+        (
+            patient_id, _person_name(rng), f"paciente{patient_id}@example.com",
+            rng.randint(1, args.regions), None
+        )
+        for patient_id in range(1, args.patients + 1)
+    ])
+    medics = list(_iter_medics(args, rng))
+    await _copy(
+        session, Medic.__tablename__,
+        ["id", "full_name", "specialty_id", "area_id", "region_id", "commune_id"], medics
+    )
+    logger.info(
+        "Datos de referencia cargados: %d regiones, %d comunas, %d médicos, %d pacientes",
+        args.regions, args.regions * args.communes, len(medics), args.patients
+    )
+    return [medic[0] for medic in medics]
+
+async def _load_schedule(
+    session: AsyncSession, args: argparse.Namespace, rng: random.Random, medic_ids: List[int]
+) -> Tuple[int, int]:
+    offsets = _daily_offsets(args.day_start, args.day_end, args.slot_minutes)
+    start_date = args.start_date or date.today()
+    now = datetime.now()
+    slots: List[tuple] = []
+    appointments: List[tuple] = []
+    slot_count = appointment_count = 0
+
+    async def flush() -> None:
+        nonlocal slots, appointments
+        await _copy(session, AvailableSlot.__tablename__, SLOT_COLUMNS, slots)
+        if appointments:
+            await _copy(session, Appointment.__tablename__, APPOINTMENT_COLUMNS, appointments)
+        logger.info("Bloque cargado: %d slots y %d citas acumulados", slot_count, appointment_count)
+        slots, appointments = [], []
+
+    for day_offset in range(args.days):
+        day = datetime.combine(start_date + timedelta(days=day_offset), time())
+        for medic_id in medic_ids:
+            for start_offset, end_offset, time_bucket in offsets:
+                start_time, end_time = day + start_offset, day + end_offset
+                is_reserved = rng.random() < args.reserved_fraction
+                slot_count += 1
+                slots.append((slot_count, medic_id, start_time, end_time, is_reserved, time_bucket, now, now))
+                if is_reserved:
+                    appointment_count += 1
+                    appointments.append((
+                        appointment_count, rng.randint(1, args.patients), medic_id,
+                        start_time, end_time, "confirmed", now, now
+                    ))
+                if len(slots) >= args.batch_size:
+                    await flush()
+    if slots:
+        await flush()
+    return slot_count, appointment_count
+
+async def _reset_sequences(session: AsyncSession) -> None:
+    # Los IDs se cargan explícitamente; las secuencias deben continuar desde el máximo cargado.
+    for table in SEQUENCE_TABLES:
+        await session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        ))
+
+async def generate(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    started = timer.perf_counter()
+    await create_schema()
+
+    async with AsyncSessionLocal() as session:
+        try:
+            await clear_tables(session)
+            medic_ids = await _load_reference_data(session, args, rng)
+            slot_count, appointment_count = await _load_schedule(session, args, rng, medic_ids)
+            await _reset_sequences(session)
+            # Los workers en ejecución recargan su catálogo de referencia al confirmar la carga.
+            await session.execute(text("SELECT pg_notify(:channel, '')"), {"channel": settings.CATALOG_NOTIFY_CHANNEL})
+            await session.commit()
+        except Exception as e:
+            logger.critical("Error al generar el dataset sintético: %s", str(e), exc_info=True)
+            await session.rollback()
+            raise
+
+    # ANALYZE fuera de la transacción para que el planificador vea las estadísticas del nuevo volumen.
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE"))
+    await engine.dispose()
+
+    logger.info(
+        "Dataset sintético generado en %.1f s: %d slots, %d citas (semilla %d)",
+        timer.perf_counter() - started, slot_count, appointment_count, args.seed
+    )
+
+def main(argv: Optional[List[str]] = None) -> None:
+    setup_logging(log_level=settings.LOG_LEVEL, log_to_file=settings.LOG_TO_FILE)
+    asyncio.run(generate(parse_args(argv)))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
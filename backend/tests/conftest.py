@@ -0,0 +1,102 @@
+import os
+
+# Las pruebas usan una base de datos desechable: al iniciar la sesión se borra y se recrea el esquema public.
+# Se configura con las mismas variables DB_POSTGRES_* de la API (por defecto postgres@localhost:5432/citas_test).
+os.environ.setdefault("DB_POSTGRES_USER", "postgres")
+os.environ.setdefault("DB_POSTGRES_PASSWORD", "postgres")
+os.environ.setdefault("DB_POSTGRES_HOST", "localhost")
+os.environ.setdefault("DB_POSTGRES_PORT", "5432")
+os.environ.setdefault("DB_POSTGRES_DB", "citas_test")
+os.environ.setdefault("TBK_COMMERCE_CODE", "597055555532")
+os.environ.setdefault("TBK_API_KEY", "test")
+os.environ["APP_ENVIRONMENT"] = "test"
+os.environ["APP_SEED_ON_STARTUP"] = "false"
+os.environ["LOG_TO_FILE"] = "false"
+# Un solo worker sin feed de eventos: las versiones de disponibilidad se siguen en proceso y el ETag es determinista.
+os.environ["SLOT_EVENTS_ENABLED"] = "false"
+os.environ["APP_WORKERS"] = "1"
+
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+import asyncio
+import asyncpg
+import pytest
+
+API = "/api/v1"
+
+def _admin_dsn() -> str:
+    return (
+        f"postgresql://{os.environ['DB_POSTGRES_USER']}:{os.environ['DB_POSTGRES_PASSWORD']}@"
+        f"{os.environ['DB_POSTGRES_HOST']}:{os.environ['DB_POSTGRES_PORT']}/{os.environ['DB_POSTGRES_DB']}"
+    )
+
+async def _reset_schema() -> None:
+    connection = await asyncpg.connect(_admin_dsn(), timeout=5)
+    try:
+        await connection.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public;")
+    finally:
+        await connection.close()
+
+@pytest.fixture(scope="session")
+def client():
+    try:
+        asyncio.run(_reset_schema())
+    except (OSError, asyncpg.PostgresError, asyncio.TimeoutError) as e:
+        pytest.skip(f"Base de datos de pruebas no disponible: {e}")
+    from main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+def slot_time(days: int, hour: int, minute: int = 0) -> datetime:
+    return datetime.combine(date.today() + timedelta(days=days), time(hour, minute))
+
+async def _seed() -> SimpleNamespace:
+    from src.core.database import AsyncSessionLocal
+    from src.models.database_models import (
+        Base, Region, Province, Commune, Area, Specialty, Patient, Medic, AvailableSlot, SchemaVersion
+    )
+    from src.services.availability import availability_cache, filter_versions
+    from src.services.holds import lease_table
+    from src.services.catalog import CatalogService
+
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables if table.name != SchemaVersion.__tablename__)
+    async with AsyncSessionLocal() as session:
+        await session.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+        session.add_all([
+            Region(id=1, name="Metropolitana"),
+            Province(id=1, name="Santiago", region_id=1),
+            Commune(id=1, name="Providencia", province_id=1),
+            Area(id=1, name="Medicina general"),
+            Specialty(id=1, name="Cardiología", key="cardiologia")
+        ])
+        await session.flush()
+        session.add_all([
+            Patient(id=1, full_name="Paciente Uno", email="uno@example.com", region_id=1, commune_id=1),
+            Patient(id=2, full_name="Paciente Dos", email="dos@example.com", region_id=1, commune_id=1),
+            Medic(id=1, full_name="Médico Uno", specialty_id=1, area_id=1, region_id=1, commune_id=1)
+        ])
+        await session.flush()
+        slots = [AvailableSlot(medic_id=1, start_time=slot_time(1, hour), end_time=slot_time(1, hour + 1)) for hour in (9, 10, 11)]
+        session.add_all(slots)
+        await session.commit()
+        slot_ids = [slot.id for slot in slots]
+
+    availability_cache.clear()
+    filter_versions.bump_all()
+    lease_table.clear()
+    await CatalogService.load_catalog()
+    return SimpleNamespace(region=1, commune=1, area=1, specialty="cardiologia", medic_id=1, patient_id=1, slot_ids=slot_ids)
+
+@pytest.fixture
+def seed(client) -> SimpleNamespace:
+    # Cada prueba parte de un médico con tres slots libres para mañana en la mañana.
+    return client.portal.call(_seed)
+
+@pytest.fixture
+def run(client):
+    # Ejecuta una corrutina en el loop de la aplicación, donde viven el engine y sus conexiones.
+    def runner(function, *args):
+        return client.portal.call(function, *args)
+    return runner
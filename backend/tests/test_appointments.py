@@ -0,0 +1,50 @@
+from tests.conftest import API
+
+def test_create_appointment_books_free_slot(client, seed):
+    response = client.post(f"{API}/appointments/", json={"id": seed.slot_ids[0], "patient_id": seed.patient_id})
+
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert body["medic_id"] == seed.medic_id
+    assert body["patient_id"] == seed.patient_id
+    assert body["status"] == "pending"
+
+def test_create_appointment_rejects_reserved_slot(client, seed):
+    first = client.post(f"{API}/appointments/", json={"id": seed.slot_ids[0], "patient_id": seed.patient_id})
+    second = client.post(f"{API}/appointments/", json={"id": seed.slot_ids[0], "patient_id": 2})
+
+    assert first.status_code == 201, first.text
+    assert second.status_code == 409, second.text
+
+def test_bulk_appointments_reserve_all_slots(client, seed):
+    response = client.post(
+        f"{API}/appointments/bulk", json={"slot_ids": seed.slot_ids[:2], "patient_id": seed.patient_id}
+    )
+
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert body["reserved"] == 2
+    assert [result["status"] for result in body["results"]] == ["reserved", "reserved"]
+
+def test_bulk_appointments_all_or_nothing_rolls_back_on_taken_slot(client, seed):
+    taken = client.post(f"{API}/appointments/", json={"id": seed.slot_ids[1], "patient_id": 2})
+    response = client.post(
+        f"{API}/appointments/bulk", json={"slot_ids": seed.slot_ids[:2], "patient_id": seed.patient_id}
+    )
+    still_free = client.post(f"{API}/appointments/", json={"id": seed.slot_ids[0], "patient_id": seed.patient_id})
+
+    assert taken.status_code == 201, taken.text
+    assert response.status_code == 409, response.text
+    assert still_free.status_code == 201, still_free.text
+
+def test_bulk_appointments_partial_reports_each_slot(client, seed):
+    client.post(f"{API}/appointments/", json={"id": seed.slot_ids[1], "patient_id": 2})
+    response = client.post(
+        f"{API}/appointments/bulk",
+        json={"slot_ids": seed.slot_ids[:2] + [999], "patient_id": seed.patient_id, "all_or_nothing": False}
+    )
+
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert body["reserved"] == 1
+    assert [result["status"] for result in body["results"]] == ["reserved", "unavailable", "not_found"]
@@ -0,0 +1,65 @@
+from sqlalchemy import insert
+from tests.conftest import API, slot_time
+import asyncio
+
+def _query(seed) -> dict:
+    return {
+        "region": seed.region, "commune": seed.commune, "area": seed.area, "specialty": seed.specialty,
+        "time_range_filter": "morning"
+    }
+
+def _batch_slot_ids(client, seed) -> list:
+    response = client.post(f"{API}/availability/check/batch", json={"queries": [_query(seed)]})
+    assert response.status_code == 200, response.text
+    return [slot["id"] for slot in response.json()["results"][0]["available_slots"]]
+
+async def _publish_slot_without_invalidation(medic_id: int) -> int:
+    from src.core.database import AsyncSessionLocal
+    from src.models.database_models import AvailableSlot
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            insert(AvailableSlot)
+            .values(medic_id=medic_id, start_time=slot_time(1, 8), end_time=slot_time(1, 9), time_bucket="morning")
+            .returning(AvailableSlot.id)
+        )
+        await session.commit()
+        return result.scalar_one()
+
+def test_batch_serves_stale_entry_and_refreshes_it(client, seed, run, monkeypatch):
+    from src.services.availability import availability_cache
+
+    monkeypatch.setattr(availability_cache, "ttl_seconds", 0.0)
+    monkeypatch.setattr(availability_cache, "stale_seconds", 60.0)
+    assert _batch_slot_ids(client, seed) == seed.slot_ids
+    new_slot_id = run(_publish_slot_without_invalidation, seed.medic_id)
+
+    assert new_slot_id not in _batch_slot_ids(client, seed)
+    run(asyncio.sleep, 0.3)
+    assert new_slot_id in _batch_slot_ids(client, seed)
+
+def _check(client, seed, etag: str | None = None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return client.get(f"{API}/availability/check/", params=_query(seed), headers=headers)
+
+def test_conditional_get_returns_304_until_the_filter_changes(client, seed):
+    first = _check(client, seed)
+    etag = first.headers.get("etag")
+    not_modified = _check(client, seed, etag)
+    booked = client.post(f"{API}/appointments/", json={"id": seed.slot_ids[0], "patient_id": seed.patient_id})
+    after_booking = _check(client, seed, etag)
+
+    assert first.status_code == 200, first.text
+    assert etag and etag.startswith('W/"')
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert booked.status_code == 201, booked.text
+    assert after_booking.status_code == 200, after_booking.text
+    assert after_booking.headers.get("etag") != etag
+    assert seed.slot_ids[0] not in [slot["id"] for slot in after_booking.json()["available_slots"]]
+
+def test_conditional_get_ignores_unknown_etag(client, seed):
+    response = _check(client, seed, 'W/"otro.0"')
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()["available_slots"]) == len(seed.slot_ids)
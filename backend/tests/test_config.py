@@ -0,0 +1,15 @@
+from src.core.config import divide_connection_budget
+from src.core.exceptions import ConnectionBudgetError
+import pytest
+
+def test_connection_budget_defaults_without_limit():
+    assert divide_connection_budget(None, 4, 10, 5) == (10, 5)
+
+def test_connection_budget_is_split_between_workers_and_pools():
+    # 80 conexiones entre 4 workers: 20 cada uno, 1 para LISTEN y el resto repartido entre dos pools.
+    assert divide_connection_budget(80, 4, 10, 20, reserved=1, pools=2) == (9, 0)
+    assert divide_connection_budget(80, 4, 5, 20, reserved=1, pools=1) == (5, 14)
+
+def test_connection_budget_rejects_share_below_one_connection():
+    with pytest.raises(ConnectionBudgetError):
+        divide_connection_budget(8, 4, 10, 5, reserved=1, pools=2)
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from tests.conftest import API
+import asyncio
+
+def _hold(client, slot_id: int, patient_id: int = 1):
+    return client.post(f"{API}/appointments/holds", json={"id": slot_id, "patient_id": patient_id, "minutes": 5})
+
+def test_hold_blocks_direct_booking_and_confirms(client, seed):
+    hold = _hold(client, seed.slot_ids[0])
+    direct = client.post(f"{API}/appointments/", json={"id": seed.slot_ids[0], "patient_id": 2})
+    second_hold = _hold(client, seed.slot_ids[0], patient_id=2)
+    confirmed = client.post(f"{API}/appointments/holds/{hold.json()['token']}/confirm")
+
+    assert hold.status_code == 201, hold.text
+    assert direct.status_code == 409, direct.text
+    assert second_hold.status_code == 409, second_hold.text
+    assert confirmed.status_code == 201, confirmed.text
+    assert confirmed.json()["status"] == "pending"
+    assert confirmed.json()["patient_id"] == seed.patient_id
+
+def test_confirmed_hold_cannot_be_confirmed_again(client, seed):
+    token = _hold(client, seed.slot_ids[0]).json()["token"]
+    first = client.post(f"{API}/appointments/holds/{token}/confirm")
+    second = client.post(f"{API}/appointments/holds/{token}/confirm")
+
+    assert first.status_code == 201, first.text
+    assert second.status_code == 404, second.text
+
+def test_released_hold_frees_the_slot(client, seed):
+    token = _hold(client, seed.slot_ids[0]).json()["token"]
+    released = client.delete(f"{API}/appointments/holds/{token}")
+    direct = client.post(f"{API}/appointments/", json={"id": seed.slot_ids[0], "patient_id": 2})
+    released_again = client.delete(f"{API}/appointments/holds/{token}")
+
+    assert released.status_code == 204, released.text
+    assert direct.status_code == 201, direct.text
+    assert released_again.status_code == 404, released_again.text
+
+def test_held_slot_is_hidden_from_availability(client, seed):
+    _hold(client, seed.slot_ids[0])
+    response = client.get(
+        f"{API}/availability/check/",
+        params={"region": seed.region, "commune": seed.commune, "area": seed.area, "specialty": seed.specialty,
+                "time_range_filter": "morning"}
+    )
+
+    assert response.status_code == 200, response.text
+    assert seed.slot_ids[0] not in [slot["id"] for slot in response.json()["available_slots"]]
+
+async def _race_reservation_against_hold(slot_id: int):
+    # La retención toma el slot en una transacción abierta; la reserva directa llega mientras tanto y debe
+    # respetarla una vez que la retención confirma.
+    from src.core.database import AsyncSessionLocal
+    from src.repositories.holds import HoldRepository
+    from src.repositories.appointments import AppointmentRepository
+
+    async with AsyncSessionLocal() as holding, AsyncSessionLocal() as booking:
+        hold = await HoldRepository.create(holding, slot_id, 1, "race-token", timedelta(minutes=5))
+        reservation = asyncio.create_task(AppointmentRepository.reserve_slot(booking, slot_id, 2))
+        await asyncio.sleep(0.3)
+        await holding.commit()
+        reserved = await reservation
+        await booking.commit()
+    return hold, reserved
+
+def test_direct_booking_racing_a_hold_does_not_take_the_slot(client, seed, run):
+    hold, reserved = run(_race_reservation_against_hold, seed.slot_ids[0])
+    confirmed = client.post(f"{API}/appointments/holds/race-token/confirm")
+
+    assert hold is not None
+    assert reserved is None
+    assert confirmed.status_code == 201, confirmed.text
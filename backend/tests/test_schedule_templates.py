@@ -0,0 +1,55 @@
+from tests.conftest import API, slot_time
+
+def _create_template(client, seed, days: int = 2, start: str = "14:00:00", end: str = "16:00:00"):
+    day = slot_time(days, 0).date()
+    return client.post(
+        f"{API}/schedule-templates/",
+        json={
+            "medic_id": seed.medic_id,
+            "weekdays": [day.weekday()],
+            "start_time": start,
+            "end_time": end,
+            "slot_minutes": 60,
+            "valid_from": day.isoformat(),
+            "valid_until": day.isoformat()
+        }
+    )
+
+def test_book_template_slot_materializes_reserved_slot(client, seed):
+    created = _create_template(client, seed)
+    template_id = created.json()[0]["id"]
+    start_time = slot_time(2, 14).isoformat()
+    booked = client.post(
+        f"{API}/schedule-templates/appointments",
+        json={"template_id": template_id, "start_time": start_time, "patient_id": seed.patient_id}
+    )
+    booked_again = client.post(
+        f"{API}/schedule-templates/appointments",
+        json={"template_id": template_id, "start_time": start_time, "patient_id": 2}
+    )
+
+    assert created.status_code == 201, created.text
+    assert booked.status_code == 201, booked.text
+    assert booked.json()["status"] == "pending"
+    assert booked.json()["start_time"] == start_time
+    assert booked_again.status_code == 409, booked_again.text
+
+def test_book_template_slot_rejects_time_outside_template(client, seed):
+    template_id = _create_template(client, seed).json()[0]["id"]
+    booked = client.post(
+        f"{API}/schedule-templates/appointments",
+        json={"template_id": template_id, "start_time": slot_time(2, 14, 30).isoformat(), "patient_id": seed.patient_id}
+    )
+
+    assert booked.status_code == 400, booked.text
+
+def test_book_template_slot_reserves_already_published_slot(client, seed):
+    template_id = _create_template(client, seed, days=1, start="09:00:00", end="12:00:00").json()[0]["id"]
+    booked = client.post(
+        f"{API}/schedule-templates/appointments",
+        json={"template_id": template_id, "start_time": slot_time(1, 9).isoformat(), "patient_id": seed.patient_id}
+    )
+    direct = client.post(f"{API}/appointments/", json={"id": seed.slot_ids[0], "patient_id": 2})
+
+    assert booked.status_code == 201, booked.text
+    assert direct.status_code == 409, direct.text
@@ -0,0 +1,55 @@
+from tests.conftest import API, slot_time
+import asyncio
+
+def _csv(*rows: str) -> bytes:
+    return "\n".join(("medic_id,start_time,end_time",) + rows).encode()
+
+def test_upload_schedules_classifies_each_row(client, seed):
+    new_start, new_end = slot_time(3, 9).isoformat(), slot_time(3, 10).isoformat()
+    body = _csv(
+        f"{seed.medic_id},{new_start},{new_end}",
+        f"{seed.medic_id},{new_start},{new_end}",
+        f"{seed.medic_id},{slot_time(1, 9).isoformat()},{slot_time(1, 10).isoformat()}",
+        f"{seed.medic_id},{slot_time(1, 9, 30).isoformat()},{slot_time(1, 10, 30).isoformat()}",
+        f"99,{slot_time(3, 11).isoformat()},{slot_time(3, 12).isoformat()}",
+        f"{seed.medic_id},{new_end},{new_start}"
+    )
+    response = client.post(f"{API}/upload-schedules/", content=body, headers={"Content-Type": "text/csv"})
+
+    assert response.status_code == 201, response.text
+    summary = response.json()
+    assert {key: summary[key] for key in ("received", "invalid", "inserted", "duplicates", "overlaps", "unknown_medics")} == {
+        "received": 6, "invalid": 1, "inserted": 1, "duplicates": 2, "overlaps": 1, "unknown_medics": 1
+    }
+    assert summary["errors"][0]["line"] == 7
+    assert sum(chunk["rows"] for chunk in summary["chunks"]) == 6
+
+def test_upload_schedules_rejects_unknown_content_type(client, seed):
+    response = client.post(f"{API}/upload-schedules/", content=b"{}", headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 415, response.text
+
+async def _merge_same_slot_concurrently(medic_id: int):
+    # Ambas cargas clasifican el slot como nuevo; la segunda espera el índice único de la primera y debe contarlo
+    # como repetido en vez de fallar.
+    from src.core.database import AsyncSessionLocal
+    from src.repositories.upload_schedules import ScheduleUploadRepository
+
+    record = (2, medic_id, slot_time(4, 9), slot_time(4, 10), "morning")
+    async with AsyncSessionLocal() as first, AsyncSessionLocal() as second:
+        for session in (first, second):
+            await ScheduleUploadRepository.create_staging_table(session)
+            await ScheduleUploadRepository.copy_to_staging(session, [record])
+        first_summary = await ScheduleUploadRepository.merge_staging(first)
+        second_merge = asyncio.create_task(ScheduleUploadRepository.merge_staging(second))
+        await asyncio.sleep(0.3)
+        await first.commit()
+        second_summary = await second_merge
+        await second.commit()
+    return first_summary, second_summary
+
+def test_concurrent_uploads_of_the_same_slot_count_it_as_duplicate(client, seed, run):
+    first, second = run(_merge_same_slot_concurrently, seed.medic_id)
+
+    assert (first.inserted, first.duplicates) == (1, 0)
+    assert (second.inserted, second.duplicates) == (0, 1)